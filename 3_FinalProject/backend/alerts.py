@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import threading
+from typing import Any
+
+import numpy as np
+from pymongo.database import Database
+
+from gw2tp.alerts import AlertEngine
+from gw2tp.alerts import AlertRule
+from gw2tp.helper import gsc_dict_to_copper
+from gw2tp.market import MarketPrices
+
+from .notifiers import LocalNotifier
+from .notifiers import Notifier
+from .notifiers import StreamNotifier
+from .notifiers import WebhookNotifier
+from .notifiers import match_from_dict
+from .notifiers import match_to_dict
+from .published import PUBLISHED_COLLECTION
+from .published import PublishedState
+
+
+ALERT_RULES_COLLECTION = "alert_rules"
+# published_state document whose version every rule change increments
+ALERT_RULES_VERSION_KEY = "alert_rules"
+# Calculator fields stored as _g/_s/_c triples in the endpoint responses
+CALCULATOR_ALERT_FIELDS = ("profit", "crafting_cost", "sell")
+
+alert_engine = AlertEngine()
+local_notifier = LocalNotifier()
+stream_notifier = StreamNotifier()
+notifiers: list[Notifier] = [local_notifier, stream_notifier, WebhookNotifier()]
+# Calculator -> (price snapshot digest, rules version) it was last
+# evaluated on
+_evaluated_snapshots: dict[str, tuple[str, int]] = {}
+# Version of the rules alert_engine holds, None before the first load
+_rules_version: int | None = None
+_rules_lock = threading.Lock()
+
+
+def _apply_published_alerts(
+    doc: dict[str, Any],
+) -> None:
+    # Recent matches of the scheduler process; the newer ones also go out
+    # to this process' stream subscribers
+    history = local_notifier.history
+    latest = history[-1].timestamp if len(history) > 0 else None
+    matches = [match_from_dict(dct) for dct in doc["recent"]]
+    history.clear()
+    history.extend(matches)
+    if latest is not None:
+        stream_notifier.push([m for m in matches if m.timestamp > latest])
+
+
+published_alerts = PublishedState("alerts", _apply_published_alerts)
+
+
+def load_rules(
+    db: Database,
+) -> int:
+    # Rules live in Mongo and any API process may add or delete one. Each
+    # call reads their version only; the rules are re-read once it changed,
+    # and rules that are kept keep their edge state. Returns the version.
+    global _rules_version
+    head = db[PUBLISHED_COLLECTION].find_one(
+        {"_id": ALERT_RULES_VERSION_KEY},
+        {"version": True},
+    )
+    version = 0 if head is None else head["version"]
+    with _rules_lock:
+        if version == _rules_version:
+            return version
+        rules = {
+            doc["rule_id"]: AlertRule(**doc)
+            for doc in db[ALERT_RULES_COLLECTION].find({}, {"_id": False})
+        }
+        known = {rule.rule_id for rule in alert_engine.rules()}
+        for rule_id in known - rules.keys():
+            alert_engine.remove(rule_id)
+        for rule_id in rules.keys() - known:
+            alert_engine.add(rules[rule_id])
+        _rules_version = version
+    return version
+
+
+def _bump_rules_version(
+    db: Database,
+) -> None:
+    db[PUBLISHED_COLLECTION].update_one(
+        {"_id": ALERT_RULES_VERSION_KEY},
+        {"$inc": {"version": 1}},
+        upsert=True,
+    )
+
+
+def save_rule(
+    db: Database,
+    rule: AlertRule,
+) -> None:
+    db[ALERT_RULES_COLLECTION].replace_one(
+        {"rule_id": rule.rule_id},
+        dataclasses.asdict(rule),
+        upsert=True,
+    )
+    _bump_rules_version(db)
+    alert_engine.add(rule)
+
+
+def delete_rule(
+    db: Database,
+    rule_id: str,
+) -> bool:
+    result = db[ALERT_RULES_COLLECTION].delete_one({"rule_id": rule_id})
+    _bump_rules_version(db)
+    alert_engine.remove(rule_id)
+    return result.deleted_count > 0
+
+
+async def evaluate_and_notify(
+    db: Database,
+    changes: dict[str, dict[str, float]],
+) -> None:
+    matches = alert_engine.evaluate(changes)
+    if len(matches) == 0:
+        return
+    for notifier in notifiers:
+        await notifier.notify(matches)
+    await asyncio.to_thread(
+        published_alerts.publish,
+        db,
+        {"recent": [match_to_dict(m) for m in local_notifier.history]},
+    )
+
+
+async def evaluate_market(
+    db: Database,
+    changed_ids: np.ndarray,
+    prices: MarketPrices,
+) -> None:
+    await asyncio.to_thread(load_rules, db)
+    subjects = alert_engine.subjects
+    watched = [i for i in changed_ids.tolist() if str(i) in subjects]
+    if len(watched) == 0:
+        return
+    changes = {
+        str(item_id): {"buy": float(buy), "sell": float(sell)}
+        for item_id, (buy, sell) in prices.lookup(watched).items()
+    }
+    await evaluate_and_notify(db, changes)
+
+
+async def evaluate_calculator(
+    db: Database,
+    name: str,
+    data: dict[str, Any],
+    snapshot: str | None = None,
+) -> None:
+    rules_version = await asyncio.to_thread(load_rules, db)
+    if snapshot is not None:
+        # The same prices and rules cannot change any edge state
+        key = (snapshot, rules_version)
+        if _evaluated_snapshots.get(name) == key:
+            return
+        _evaluated_snapshots[name] = key
+    values = {
+        field: float(gsc_dict_to_copper(data, field))
+        for field in CALCULATOR_ALERT_FIELDS
+        if f"{field}_g" in data
+    }
+    await evaluate_and_notify(db, {name: values})
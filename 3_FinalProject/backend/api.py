@@ -1,33 +1,114 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import dataclasses
 import datetime
+import threading
+import uuid
 from typing import Any
+from typing import AsyncIterator
 from typing import Dict
 
-import httpx
+import numpy as np
+import orjson
 from fastapi import FastAPI
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+from fastapi import Query
+from fastapi import Request
+from pydantic import BaseModel
+from pydantic import Field
+from pydantic import model_validator
 from starlette.applications import Starlette
 from starlette.middleware import Middleware
 from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import StreamingResponse
 from starlette.routing import Mount
 
+from gw2tp.alerts import ALERT_OPERATORS
+from gw2tp.alerts import AlertRule
+from gw2tp.backtest import backtest_thresholds
+from gw2tp.backtest import load_history
+from gw2tp.batch import BATCH_RECIPES
+from gw2tp.batch import MAX_BATCH_QUANTITY
+from gw2tp.batch import MAX_BATCH_SWEEP_POINTS
+from gw2tp.batch import evaluate_quantities
+from gw2tp.catalogue import Catalogue
+from gw2tp.compression import compression_middleware
 from gw2tp.constants import API
 from gw2tp.constants import TAX_RATE
 from gw2tp.constants import ItemIDs
-from gw2tp.constants import Kits
+from gw2tp.db_schema import COLLECTIONS
+from gw2tp.db_schema import SNAPSHOT_TIMEZONE
 from gw2tp.db_schema import get_db_data
+from gw2tp.flips import FLIP_INDEX_SIZE
+from gw2tp.forge import FORGE_ENGINE
+from gw2tp.forge import LOADSTONE_PROMOTIONS
 from gw2tp.helper import copper_to_gsc
 from gw2tp.helper import gsc_dict_to_copper
 from gw2tp.helper import host_url
-
+from gw2tp.salvage import MAX_SALVAGE_STACKS
+from gw2tp.salvage import SALVAGE_TABLES
+from gw2tp.salvage import STACK_SIZE
+from gw2tp.salvage import SalvageTable
+from gw2tp.salvage import expected_mats_value
+from gw2tp.salvage import simulate_salvage_profit
+from gw2tp.salvage import summarize_profit
+from gw2tp.search import MAX_SEARCH_RESULTS
+from gw2tp.search import NameIndex
+from gw2tp.snapshot import PriceSnapshot
+
+from backend.alerts import alert_engine
+from backend.alerts import delete_rule
+from backend.alerts import load_rules
+from backend.alerts import local_notifier
+from backend.alerts import save_rule
+from backend.alerts import stream_notifier
 from backend.db import db
+from backend.db import history_db
+from backend.flip_scanner import flip_index
+from backend.flip_scanner import market_prices
+from backend.forecasting import forecast_store
+from backend.http_cache import HTTPCacheMiddleware
+from backend.http_client import close_http_client
+from backend.http_client import http_client
+from backend.notifiers import ALERT_HISTORY_SIZE
+from backend.notifiers import public_match
+from backend.notifiers import webhook_url_error
+from backend.order_books import order_book_cache
+from backend.polling import InterestMiddleware
+from backend.profiling import ADMIN_TOKEN_HEADER
+from backend.profiling import PROFILE_HEADER
+from backend.profiling import PROFILING_ENABLED
+from backend.profiling import ProfilingMiddleware
+from backend.profiling import is_admin
+from backend.profiling import profiled
+from backend.published import PUBLISHED_POLL_SECONDS
+from backend.responses import ORJSONResponse
+from backend.scheduler import EMBEDDED_SCHEDULER
+from backend.scheduler import POLL_MIN_INTERVAL_SECONDS
+from backend.scheduler import SNAPSHOT_BUCKET_SECONDS
 from backend.scheduler import start_scheduler
+from backend.shared_cache import PRICE_SNAPSHOT_HEADER
+from backend.shared_cache import SnapshotCache
+from backend.shared_cache import create_backend
+from backend.shared_cache import record_snapshot
 
 
 api_base = host_url()
-fastapi_app = FastAPI()
+fastapi_app = FastAPI(default_response_class=ORJSONResponse)
+# Opened and, until the first `python -m backend.catalogue_sync`, seeded
+# with the fixtures by the lifespan
+catalogue = Catalogue()
+# Versions match the scheduler's snapshot buckets, so every stored snapshot
+# is computed from one set of prices, fetched once across all replicas
+snapshot_cache = SnapshotCache(
+    create_backend(),
+    snapshot_seconds=SNAPSHOT_BUCKET_SECONDS,
+)
+# (catalogue version, index), built by the lifespan and rebuilt by a
+# scheduler job once the catalogue was synced; requests only read it
+_search_index: tuple[tuple[int, int], NameIndex] | None = None
+_search_index_lock = threading.Lock()
 
 
 def get_sub_dct(
@@ -42,75 +123,72 @@ def get_sub_dct(
     }
 
 
-def fetch_tp_prices(
+def _fetch_listings(
     item_ids: list[int],
-) -> dict[int, dict[str, Any]]:
+) -> dict[int, tuple[int, int, int, int]]:
     params = {"ids": ",".join(str(i) for i in item_ids)}
-    with httpx.Client() as client:
-        response = client.get(
-            API.GW2_COMMERCE_API_URL,
-            params=params,
-            timeout=10.0,
-        )
+    response = http_client().get(API.GW2_COMMERCE_API_URL, params=params)
     response.raise_for_status()
     data: list[dict[str, Any]] = response.json()
-    if len(data) == 0:
-        raise RuntimeError("No items found")
+    return {
+        int(item["id"]): (
+            int(item["buys"]["unit_price"]),
+            int(item["sells"]["unit_price"]),
+            int(item["buys"]["quantity"]),
+            int(item["sells"]["quantity"]),
+        )
+        for item in data
+    }
+
 
-    fetched_data: dict[int, dict[str, Any]] = {}
-    for item in data:
-        item_id = int(item["id"])
-        buy_price = int(item["buys"]["unit_price"])
-        sell_price = int(item["sells"]["unit_price"])
-        flip_profit = int(round(sell_price * TAX_RATE, 6) - buy_price)
-        buy_g, buy_s, buy_c = copper_to_gsc(buy_price)
-        sell_g, sell_s, sell_c = copper_to_gsc(sell_price)
-        flip_g, flip_s, flip_c = copper_to_gsc(flip_profit)
-
-        fetched_data[item_id] = {
-            "buy": buy_price,
-            "sell": sell_price,
-            "buy_g": buy_g,
-            "buy_s": buy_s,
-            "buy_c": buy_c,
-            "sell_g": sell_g,
-            "sell_s": sell_s,
-            "sell_c": sell_c,
-            "flip_g": flip_g,
-            "flip_s": flip_s,
-            "flip_c": flip_c,
-            "sell_after_tax_g": int(sell_price * TAX_RATE // 10_000),
-            "sell_after_tax_s": int((sell_price * TAX_RATE % 10_000) // 100),
-            "sell_after_tax_c": int(sell_price * TAX_RATE % 100),
+def listings(
+    item_ids: list[int],
+    version: int | None = None,
+) -> dict[int, tuple[int, int, int, int]]:
+    # (buy, sell, buy quantity, sell quantity) per item, shared by all
+    # replicas for a snapshot version
+    def _fill(
+        keys: list[str],
+    ) -> dict[str, bytes]:
+        fetched = _fetch_listings([int(key) for key in keys])
+        return {
+            str(item_id): orjson.dumps(listing)
+            for item_id, listing in fetched.items()
         }
-    return fetched_data
+
+    cached = snapshot_cache.get_or_fill(
+        "listings",
+        [str(item_id) for item_id in dict.fromkeys(item_ids)],
+        _fill,
+        version=version,
+    )
+    return {
+        int(key): tuple(orjson.loads(value)) for key, value in cached.items()
+    }
+
+
+def fetch_tp_prices(
+    item_ids: list[int],
+) -> PriceSnapshot:
+    # Stamped with the start of its version; the digest is recorded so a
+    # cached calculator result names the prices it was computed from
+    version = snapshot_cache.version()
+    snapshot = PriceSnapshot.from_listings(
+        listings(item_ids, version=version),
+        timestamp=version * snapshot_cache.snapshot_seconds,
+    )
+    if len(snapshot) == 0:
+        raise RuntimeError("No items found")
+    record_snapshot(snapshot.digest)
+    return snapshot
 
 
 def get_unid_gear_data(
-    gear_id: int,
-) -> dict[int, dict[str, float]] | None:
+    table: SalvageTable,
+) -> PriceSnapshot | None:
     try:
         fetched_data = fetch_tp_prices(
-            [
-                gear_id,
-                ItemIDs.ECTOPLASM,
-                ItemIDs.LUCENT_MOTE,
-                ItemIDs.MIRTHIL,
-                ItemIDs.ELDER_WOOD,
-                ItemIDs.THICK_LEATHER,
-                ItemIDs.GOSSAMER_SCRAP,
-                ItemIDs.SILK_SCRAP,
-                ItemIDs.HARDENED_LEATHER,
-                ItemIDs.ANCIENT_WOOD_LOG,
-                ItemIDs.SYMBOL_OF_ENH,
-                ItemIDs.SYMBOL_OF_PAIN,
-                ItemIDs.ORICHALCUM_ORE,
-                ItemIDs.SYMBOL_OF_CONTROL,
-                ItemIDs.CHARM_OF_BRILLIANCE,
-                ItemIDs.CHARM_OF_POTENCE,
-                ItemIDs.CHARM_OF_SKILL,
-                ItemIDs.COMMON_GEAR,
-            ],
+            [table.gear_id, *table.drop_rates],
         )
     except Exception:
         return None
@@ -118,99 +196,569 @@ def get_unid_gear_data(
     return fetched_data
 
 
+def _get_salvage_inputs(
+    table: SalvageTable,
+) -> tuple[float, dict[int, float]] | None:
+    fetched_data = get_unid_gear_data(table)
+    if fetched_data is None:
+        return None
+    stack_buy = fetched_data[table.gear_id].buy * STACK_SIZE
+    sells = {
+        item_id: fetched_data[item_id].sell for item_id in table.drop_rates
+    }
+    return stack_buy, sells
+
+
+def _get_salvage_profit(
+    table_name: str,
+) -> ORJSONResponse:
+    table = SALVAGE_TABLES[table_name]
+    inputs = _get_salvage_inputs(table)
+    if inputs is None:
+        return ORJSONResponse(
+            content={"error": "Failed to fetch prices"},
+            status_code=502,
+        )
+    stack_buy, sells = inputs
+
+    mats_value_after_tax = expected_mats_value(table, sells)
+    salvage_costs = table.salvage_costs
+    profit_stack = mats_value_after_tax - stack_buy - salvage_costs
+
+    data = {
+        **get_sub_dct("stack_buy", stack_buy),
+        **get_sub_dct("salvage_costs", salvage_costs),
+        **get_sub_dct("mats_value_after_tax", mats_value_after_tax),
+        **get_sub_dct("profit_stack", profit_stack),
+    }
+    return ORJSONResponse(content=data)
+
+
 @fastapi_app.get("/history")
-async def get_item_history(
+@profiled
+def get_item_history(
     item_name: str,
-) -> JSONResponse:
+) -> ORJSONResponse:
     end_datetime = datetime.datetime.now(
         tz=datetime.timezone(datetime.timedelta(hours=2), "UTC")
     )
     start_datetime = end_datetime - datetime.timedelta(hours=24)
     try:
         data = get_db_data(
-            db,
+            history_db,
             item_name,
             start_datetime=start_datetime,
             end_datetime=end_datetime,
         )
-        return JSONResponse(content=jsonable_encoder(data))
+        return ORJSONResponse(content=data)
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             content={"error": str(e)},
             status_code=500,
         )
 
 
+@fastapi_app.get("/backtest")
+@profiled
+def get_backtest(
+    item_name: str,
+    min_profit: float = 0.0,
+    hold_hours: float = 6.0,
+) -> ORJSONResponse:
+    if item_name not in COLLECTIONS:
+        return ORJSONResponse(
+            content={"error": f"No history stored for '{item_name}'"},
+            status_code=404,
+        )
+    history = load_history(history_db, item_name)
+    results = backtest_thresholds(history, [min_profit], hold_hours)
+    data = {
+        "snapshots": len(history),
+        "trades": int(results["trades"][0]),
+        "win_rate": float(results["win_rate"][0]),
+        **get_sub_dct("total_profit", results["total_profit"][0]),
+        **get_sub_dct("mean_profit", results["mean_profit"][0]),
+        **get_sub_dct("max_drawdown", results["max_drawdown"][0]),
+    }
+    return ORJSONResponse(content=data)
+
+
+def _snapshot_time(
+    timestamp: float,
+) -> str:
+    return datetime.datetime.fromtimestamp(
+        timestamp,
+        tz=SNAPSHOT_TIMEZONE,
+    ).isoformat()
+
+
+@fastapi_app.get("/forecast")
+@profiled
+def get_forecast(
+    item_name: str,
+    horizon: int = 8,
+) -> ORJSONResponse:
+    if item_name not in COLLECTIONS:
+        return ORJSONResponse(
+            content={"error": f"No history stored for '{item_name}'"},
+            status_code=404,
+        )
+    series = forecast_store.forecast(item_name, min(max(horizon, 1), 96))
+    if len(series) == 0:
+        return ORJSONResponse(
+            content={"error": f"No snapshots of '{item_name}' yet"},
+            status_code=404,
+        )
+    # Points use the /history layout so they plot like stored snapshots
+    points: list[dict[str, Any]] = []
+    for field, state in series.items():
+        for i, (timestamp, value) in enumerate(state["points"]):
+            if i == len(points):
+                points.append({"timestamp": _snapshot_time(timestamp)})
+            points[i].update(get_sub_dct(field, value))
+    data = {
+        "item_name": item_name,
+        "forecast": points,
+        "trend": {field: state["trend"] for field, state in series.items()},
+        "z_score": {field: state["z_score"] for field, state in series.items()},
+    }
+    return ORJSONResponse(content=data)
+
+
+@fastapi_app.get("/anomalies")
+@profiled
+def get_anomalies(
+    item_name: str | None = None,
+    limit: int = 50,
+) -> ORJSONResponse:
+    if item_name is not None and item_name not in COLLECTIONS:
+        return ORJSONResponse(
+            content={"error": f"No history stored for '{item_name}'"},
+            status_code=404,
+        )
+    anomalies = forecast_store.recent_anomalies(item_name, limit=limit)
+    data = {
+        "anomalies": [
+            {
+                "item_name": anomaly.subject,
+                "field": anomaly.field,
+                "timestamp": _snapshot_time(anomaly.timestamp),
+                "z_score": anomaly.z_score,
+                **get_sub_dct("value", anomaly.value),
+                **get_sub_dct("mean", anomaly.mean),
+            }
+            for anomaly in anomalies
+        ]
+    }
+    return ORJSONResponse(content=data)
+
+
 @fastapi_app.get("/price")
-async def get_price(
+@profiled
+def get_price(
     item_id: int,
-) -> JSONResponse:
+) -> ORJSONResponse:
+    # Sync: the price cache may block on a fill lock and on the GW2 API,
+    # which must happen in the threadpool, not on the event loop
     try:
-        # with flask_app.app_context():
         data = fetch_tp_prices([item_id])
-        return JSONResponse(content=jsonable_encoder(data[item_id]))
+        return ORJSONResponse(content=data[item_id].to_dict())
     except Exception as e:
-        return JSONResponse(content=jsonable_encoder({"error": str(e)}))
+        return ORJSONResponse(content={"error": str(e)}, status_code=502)
 
 
-@fastapi_app.get("/rare_gear_salvage")
-def get_rare_gear_salvage() -> JSONResponse:
-    fetched_data = get_unid_gear_data(gear_id=ItemIDs.RARE_UNID_GEAR)
-    if fetched_data is None:
-        return JSONResponse(content=jsonable_encoder({"error"}))
-
-    stack_buy = fetched_data[ItemIDs.RARE_UNID_GEAR]["buy"] * 250.0
-    ecto_sell = fetched_data[ItemIDs.ECTOPLASM]["sell"]
-    lucent_mote_sell = fetched_data[ItemIDs.LUCENT_MOTE]["sell"]
-    mithril_sell = fetched_data[ItemIDs.MIRTHIL]["sell"]
-    elder_wood_sell = fetched_data[ItemIDs.ELDER_WOOD]["sell"]
-    thick_leather_sell = fetched_data[ItemIDs.THICK_LEATHER]["sell"]
-    gossamer_scrap_sell = fetched_data[ItemIDs.GOSSAMER_SCRAP]["sell"]
-    silk_scrap_sell = fetched_data[ItemIDs.SILK_SCRAP]["sell"]
-    hardened_sell = fetched_data[ItemIDs.HARDENED_LEATHER]["sell"]
-    ancient_wood_sell = fetched_data[ItemIDs.ANCIENT_WOOD_LOG]["sell"]
-    symbol_of_enh_sell = fetched_data[ItemIDs.SYMBOL_OF_ENH]["sell"]
-    symbol_of_pain_sell = fetched_data[ItemIDs.SYMBOL_OF_PAIN]["sell"]
-    orichalcum_sell = fetched_data[ItemIDs.ORICHALCUM_ORE]["sell"]
-    symbol_of_control_sell = fetched_data[ItemIDs.SYMBOL_OF_CONTROL]["sell"]
-    charm_of_brilliance_sell = fetched_data[ItemIDs.CHARM_OF_BRILLIANCE]["sell"]
-    charm_of_potence_sell = fetched_data[ItemIDs.CHARM_OF_POTENCE]["sell"]
-    charm_of_skill_sell = fetched_data[ItemIDs.CHARM_OF_SKILL]["sell"]
-
-    mats_value_after_tax = (
-        mithril_sell * (250.0 * 0.4879) * TAX_RATE
-        + elder_wood_sell * (250.0 * 0.3175) * TAX_RATE
-        + silk_scrap_sell * (250.0 * 0.3367) * TAX_RATE
-        + thick_leather_sell * (250.0 * 0.3457) * TAX_RATE
-        + orichalcum_sell * (250.0 * 0.041) * TAX_RATE
-        + ancient_wood_sell * (250.0 * 0.0249) * TAX_RATE
-        + gossamer_scrap_sell * (250.0 * 0.018) * TAX_RATE
-        + hardened_sell * (250.0 * 0.0162) * TAX_RATE
-        + ecto_sell * (250.0 * 0.87) * TAX_RATE  # lowered
-        + lucent_mote_sell * (250.0 * 0.2387) * TAX_RATE
-        + symbol_of_control_sell * (250.0 * 0.001) * TAX_RATE
-        + symbol_of_enh_sell * (250.0 * 0.0003) * TAX_RATE
-        + symbol_of_pain_sell * (250.0 * 0.0004) * TAX_RATE
-        + charm_of_brilliance_sell * (250.0 * 0.0006) * TAX_RATE
-        + charm_of_potence_sell * (250.0 * 0.0009) * TAX_RATE
-        + charm_of_skill_sell * (250.0 * 0.0009) * TAX_RATE
+@fastapi_app.get("/item")
+@profiled
+def get_item(
+    item_id: int,
+) -> ORJSONResponse:
+    item = catalogue.item(item_id)
+    if item is None:
+        return ORJSONResponse(
+            content={"error": f"Unknown item {item_id}"},
+            status_code=404,
+        )
+    data = {**item, "recipes": catalogue.recipes_for(item_id)}
+    return ORJSONResponse(content=data)
+
+
+def refresh_search_index() -> None:
+    # Blocking, a few hundred ms for the full catalogue; one build at a
+    # time, and requests keep reading the previous index meanwhile
+    global _search_index
+    with _search_index_lock:
+        version = catalogue.version
+        if _search_index is not None and _search_index[0] == version:
+            return
+        _search_index = (version, NameIndex(catalogue.names()))
+
+
+@fastapi_app.get("/search")
+@profiled
+def get_search(
+    q: str,
+    limit: int = Query(10, ge=1, le=MAX_SEARCH_RESULTS),
+) -> ORJSONResponse:
+    search_index = _search_index
+    if search_index is None:
+        return ORJSONResponse(
+            content={"error": "Search index not built yet"},
+            status_code=503,
+        )
+    matches = search_index[1].search(q, limit=limit)
+    item_ids = [item_id for item_id, _ in matches]
+    items = catalogue.items(item_ids)
+    # Prices from the last market scan, absent until it completed
+    prices = market_prices.lookup(item_ids)
+    results = []
+    for item_id, name in matches:
+        result: dict[str, Any] = {
+            "item_id": item_id,
+            "name": name,
+            "icon": items.get(item_id, {}).get("icon"),
+        }
+        if item_id in prices:
+            buy, sell = prices[item_id]
+            result.update(get_sub_dct("buy", buy))
+            result.update(get_sub_dct("sell", sell))
+        results.append(result)
+    return ORJSONResponse(content={"query": q, "results": results})
+
+
+class AlertRequest(BaseModel):
+    # item id, or one of the calculators stored by the scheduler
+    subject: str
+    field: str
+    op: str
+    # copper
+    threshold: float
+    webhook_url: str | None = None
+
+
+def _alert_fields(
+    subject: str,
+) -> set[str] | None:
+    if subject.isdigit():
+        return {"buy", "sell"}
+    if subject in COLLECTIONS:
+        return {"profit", "crafting_cost", "sell"}
+    return None
+
+
+# Rule listings change with every POST, keep them out of HTTP caches
+_NO_STORE = {"Cache-Control": "no-store"}
+# Rules decide where the scheduler sends requests, only admins edit them
+_ADMIN_REQUIRED = {"error": "Alert rules require an admin token"}
+
+
+def _public_rule(
+    rule: AlertRule,
+) -> dict[str, Any]:
+    data = dataclasses.asdict(rule)
+    data.pop("webhook_url")
+    return data
+
+
+@fastapi_app.get("/alerts")
+@profiled
+def get_alerts() -> ORJSONResponse:
+    load_rules(db)
+    data = {"rules": [_public_rule(r) for r in alert_engine.rules()]}
+    return ORJSONResponse(content=data, headers=_NO_STORE)
+
+
+@fastapi_app.post("/alerts")
+@profiled
+def post_alert(
+    request: AlertRequest,
+    http_request: Request,
+) -> ORJSONResponse:
+    if not is_admin(http_request):
+        return ORJSONResponse(content=_ADMIN_REQUIRED, status_code=403)
+    fields = _alert_fields(request.subject)
+    if fields is None:
+        return ORJSONResponse(
+            content={"error": f"Unknown alert subject '{request.subject}'"},
+            status_code=400,
+        )
+    if request.field not in fields or request.op not in ALERT_OPERATORS:
+        return ORJSONResponse(
+            content={
+                "error": "Invalid field or operator",
+                "fields": sorted(fields),
+                "operators": sorted(ALERT_OPERATORS),
+            },
+            status_code=400,
+        )
+    if request.webhook_url is not None:
+        error = webhook_url_error(request.webhook_url)
+        if error is not None:
+            return ORJSONResponse(content={"error": error}, status_code=400)
+    rule = AlertRule(rule_id=uuid.uuid4().hex, **request.model_dump())
+    save_rule(db, rule)
+    return ORJSONResponse(content=dataclasses.asdict(rule), status_code=201)
+
+
+@fastapi_app.delete("/alerts")
+@profiled
+def delete_alert(
+    rule_id: str,
+    http_request: Request,
+) -> ORJSONResponse:
+    if not is_admin(http_request):
+        return ORJSONResponse(content=_ADMIN_REQUIRED, status_code=403)
+    if not delete_rule(db, rule_id):
+        return ORJSONResponse(
+            content={"error": f"Unknown alert rule '{rule_id}'"},
+            status_code=404,
+        )
+    return ORJSONResponse(content={"rule_id": rule_id})
+
+
+@fastapi_app.get("/alerts/recent")
+@profiled
+def get_recent_alerts(
+    limit: int = Query(50, ge=1, le=ALERT_HISTORY_SIZE),
+) -> ORJSONResponse:
+    history = list(local_notifier.history)[-limit:]
+    data = {"alerts": [public_match(match) for match in reversed(history)]}
+    return ORJSONResponse(content=data, headers=_NO_STORE)
+
+
+@fastapi_app.get("/alerts/stream")
+async def get_alert_stream() -> StreamingResponse:
+    async def _events() -> AsyncIterator[bytes]:
+        async for match in stream_notifier.subscribe():
+            yield b"data: " + orjson.dumps(public_match(match)) + b"\n\n"
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers=_NO_STORE,
     )
 
-    salvage_costs = Kits.SILVER_FED * 250.0
 
-    profit_stack = mats_value_after_tax - stack_buy - salvage_costs
+@fastapi_app.get("/flips")
+@profiled
+def get_flips(
+    limit: int = Query(20, ge=1, le=FLIP_INDEX_SIZE),
+    min_roi: float = 0.0,
+) -> ORJSONResponse:
+    if flip_index.updated_at is None:
+        return ORJSONResponse(
+            content={"error": "Flip scanner has not completed a scan yet"},
+            status_code=503,
+        )
+    data = {
+        "updated_at": flip_index.updated_at.isoformat(),
+        "scanned_items": flip_index.scanned_items,
+        "flips": flip_index.query(limit=limit, min_roi=min_roi),
+    }
+    return ORJSONResponse(content=data)
+
 
+@fastapi_app.get("/depth")
+@profiled
+def get_depth(
+    item_id: int,
+    quantity: int = Query(1, ge=1, le=MAX_BATCH_QUANTITY),
+) -> ORJSONResponse:
+    try:
+        book = order_book_cache.get_many([item_id])[item_id]
+    except Exception as e:
+        return ORJSONResponse(content={"error": str(e)}, status_code=502)
+
+    buy_cost = float(book.instant_buy_cost(np.array([quantity]))[0])
+    sell_value = float(book.instant_sell_value(np.array([quantity]))[0])
+    data: dict[str, Any] = {
+        "quantity": quantity,
+        "sell_depth": book.sells.depth,
+        "buy_depth": book.buys.depth,
+    }
+    # NaN when the book cannot fill the quantity
+    if not np.isnan(buy_cost):
+        data.update(get_sub_dct("instant_buy_cost", buy_cost))
+        data.update(get_sub_dct("instant_buy_unit", buy_cost / quantity))
+    if not np.isnan(sell_value):
+        sell_value_after_tax = sell_value * TAX_RATE
+        data.update(
+            get_sub_dct("instant_sell_after_tax", sell_value_after_tax),
+        )
+        data.update(
+            get_sub_dct(
+                "instant_sell_unit_after_tax",
+                sell_value_after_tax / quantity,
+            )
+        )
+    return ORJSONResponse(content=data)
+
+
+@fastapi_app.get("/salvage_depth")
+@profiled
+def get_salvage_depth(
+    table: str = "rare_gear_salvage",
+    stacks: int = Query(1, ge=1, le=MAX_SALVAGE_STACKS),
+) -> ORJSONResponse:
+    if table not in SALVAGE_TABLES:
+        return ORJSONResponse(
+            content={"error": f"Unknown salvage table '{table}'"},
+            status_code=404,
+        )
+    salvage_table = SALVAGE_TABLES[table]
+    try:
+        books = order_book_cache.get_many(
+            [salvage_table.gear_id, *salvage_table.drop_rates],
+        )
+    except Exception as e:
+        return ORJSONResponse(content={"error": str(e)}, status_code=502)
+
+    # Buy the gear off the sell listings, dump the mats into buy orders
+    gear_count = int(STACK_SIZE) * stacks
+    gear_book = books[salvage_table.gear_id]
+    gear_cost = float(gear_book.instant_buy_cost(np.array([gear_count]))[0])
+    mats_value = 0.0
+    for item_id, rate in salvage_table.drop_rates.items():
+        count = int(round(STACK_SIZE * rate * stacks))
+        if count > 0:
+            mats_value += float(
+                books[item_id].instant_sell_value(np.array([count]))[0]
+            )
+    mats_value_after_tax = mats_value * TAX_RATE
+    if np.isnan(gear_cost) or np.isnan(mats_value_after_tax):
+        return ORJSONResponse(
+            content={"error": "Not enough order book depth", "stacks": stacks},
+            status_code=422,
+        )
+
+    salvage_costs = salvage_table.salvage_costs * stacks
+    profit = mats_value_after_tax - gear_cost - salvage_costs
     data = {
-        **get_sub_dct("stack_buy", stack_buy),
+        "stacks": stacks,
+        **get_sub_dct("gear_cost", gear_cost),
         **get_sub_dct("salvage_costs", salvage_costs),
         **get_sub_dct("mats_value_after_tax", mats_value_after_tax),
-        **get_sub_dct("profit_stack", profit_stack),
+        **get_sub_dct("profit", profit),
+        **get_sub_dct("profit_stack", profit / stacks),
+    }
+    return ORJSONResponse(content=data)
+
+
+class BatchQuery(BaseModel):
+    calculator: str
+    quantity: int = Field(default=1, ge=1, le=MAX_BATCH_QUANTITY)
+    # Return the profit for every quantity from 1 to quantity
+    sweep: bool = False
+
+
+class BatchRequest(BaseModel):
+    queries: list[BatchQuery] = Field(max_length=500)
+
+    @model_validator(mode="after")
+    def _bound_sweeps(self) -> BatchRequest:
+        # Every swept quantity is one point of each returned curve
+        points = sum(q.quantity for q in self.queries if q.sweep)
+        if points > MAX_BATCH_SWEEP_POINTS:
+            raise ValueError(
+                f"Sweeps cover {points} quantities, at most "
+                f"{MAX_BATCH_SWEEP_POINTS} per request"
+            )
+        return self
+
+
+@fastapi_app.post("/batch")
+@profiled
+def post_batch(
+    request: BatchRequest,
+) -> ORJSONResponse:
+    unknown = sorted(
+        {q.calculator for q in request.queries} - BATCH_RECIPES.keys()
+    )
+    if len(unknown) > 0:
+        return ORJSONResponse(
+            content={"error": f"Unknown calculators {unknown}"},
+            status_code=404,
+        )
+    # Every query is answered from the same set of books
+    item_ids = sorted(
+        {
+            item_id
+            for q in request.queries
+            for item_id in BATCH_RECIPES[q.calculator].item_ids
+        }
+    )
+    try:
+        books = order_book_cache.get_many(item_ids)
+    except Exception as e:
+        return ORJSONResponse(content={"error": str(e)}, status_code=502)
+
+    results = []
+    for query in request.queries:
+        recipe = BATCH_RECIPES[query.calculator]
+        quantities = (
+            np.arange(1, query.quantity + 1)
+            if query.sweep
+            else np.array([query.quantity])
+        )
+        curve = evaluate_quantities(recipe, quantities, books)
+        result: dict[str, Any] = {
+            "calculator": query.calculator,
+            "quantity": query.quantity,
+        }
+        # NaN (not enough depth) serializes as null
+        if query.sweep:
+            result["profit_curve"] = curve["profit"]
+            result["cost_curve"] = curve["cost"]
+        else:
+            for key in ("cost", "revenue", "profit", "profit_per_unit"):
+                result[key] = float(curve[key][0])
+        results.append(result)
+    return ORJSONResponse(content={"results": results})
+
+
+@fastapi_app.get("/rare_gear_salvage")
+@profiled
+@snapshot_cache.cached
+def get_rare_gear_salvage() -> ORJSONResponse:
+    return _get_salvage_profit("rare_gear_salvage")
+
+
+@fastapi_app.get("/salvage_simulation")
+@profiled
+def get_salvage_simulation(
+    table: str = "rare_gear_salvage",
+) -> ORJSONResponse:
+    if table not in SALVAGE_TABLES:
+        return ORJSONResponse(
+            content={"error": f"Unknown salvage table '{table}'"},
+            status_code=404,
+        )
+    inputs = _get_salvage_inputs(SALVAGE_TABLES[table])
+    if inputs is None:
+        return ORJSONResponse(
+            content={"error": "Failed to fetch prices"},
+            status_code=502,
+        )
+    stack_buy, sells = inputs
+
+    profit = simulate_salvage_profit(table, stack_buy, sells)
+    summary = summarize_profit(profit)
+
+    data = {
+        **get_sub_dct("expected_profit", summary["mean"]),
+        **get_sub_dct("std_profit", summary["std"]),
+        **get_sub_dct("p5_profit", summary["p5"]),
+        **get_sub_dct("p50_profit", summary["p50"]),
+        **get_sub_dct("p95_profit", summary["p95"]),
+        "loss_probability": summary["loss_probability"],
+        "simulations": len(profit),
     }
-    return JSONResponse(content=jsonable_encoder(data))
+    return ORJSONResponse(content=data)
 
 
 @fastapi_app.get("/rare_weapon_craft")
-def get_rare_weapon_craft() -> JSONResponse:
+@profiled
+@snapshot_cache.cached
+def get_rare_weapon_craft() -> ORJSONResponse:
     try:
         fetched_data = fetch_tp_prices(
             [
@@ -228,19 +776,19 @@ def get_rare_weapon_craft() -> JSONResponse:
             ],
         )
     except Exception as e:
-        return JSONResponse(content=jsonable_encoder({"error": str(e)}))
-
-    ecto_sell_after_tax = fetched_data[ItemIDs.ECTOPLASM]["sell"] * TAX_RATE
-    mithril_ore_buy = fetched_data[ItemIDs.MITHRIL_ORE]["buy"]
-    mithril_ingot_buy = fetched_data[ItemIDs.MITHRIL_INGOT]["buy"]
-    elder_wood_log_buy = fetched_data[ItemIDs.ELDER_WOOD_LOG]["buy"]
-    elder_wood_plank_buy = fetched_data[ItemIDs.ELDER_WOOD_PLANK]["buy"]
-    large_claw_buy = fetched_data[ItemIDs.LARGE_CLAW]["buy"]
-    potent_blood_buy = fetched_data[ItemIDs.POTENT_BLOOD]["buy"]
-    large_bone_buy = fetched_data[ItemIDs.LARGE_BONE]["buy"]
-    intricate_totem_buy = fetched_data[ItemIDs.INTRICATE_TOTEM]["buy"]
-    large_fang_buy = fetched_data[ItemIDs.LARGE_FANG]["buy"]
-    potent_sac_buy = fetched_data[ItemIDs.POTENT_VENOM_SAC]["buy"]
+        return ORJSONResponse(content={"error": str(e)}, status_code=502)
+
+    ecto_sell_after_tax = fetched_data[ItemIDs.ECTOPLASM].sell * TAX_RATE
+    mithril_ore_buy = fetched_data[ItemIDs.MITHRIL_ORE].buy
+    mithril_ingot_buy = fetched_data[ItemIDs.MITHRIL_INGOT].buy
+    elder_wood_log_buy = fetched_data[ItemIDs.ELDER_WOOD_LOG].buy
+    elder_wood_plank_buy = fetched_data[ItemIDs.ELDER_WOOD_PLANK].buy
+    large_claw_buy = fetched_data[ItemIDs.LARGE_CLAW].buy
+    potent_blood_buy = fetched_data[ItemIDs.POTENT_BLOOD].buy
+    large_bone_buy = fetched_data[ItemIDs.LARGE_BONE].buy
+    intricate_totem_buy = fetched_data[ItemIDs.INTRICATE_TOTEM].buy
+    large_fang_buy = fetched_data[ItemIDs.LARGE_FANG].buy
+    potent_sac_buy = fetched_data[ItemIDs.POTENT_VENOM_SAC].buy
 
     lowest_t5_mat = min(
         large_claw_buy,
@@ -280,11 +828,13 @@ def get_rare_weapon_craft() -> JSONResponse:
         **get_sub_dct("profit", rare_gear_craft_profit),
     }
 
-    return JSONResponse(content=jsonable_encoder(data))
+    return ORJSONResponse(content=data)
 
 
 @fastapi_app.get("/t5_mats_buy")
-def get_t5_mats_buy() -> JSONResponse:
+@profiled
+@snapshot_cache.cached
+def get_t5_mats_buy() -> ORJSONResponse:
     try:
         fetched_data = fetch_tp_prices(
             [
@@ -298,15 +848,15 @@ def get_t5_mats_buy() -> JSONResponse:
             ],
         )
     except Exception as e:
-        return JSONResponse(content=jsonable_encoder({"error": str(e)}))
+        return ORJSONResponse(content={"error": str(e)}, status_code=502)
 
-    large_claw_buy = fetched_data[ItemIDs.LARGE_CLAW]["buy"]
-    potent_blood_buy = fetched_data[ItemIDs.POTENT_BLOOD]["buy"]
-    large_bone_buy = fetched_data[ItemIDs.LARGE_BONE]["buy"]
-    intricate_totem_buy = fetched_data[ItemIDs.INTRICATE_TOTEM]["buy"]
-    large_fang_buy = fetched_data[ItemIDs.LARGE_FANG]["buy"]
-    venom_sac_buy = fetched_data[ItemIDs.POTENT_VENOM_SAC]["buy"]
-    large_scale_buy = fetched_data[ItemIDs.LARGE_SCALE]["buy"]
+    large_claw_buy = fetched_data[ItemIDs.LARGE_CLAW].buy
+    potent_blood_buy = fetched_data[ItemIDs.POTENT_BLOOD].buy
+    large_bone_buy = fetched_data[ItemIDs.LARGE_BONE].buy
+    intricate_totem_buy = fetched_data[ItemIDs.INTRICATE_TOTEM].buy
+    large_fang_buy = fetched_data[ItemIDs.LARGE_FANG].buy
+    venom_sac_buy = fetched_data[ItemIDs.POTENT_VENOM_SAC].buy
+    large_scale_buy = fetched_data[ItemIDs.LARGE_SCALE].buy
 
     data = {
         **get_sub_dct("large_claw", large_claw_buy),
@@ -318,11 +868,13 @@ def get_t5_mats_buy() -> JSONResponse:
         **get_sub_dct("large_scale", large_scale_buy),
     }
 
-    return JSONResponse(content=jsonable_encoder(data))
+    return ORJSONResponse(content=data)
 
 
 @fastapi_app.get("/mats_crafting_compare")
-def get_mats_crafting_compare() -> JSONResponse:
+@profiled
+@snapshot_cache.cached
+def get_mats_crafting_compare() -> ORJSONResponse:
     try:
         fetched_data = fetch_tp_prices(
             [
@@ -335,14 +887,14 @@ def get_mats_crafting_compare() -> JSONResponse:
             ],
         )
     except Exception as e:
-        return JSONResponse(content=jsonable_encoder({"error": str(e)}))
+        return ORJSONResponse(content={"error": str(e)}, status_code=502)
 
-    mithril_ore_buy = fetched_data[ItemIDs.MITHRIL_ORE]["buy"]
-    mithril_ingot_buy = fetched_data[ItemIDs.MITHRIL_INGOT]["buy"]
-    elder_wood_log_buy = fetched_data[ItemIDs.ELDER_WOOD_LOG]["buy"]
-    elder_wood_plank_buy = fetched_data[ItemIDs.ELDER_WOOD_PLANK]["buy"]
-    lucent_mote_buy = fetched_data[ItemIDs.LUCENT_MOTE]["buy"]
-    lucent_crystal_buy = fetched_data[ItemIDs.PILE_OF_LUCENT_CRYSTAL]["buy"]
+    mithril_ore_buy = fetched_data[ItemIDs.MITHRIL_ORE].buy
+    mithril_ingot_buy = fetched_data[ItemIDs.MITHRIL_INGOT].buy
+    elder_wood_log_buy = fetched_data[ItemIDs.ELDER_WOOD_LOG].buy
+    elder_wood_plank_buy = fetched_data[ItemIDs.ELDER_WOOD_PLANK].buy
+    lucent_mote_buy = fetched_data[ItemIDs.LUCENT_MOTE].buy
+    lucent_crystal_buy = fetched_data[ItemIDs.PILE_OF_LUCENT_CRYSTAL].buy
 
     lucent_mote_to_crystal = lucent_mote_buy * 10.0
 
@@ -355,11 +907,13 @@ def get_mats_crafting_compare() -> JSONResponse:
         **get_sub_dct("lucent_crystal_buy", lucent_crystal_buy),
     }
 
-    return JSONResponse(content=jsonable_encoder(data))
+    return ORJSONResponse(content=data)
 
 
 @fastapi_app.get("/scholar_rune")
-def get_scholar_rune() -> JSONResponse:
+@profiled
+@snapshot_cache.cached
+def get_scholar_rune() -> ORJSONResponse:
     try:
         fetched_data = fetch_tp_prices(
             [
@@ -372,15 +926,15 @@ def get_scholar_rune() -> JSONResponse:
             ],
         )
     except Exception as e:
-        return JSONResponse(content=jsonable_encoder({"error": str(e)}))
+        return ORJSONResponse(content={"error": str(e)}, status_code=502)
 
-    ecto_buy = fetched_data[ItemIDs.ECTOPLASM]["buy"]
-    totem_buy = fetched_data[ItemIDs.ELABORATE_TOTEM]["buy"]
-    lucent_crystal_buy = fetched_data[ItemIDs.PILE_OF_LUCENT_CRYSTAL]["buy"]
-    charm_buy = fetched_data[ItemIDs.CHARM_OF_BRILLIANCE]["buy"]
-    lucent_mote_buy = fetched_data[ItemIDs.LUCENT_MOTE]["buy"]
+    ecto_buy = fetched_data[ItemIDs.ECTOPLASM].buy
+    totem_buy = fetched_data[ItemIDs.ELABORATE_TOTEM].buy
+    lucent_crystal_buy = fetched_data[ItemIDs.PILE_OF_LUCENT_CRYSTAL].buy
+    charm_buy = fetched_data[ItemIDs.CHARM_OF_BRILLIANCE].buy
+    lucent_mote_buy = fetched_data[ItemIDs.LUCENT_MOTE].buy
 
-    scholar_rune_sell = fetched_data[ItemIDs.SCHOLAR_RUNE]["sell"]
+    scholar_rune_sell = fetched_data[ItemIDs.SCHOLAR_RUNE].sell
 
     crafting_cost = (
         ecto_buy * 5.0
@@ -407,11 +961,13 @@ def get_scholar_rune() -> JSONResponse:
         **get_sub_dct("profit", highest_profit),
     }
 
-    return JSONResponse(content=jsonable_encoder(data))
+    return ORJSONResponse(content=data)
 
 
 @fastapi_app.get("/guardian_rune")
-def get_guardian_rune() -> JSONResponse:
+@profiled
+@snapshot_cache.cached
+def get_guardian_rune() -> ORJSONResponse:
     try:
         fetched_data = fetch_tp_prices(
             [
@@ -423,13 +979,13 @@ def get_guardian_rune() -> JSONResponse:
             ],
         )
     except Exception as e:
-        return JSONResponse(content=jsonable_encoder({"error": str(e)}))
+        return ORJSONResponse(content={"error": str(e)}, status_code=502)
 
-    rune_sell = fetched_data[ItemIDs.GUARD_RUNE]["sell"]
-    charged_loadstone_sell = fetched_data[ItemIDs.CHARGED_LOADSTONE]["sell"]
-    charm_buy = fetched_data[ItemIDs.CHARM_OF_POTENCE]["buy"]
-    ecto_buy = fetched_data[ItemIDs.ECTOPLASM]["buy"]
-    lucent_crystal_buy = fetched_data[ItemIDs.PILE_OF_LUCENT_CRYSTAL]["buy"]
+    rune_sell = fetched_data[ItemIDs.GUARD_RUNE].sell
+    charged_loadstone_sell = fetched_data[ItemIDs.CHARGED_LOADSTONE].sell
+    charm_buy = fetched_data[ItemIDs.CHARM_OF_POTENCE].buy
+    ecto_buy = fetched_data[ItemIDs.ECTOPLASM].buy
+    lucent_crystal_buy = fetched_data[ItemIDs.PILE_OF_LUCENT_CRYSTAL].buy
 
     crafting_cost = (
         charged_loadstone_sell
@@ -446,11 +1002,13 @@ def get_guardian_rune() -> JSONResponse:
         **get_sub_dct("profit", profit),
     }
 
-    return JSONResponse(content=jsonable_encoder(data))
+    return ORJSONResponse(content=data)
 
 
 @fastapi_app.get("/dragonhunter_rune")
-def get_dragonhunter_rune() -> JSONResponse:
+@profiled
+@snapshot_cache.cached
+def get_dragonhunter_rune() -> ORJSONResponse:
     try:
         fetched_data = fetch_tp_prices(
             [
@@ -465,15 +1023,15 @@ def get_dragonhunter_rune() -> JSONResponse:
             ],
         )
     except Exception as e:
-        return JSONResponse(content=jsonable_encoder({"error": str(e)}))
+        return ORJSONResponse(content={"error": str(e)}, status_code=502)
 
-    rune_sell = fetched_data[ItemIDs.DRAGONHUNTER_RUNE]["sell"]
-    charged_loadstone_sell = fetched_data[ItemIDs.CHARGED_LOADSTONE]["sell"]
-    evergreen_loadstone_buy = fetched_data[ItemIDs.EVERGREEN_LOADSTONE]["buy"]
-    thorns_buy = fetched_data[ItemIDs.BARBED_THORN]["buy"]
-    charm_buy = fetched_data[ItemIDs.CHARM_OF_POTENCE]["buy"]
-    ecto_buy = fetched_data[ItemIDs.ECTOPLASM]["buy"]
-    lucent_crystal_buy = fetched_data[ItemIDs.PILE_OF_LUCENT_CRYSTAL]["buy"]
+    rune_sell = fetched_data[ItemIDs.DRAGONHUNTER_RUNE].sell
+    charged_loadstone_sell = fetched_data[ItemIDs.CHARGED_LOADSTONE].sell
+    evergreen_loadstone_buy = fetched_data[ItemIDs.EVERGREEN_LOADSTONE].buy
+    thorns_buy = fetched_data[ItemIDs.BARBED_THORN].buy
+    charm_buy = fetched_data[ItemIDs.CHARM_OF_POTENCE].buy
+    ecto_buy = fetched_data[ItemIDs.ECTOPLASM].buy
+    lucent_crystal_buy = fetched_data[ItemIDs.PILE_OF_LUCENT_CRYSTAL].buy
 
     guardian_rune_cost = (
         charged_loadstone_sell
@@ -496,7 +1054,7 @@ def get_dragonhunter_rune() -> JSONResponse:
         **get_sub_dct("profit", profit),
     }
 
-    return JSONResponse(content=jsonable_encoder(data))
+    return ORJSONResponse(content=data)
 
 
 def _get_relic_profits(
@@ -510,7 +1068,9 @@ def _get_relic_profits(
 
 
 @fastapi_app.get("/relic_of_fireworks")
-def get_relic_of_fireworks() -> JSONResponse:
+@profiled
+@snapshot_cache.cached
+def get_relic_of_fireworks() -> ORJSONResponse:
     try:
         fetched_data = fetch_tp_prices(
             [
@@ -522,14 +1082,14 @@ def get_relic_of_fireworks() -> JSONResponse:
             ],
         )
     except Exception as e:
-        return JSONResponse(content=jsonable_encoder({"error": str(e)}))
+        return ORJSONResponse(content={"error": str(e)}, status_code=502)
 
-    ecto_buy = fetched_data[ItemIDs.ECTOPLASM]["buy"]
-    lucent_crystal_buy = fetched_data[ItemIDs.PILE_OF_LUCENT_CRYSTAL]["buy"]
-    charm_buy = fetched_data[ItemIDs.CHARM_OF_SKILL]["buy"]
-    lucent_mote_buy = fetched_data[ItemIDs.LUCENT_MOTE]["buy"]
-    relic_sell = fetched_data[ItemIDs.RELIC_OF_FIREWORKS]["sell"]
-    relic_buy = fetched_data[ItemIDs.RELIC_OF_FIREWORKS]["buy"]
+    ecto_buy = fetched_data[ItemIDs.ECTOPLASM].buy
+    lucent_crystal_buy = fetched_data[ItemIDs.PILE_OF_LUCENT_CRYSTAL].buy
+    charm_buy = fetched_data[ItemIDs.CHARM_OF_SKILL].buy
+    lucent_mote_buy = fetched_data[ItemIDs.LUCENT_MOTE].buy
+    relic_sell = fetched_data[ItemIDs.RELIC_OF_FIREWORKS].sell
+    relic_buy = fetched_data[ItemIDs.RELIC_OF_FIREWORKS].buy
 
     crafting_cost_base = ecto_buy * 15.0 + charm_buy * 3.0
     crafting_cost, crafting_cost2 = _get_relic_profits(
@@ -555,11 +1115,13 @@ def get_relic_of_fireworks() -> JSONResponse:
         **get_sub_dct("profit", highest_profit),
     }
 
-    return JSONResponse(content=jsonable_encoder(data))
+    return ORJSONResponse(content=data)
 
 
 @fastapi_app.get("/relic_of_thief")
-def get_relic_of_thief() -> JSONResponse:
+@profiled
+@snapshot_cache.cached
+def get_relic_of_thief() -> ORJSONResponse:
     try:
         fetched_data = fetch_tp_prices(
             [
@@ -572,15 +1134,15 @@ def get_relic_of_thief() -> JSONResponse:
             ],
         )
     except Exception as e:
-        return JSONResponse(content=jsonable_encoder({"error": str(e)}))
+        return ORJSONResponse(content={"error": str(e)}, status_code=502)
 
-    ecto_buy = fetched_data[ItemIDs.ECTOPLASM]["buy"]
-    lucent_crystal_buy = fetched_data[ItemIDs.PILE_OF_LUCENT_CRYSTAL]["buy"]
-    charm_buy = fetched_data[ItemIDs.CHARM_OF_SKILL]["buy"]
-    lucent_mote_buy = fetched_data[ItemIDs.LUCENT_MOTE]["buy"]
-    leather_buy = fetched_data[ItemIDs.CURED_HARDENED_LEATHER_SQUARE]["buy"]
-    relic_sell = fetched_data[ItemIDs.RELIC_OF_THIEF]["sell"]
-    relic_buy = fetched_data[ItemIDs.RELIC_OF_THIEF]["buy"]
+    ecto_buy = fetched_data[ItemIDs.ECTOPLASM].buy
+    lucent_crystal_buy = fetched_data[ItemIDs.PILE_OF_LUCENT_CRYSTAL].buy
+    charm_buy = fetched_data[ItemIDs.CHARM_OF_SKILL].buy
+    lucent_mote_buy = fetched_data[ItemIDs.LUCENT_MOTE].buy
+    leather_buy = fetched_data[ItemIDs.CURED_HARDENED_LEATHER_SQUARE].buy
+    relic_sell = fetched_data[ItemIDs.RELIC_OF_THIEF].sell
+    relic_buy = fetched_data[ItemIDs.RELIC_OF_THIEF].buy
 
     crafting_cost_base = ecto_buy * 15.0 + charm_buy * 3.0 + leather_buy * 5.0
     crafting_cost, crafting_cost2 = _get_relic_profits(
@@ -606,11 +1168,13 @@ def get_relic_of_thief() -> JSONResponse:
         **get_sub_dct("profit", highest_profit),
     }
 
-    return JSONResponse(content=jsonable_encoder(data))
+    return ORJSONResponse(content=data)
 
 
 @fastapi_app.get("/relic_of_aristocracy")
-def get_relic_of_aristocracy() -> JSONResponse:
+@profiled
+@snapshot_cache.cached
+def get_relic_of_aristocracy() -> ORJSONResponse:
     try:
         fetched_data = fetch_tp_prices(
             [
@@ -622,15 +1186,15 @@ def get_relic_of_aristocracy() -> JSONResponse:
             ],
         )
     except Exception as e:
-        return JSONResponse(content=jsonable_encoder({"error": str(e)}))
+        return ORJSONResponse(content={"error": str(e)}, status_code=502)
 
-    ecto_buy = fetched_data[ItemIDs.ECTOPLASM]["buy"]
-    lucent_crystal_buy = fetched_data[ItemIDs.PILE_OF_LUCENT_CRYSTAL]["buy"]
-    charm_buy = fetched_data[ItemIDs.CHARM_OF_BRILLIANCE]["buy"]
-    lucent_mote_buy = fetched_data[ItemIDs.LUCENT_MOTE]["buy"]
+    ecto_buy = fetched_data[ItemIDs.ECTOPLASM].buy
+    lucent_crystal_buy = fetched_data[ItemIDs.PILE_OF_LUCENT_CRYSTAL].buy
+    charm_buy = fetched_data[ItemIDs.CHARM_OF_BRILLIANCE].buy
+    lucent_mote_buy = fetched_data[ItemIDs.LUCENT_MOTE].buy
     bottle_elonian_wine_buy = 2504.0
-    relic_sell = fetched_data[ItemIDs.RELIC_OF_ARISTOCRACY]["sell"]
-    relic_buy = fetched_data[ItemIDs.RELIC_OF_ARISTOCRACY]["buy"]
+    relic_sell = fetched_data[ItemIDs.RELIC_OF_ARISTOCRACY].sell
+    relic_buy = fetched_data[ItemIDs.RELIC_OF_ARISTOCRACY].buy
 
     crafting_cost_base = (
         ecto_buy * 15.0 + charm_buy * 3.0 + bottle_elonian_wine_buy * 3.0
@@ -658,259 +1222,126 @@ def get_relic_of_aristocracy() -> JSONResponse:
         **get_sub_dct("profit", highest_profit),
     }
 
-    return JSONResponse(content=jsonable_encoder(data))
+    return ORJSONResponse(content=data)
 
 
 @fastapi_app.get("/common_gear_salvage")
-def get_common_gear_salvage() -> JSONResponse:
-    fetched_data = get_unid_gear_data(gear_id=ItemIDs.COMMON_GEAR)
-    if fetched_data is None:
-        return JSONResponse(content=jsonable_encoder({"error"}))
-
-    stack_buy = fetched_data[ItemIDs.COMMON_GEAR]["buy"] * 250.0
-    ecto_sell = fetched_data[ItemIDs.ECTOPLASM]["sell"]
-    lucent_mote_sell = fetched_data[ItemIDs.LUCENT_MOTE]["sell"]
-    mithril_sell = fetched_data[ItemIDs.MIRTHIL]["sell"]
-    elder_wood_sell = fetched_data[ItemIDs.ELDER_WOOD]["sell"]
-    thick_leather_sell = fetched_data[ItemIDs.THICK_LEATHER]["sell"]
-    gossamer_scrap_sell = fetched_data[ItemIDs.GOSSAMER_SCRAP]["sell"]
-    silk_scrap_sell = fetched_data[ItemIDs.SILK_SCRAP]["sell"]
-    hardened_sell = fetched_data[ItemIDs.HARDENED_LEATHER]["sell"]
-    ancient_wood_sell = fetched_data[ItemIDs.ANCIENT_WOOD_LOG]["sell"]
-    symbol_of_enh_sell = fetched_data[ItemIDs.SYMBOL_OF_ENH]["sell"]
-    symbol_of_pain_sell = fetched_data[ItemIDs.SYMBOL_OF_PAIN]["sell"]
-    orichalcum_sell = fetched_data[ItemIDs.ORICHALCUM_ORE]["sell"]
-    symbol_of_control_sell = fetched_data[ItemIDs.SYMBOL_OF_CONTROL]["sell"]
-    charm_of_brilliance_sell = fetched_data[ItemIDs.CHARM_OF_BRILLIANCE]["sell"]
-    charm_of_potence_sell = fetched_data[ItemIDs.CHARM_OF_POTENCE]["sell"]
-    charm_of_skill_sell = fetched_data[ItemIDs.CHARM_OF_SKILL]["sell"]
-
-    mats_value_after_tax = (
-        mithril_sell * (250.0 * 0.4291) * TAX_RATE
-        + elder_wood_sell * (250.0 * 0.3884) * TAX_RATE
-        + silk_scrap_sell * (250.0 * 0.3059) * TAX_RATE
-        + thick_leather_sell * (250.0 * 0.25) * TAX_RATE  # lowered
-        + orichalcum_sell * (250.0 * 0.0394) * TAX_RATE
-        + ancient_wood_sell * (250.0 * 0.0305) * TAX_RATE
-        + gossamer_scrap_sell * (250.0 * 0.0153) * TAX_RATE
-        + hardened_sell * (250.0 * 0.0143) * TAX_RATE
-        + ecto_sell * (250.0 * 0.007) * TAX_RATE  # lowered
-        + lucent_mote_sell * (250.0 * 0.1075) * TAX_RATE  # lowered
-        + symbol_of_control_sell * (250.0 * 0.0002) * TAX_RATE
-        + symbol_of_enh_sell * (250.0 * 0.0006) * TAX_RATE
-        + symbol_of_pain_sell * (250.0 * 0.0005) * TAX_RATE
-        + charm_of_brilliance_sell * (250.0 * 0.0004) * TAX_RATE
-        + charm_of_potence_sell * (250.0 * 0.0003) * TAX_RATE
-        + charm_of_skill_sell * (250.0 * 0.0003) * TAX_RATE
-    )
-
-    salvage_costs = (
-        Kits.COPPER_FED * 223.0
-        + Kits.RUNECRAFTER * 25.0
-        + Kits.SILVER_FED * 2.0
-    )
-
-    profit_stack = mats_value_after_tax - stack_buy - salvage_costs
-
-    data = {
-        **get_sub_dct("stack_buy", stack_buy),
-        **get_sub_dct("salvage_costs", salvage_costs),
-        **get_sub_dct("mats_value_after_tax", mats_value_after_tax),
-        **get_sub_dct("profit_stack", profit_stack),
-    }
-    return JSONResponse(content=jsonable_encoder(data))
+@profiled
+@snapshot_cache.cached
+def get_common_gear_salvage() -> ORJSONResponse:
+    return _get_salvage_profit("common_gear_salvage")
 
 
 @fastapi_app.get("/gear_salvage")
-def get_gear_salvage() -> JSONResponse:
-    fetched_data = get_unid_gear_data(gear_id=ItemIDs.UNID_GEAR)
-    if fetched_data is None:
-        return JSONResponse(content=jsonable_encoder({"error"}))
-
-    stack_buy = fetched_data[ItemIDs.UNID_GEAR]["buy"] * 250.0
-    ecto_sell = fetched_data[ItemIDs.ECTOPLASM]["sell"]
-    lucent_mote_sell = fetched_data[ItemIDs.LUCENT_MOTE]["sell"]
-    mithril_sell = fetched_data[ItemIDs.MIRTHIL]["sell"]
-    elder_wood_sell = fetched_data[ItemIDs.ELDER_WOOD]["sell"]
-    thick_leather_sell = fetched_data[ItemIDs.THICK_LEATHER]["sell"]
-    gossamer_scrap_sell = fetched_data[ItemIDs.GOSSAMER_SCRAP]["sell"]
-    silk_scrap_sell = fetched_data[ItemIDs.SILK_SCRAP]["sell"]
-    hardened_sell = fetched_data[ItemIDs.HARDENED_LEATHER]["sell"]
-    ancient_wood_sell = fetched_data[ItemIDs.ANCIENT_WOOD_LOG]["sell"]
-    symbol_of_enh_sell = fetched_data[ItemIDs.SYMBOL_OF_ENH]["sell"]
-    symbol_of_pain_sell = fetched_data[ItemIDs.SYMBOL_OF_PAIN]["sell"]
-    orichalcum_sell = fetched_data[ItemIDs.ORICHALCUM_ORE]["sell"]
-    symbol_of_control_sell = fetched_data[ItemIDs.SYMBOL_OF_CONTROL]["sell"]
-    charm_of_brilliance_sell = fetched_data[ItemIDs.CHARM_OF_BRILLIANCE]["sell"]
-    charm_of_potence_sell = fetched_data[ItemIDs.CHARM_OF_POTENCE]["sell"]
-    charm_of_skill_sell = fetched_data[ItemIDs.CHARM_OF_SKILL]["sell"]
-
-    mats_value_after_tax = (
-        mithril_sell * (250.0 * 0.4299) * TAX_RATE
-        + elder_wood_sell * (250.0 * 0.3564) * TAX_RATE
-        + silk_scrap_sell * (250.0 * 0.3521) * TAX_RATE
-        + thick_leather_sell * (250.0 * 0.2673) * TAX_RATE
-        + orichalcum_sell * (250.0 * 0.0387) * TAX_RATE
-        + ancient_wood_sell * (250.0 * 0.0287) * TAX_RATE
-        + gossamer_scrap_sell * (250.0 * 0.018) * TAX_RATE
-        + hardened_sell * (250.0 * 0.0164) * TAX_RATE  # lowered
-        + ecto_sell * (250.0 * 0.0291) * TAX_RATE  # lowered
-        + lucent_mote_sell * (250.0 * 0.98) * TAX_RATE
-        + symbol_of_control_sell * (250.0 * 0.0018) * TAX_RATE
-        + symbol_of_enh_sell * (250.0 * 0.001) * TAX_RATE
-        + symbol_of_pain_sell * (250.0 * 0.0006) * TAX_RATE
-        + charm_of_brilliance_sell * (250.0 * 0.0042) * TAX_RATE
-        + charm_of_potence_sell * (250.0 * 0.0029) * TAX_RATE
-        + charm_of_skill_sell * (250.0 * 0.0028) * TAX_RATE
-    )
-
-    salvage_costs = Kits.RUNECRAFTER * 245 + Kits.SILVER_FED * 5
-
-    profit_stack = mats_value_after_tax - stack_buy - salvage_costs
-
-    data = {
-        **get_sub_dct("stack_buy", stack_buy),
-        **get_sub_dct("salvage_costs", salvage_costs),
-        **get_sub_dct("mats_value_after_tax", mats_value_after_tax),
-        **get_sub_dct("profit_stack", profit_stack),
-    }
-    return JSONResponse(content=jsonable_encoder(data))
+@profiled
+@snapshot_cache.cached
+def get_gear_salvage() -> ORJSONResponse:
+    return _get_salvage_profit("gear_salvage")
 
 
 @fastapi_app.get("/profits")
-def get_profits() -> JSONResponse:
+@profiled
+def get_profits() -> ORJSONResponse:
     data = {}
     try:
         for craft in API.CRAFTS:
-            response = httpx.Client().get(
-                f"{api_base}{craft}",
-            )
+            response = http_client().get(f"{api_base}{craft}")
             data_ = response.json()
             profit = gsc_dict_to_copper(data_)
             data = {**data, **get_sub_dct(f"{craft}_profit", profit)}
     except Exception:  # noqa: S110
         pass
-    return JSONResponse(content=jsonable_encoder(data))
+    return ORJSONResponse(content=data)
 
 
-@fastapi_app.get("/symbol_enh_forge")
-def get_symbol_enh_forge() -> JSONResponse:
-    try:
-        fetched_data = fetch_tp_prices(
-            [
-                ItemIDs.SYMBOL_OF_ENH,
-                ItemIDs.SYMBOL_OF_PAIN,
-                ItemIDs.SYMBOL_OF_CONTROL,
-            ],
-        )
-    except Exception as e:
-        return JSONResponse(content=jsonable_encoder({"error": str(e)}))
-
-    enh_buy = fetched_data[ItemIDs.SYMBOL_OF_ENH]["buy"]
-    enh_sell = fetched_data[ItemIDs.SYMBOL_OF_ENH]["sell"]
-    pain_sell = fetched_data[ItemIDs.SYMBOL_OF_PAIN]["sell"]
-    control_sell = fetched_data[ItemIDs.SYMBOL_OF_CONTROL]["sell"]
+def _get_forge_results() -> dict[str, np.ndarray]:
+    fetched_data = fetch_tp_prices(FORGE_ENGINE.item_ids)
+    return FORGE_ENGINE.evaluate_prices(fetched_data)
 
-    cost = enh_buy * 3.0
-    reward = enh_sell * 0.2 + pain_sell * 0.4 + control_sell * 0.4
-    profit = (reward * TAX_RATE) - cost
-
-    data = {
-        **get_sub_dct("cost", cost),
-        **get_sub_dct("profit_per_try", profit),
-        **get_sub_dct("profit_per_shard", profit * 10.0),
-    }
-    return JSONResponse(content=jsonable_encoder(data))
 
-
-@fastapi_app.get("/charm_brilliance_forge")
-def get_charm_brilliance_forge() -> JSONResponse:
+def _get_family_forge(
+    recipe_name: str,
+) -> ORJSONResponse:
     try:
-        fetched_data = fetch_tp_prices(
-            [
-                ItemIDs.CHARM_OF_BRILLIANCE,
-                ItemIDs.CHARM_OF_POTENCE,
-                ItemIDs.CHARM_OF_SKILL,
-            ],
-        )
+        results = _get_forge_results()
     except Exception as e:
-        return JSONResponse(content=jsonable_encoder({"error": str(e)}))
-
-    charm_brilliance_buy = fetched_data[ItemIDs.CHARM_OF_BRILLIANCE]["buy"]
-    charm_brilliance_sell = fetched_data[ItemIDs.CHARM_OF_BRILLIANCE]["sell"]
-    charm_potence_sell = fetched_data[ItemIDs.CHARM_OF_POTENCE]["sell"]
-    charm_skill_sell = fetched_data[ItemIDs.CHARM_OF_SKILL]["sell"]
-
-    cost = charm_brilliance_buy * 3.0
-    reward = (
-        charm_brilliance_sell * 0.2
-        + charm_potence_sell * 0.4
-        + charm_skill_sell * 0.4
-    )
-    profit = (reward * TAX_RATE) - cost
+        return ORJSONResponse(content={"error": str(e)}, status_code=502)
 
+    row = FORGE_ENGINE.names.index(recipe_name)
     data = {
-        **get_sub_dct("cost", cost),
-        **get_sub_dct("profit_per_try", profit),
-        **get_sub_dct("profit_per_shard", profit * 10.0),
+        **get_sub_dct("cost", results["cost"][row]),
+        **get_sub_dct("profit_per_try", results["ev"][row]),
+        **get_sub_dct("profit_per_shard", results["ev_per_shard"][row]),
     }
-    return JSONResponse(content=jsonable_encoder(data))
+    return ORJSONResponse(content=data)
 
 
-@fastapi_app.get("/loadstone_forge")
-def get_loadstone_forge() -> JSONResponse:
-    try:
-        fetched_data = fetch_tp_prices(
-            [
-                ItemIDs.ONYX_LOADSTONE,
-                ItemIDs.CHARGED_LOADSTONE,
-                ItemIDs.CORRUPTED_LOADSTONE,
-                ItemIDs.DESTROYER_LOADSTONE,
-                ItemIDs.CRYSTALINE_DUST,
-                ItemIDs.ONYX_CORE,
-                ItemIDs.DESTROYER_CORE,
-                ItemIDs.CORRUPTED_CORE,
-                ItemIDs.CHARGED_CORE,
-            ],
-        )
-    except Exception as e:
-        return JSONResponse(content=jsonable_encoder({"error": str(e)}))
-
-    onyx_sell = fetched_data[ItemIDs.ONYX_LOADSTONE]["buy"]
-    charged_sell = fetched_data[ItemIDs.CHARGED_LOADSTONE]["sell"]
-    corrupted_sell = fetched_data[ItemIDs.CORRUPTED_LOADSTONE]["sell"]
-    destroyer_sell = fetched_data[ItemIDs.DESTROYER_LOADSTONE]["sell"]
-    crystal_dust_buy = fetched_data[ItemIDs.CRYSTALINE_DUST]["buy"]
-    onyx_core_cost = fetched_data[ItemIDs.ONYX_CORE]["buy"]
-    charged_core_cost = fetched_data[ItemIDs.CHARGED_CORE]["buy"]
-    corrupted_core_cost = fetched_data[ItemIDs.CORRUPTED_CORE]["buy"]
-    destroyer_core_cost = fetched_data[ItemIDs.DESTROYER_CORE]["buy"]
-
-    elonian_cost = 2_500
+@fastapi_app.get("/symbol_enh_forge")
+@profiled
+@snapshot_cache.cached
+def get_symbol_enh_forge() -> ORJSONResponse:
+    return _get_family_forge("symbol_of_enh")
 
-    onyx_cost = onyx_core_cost * 2 + crystal_dust_buy + elonian_cost
-    onyx_profit = (onyx_sell * 0.85) - onyx_cost
 
-    charged_cost = charged_core_cost * 2 + crystal_dust_buy + elonian_cost
-    charged_profit = (charged_sell * 0.85) - charged_cost
+@fastapi_app.get("/charm_brilliance_forge")
+@profiled
+@snapshot_cache.cached
+def get_charm_brilliance_forge() -> ORJSONResponse:
+    return _get_family_forge("charm_of_brilliance")
 
-    corrupted_cost = corrupted_core_cost * 2 + crystal_dust_buy + elonian_cost
-    corrupted_profit = (corrupted_sell * 0.85) - corrupted_cost
 
-    destroyer_cost = destroyer_core_cost * 2 + crystal_dust_buy + elonian_cost
-    destroyer_profit = (destroyer_sell * 0.85) - destroyer_cost
+@fastapi_app.get("/loadstone_forge")
+@profiled
+@snapshot_cache.cached
+def get_loadstone_forge() -> ORJSONResponse:
+    try:
+        results = _get_forge_results()
+    except Exception as e:
+        return ORJSONResponse(content={"error": str(e)}, status_code=502)
 
-    data = {
-        **get_sub_dct("onyx", onyx_profit),
-        **get_sub_dct("charged", charged_profit),
-        **get_sub_dct("corrupted", corrupted_profit),
-        **get_sub_dct("destroyer", destroyer_profit),
-    }
-    return JSONResponse(content=jsonable_encoder(data))
+    data = {}
+    for name in LOADSTONE_PROMOTIONS:
+        row = FORGE_ENGINE.names.index(f"{name}_loadstone")
+        data.update(get_sub_dct(name, results["ev"][row]))
+    return ORJSONResponse(content=data)
+
+
+@fastapi_app.get("/forge_ranking")
+@profiled
+def get_forge_ranking(
+    by: str = "ev",
+    limit: int = Query(20, ge=1, le=len(FORGE_ENGINE.names)),
+) -> ORJSONResponse:
+    if by not in {"ev", "ev_per_shard"}:
+        return ORJSONResponse(
+            content={"error": f"Unknown ranking key '{by}'"},
+            status_code=400,
+        )
+    try:
+        results = _get_forge_results()
+    except Exception as e:
+        return ORJSONResponse(content={"error": str(e)}, status_code=502)
+
+    ranking = [
+        {
+            "name": FORGE_ENGINE.names[row],
+            **get_sub_dct("cost", results["cost"][row]),
+            **get_sub_dct("ev_per_attempt", results["ev"][row]),
+            **(
+                get_sub_dct("ev_per_shard", results["ev_per_shard"][row])
+                if not np.isnan(results["ev_per_shard"][row])
+                else {}
+            ),
+        }
+        for row in FORGE_ENGINE.rank(results, by=by, limit=limit)
+    ]
+    return ORJSONResponse(content={"ranking": ranking})
 
 
 @fastapi_app.get("/thesis_on_masterful_malice")
-def get_thesis_on_masterful_malice() -> JSONResponse:
+@profiled
+@snapshot_cache.cached
+def get_thesis_on_masterful_malice() -> ORJSONResponse:
     try:
         fetched_data = fetch_tp_prices(
             [
@@ -928,19 +1359,19 @@ def get_thesis_on_masterful_malice() -> JSONResponse:
             ],
         )
     except Exception as e:
-        return JSONResponse(content=jsonable_encoder({"error": str(e)}))
+        return ORJSONResponse(content={"error": str(e)}, status_code=502)
 
     masterful_malice_data = fetched_data[ItemIDs.THESIS_MASTERFUL_MALICE]
-    masterful_malice_buy = fetched_data[ItemIDs.WRIT_MASTERFUL_MALICE]["buy"]
-    crystal_dust_buy = fetched_data[ItemIDs.CRYSTALINE_DUST]["buy"]
-    ancient_wood_log_buy = fetched_data[ItemIDs.ANCIENT_WOOD_LOG]["buy"]
-    hardened_leather_buy = fetched_data[ItemIDs.HARDENED_LEATHER]["buy"]
-    orichalcum_buy = fetched_data[ItemIDs.ORICHALCUM_ORE]["buy"]
-    gossamer_scrap_buy = fetched_data[ItemIDs.GOSSAMER_SCRAP]["buy"]
-    gossamer_thread_buy = fetched_data[ItemIDs.GOSSAMER_THREAD]["buy"]
-    pouch_of_black_buy = fetched_data[ItemIDs.POUCH_OF_BLACK_PIGMENTS]["buy"]
-    pouch_of_white_buy = fetched_data[ItemIDs.POUCH_OF_WHITE_PIGMENTS]["buy"]
-    jug_of_water = fetched_data[ItemIDs.JUG_OF_WATER]["buy"]
+    masterful_malice_buy = fetched_data[ItemIDs.WRIT_MASTERFUL_MALICE].buy
+    crystal_dust_buy = fetched_data[ItemIDs.CRYSTALINE_DUST].buy
+    ancient_wood_log_buy = fetched_data[ItemIDs.ANCIENT_WOOD_LOG].buy
+    hardened_leather_buy = fetched_data[ItemIDs.HARDENED_LEATHER].buy
+    orichalcum_buy = fetched_data[ItemIDs.ORICHALCUM_ORE].buy
+    gossamer_scrap_buy = fetched_data[ItemIDs.GOSSAMER_SCRAP].buy
+    gossamer_thread_buy = fetched_data[ItemIDs.GOSSAMER_THREAD].buy
+    pouch_of_black_buy = fetched_data[ItemIDs.POUCH_OF_BLACK_PIGMENTS].buy
+    pouch_of_white_buy = fetched_data[ItemIDs.POUCH_OF_WHITE_PIGMENTS].buy
+    jug_of_water = fetched_data[ItemIDs.JUG_OF_WATER].buy
 
     crafting_cost = (
         masterful_malice_buy * 3.0
@@ -955,7 +1386,7 @@ def get_thesis_on_masterful_malice() -> JSONResponse:
         + jug_of_water * 20.0
     )
 
-    sell = masterful_malice_data["sell"]
+    sell = masterful_malice_data.sell
     flip = (sell * TAX_RATE) - masterful_malice_buy
     profit = (sell * TAX_RATE) - crafting_cost
 
@@ -966,15 +1397,59 @@ def get_thesis_on_masterful_malice() -> JSONResponse:
         **get_sub_dct("profit", profit),
     }
 
-    return JSONResponse(content=jsonable_encoder(data))
+    return ORJSONResponse(content=data)
+
+
+middleware = [
+    Middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_methods=["GET", "POST", "DELETE"],
+        allow_headers=["Content-Type", ADMIN_TOKEN_HEADER],
+        expose_headers=["ETag", PRICE_SNAPSHOT_HEADER],
+    ),
+    compression_middleware(streaming_paths=["/api/alerts/stream"]),
+    Middleware(InterestMiddleware),
+    # Volatile calculators are refreshed every POLL_MIN_INTERVAL_SECONDS
+    Middleware(
+        HTTPCacheMiddleware,
+        max_age=POLL_MIN_INTERVAL_SECONDS,
+        private_headers=(PROFILE_HEADER, ADMIN_TOKEN_HEADER),
+    ),
+]
+if PROFILING_ENABLED:
+    middleware.insert(2, Middleware(ProfilingMiddleware))
+
+
+@contextlib.asynccontextmanager
+async def lifespan(
+    app: Starlette,
+) -> AsyncIterator[None]:
+    # Started with the server rather than on import, which keeps imports
+    # cheap and runs the scheduler on the server's event loop
+    await asyncio.to_thread(catalogue.sync_fixtures, if_empty=True)
+    await asyncio.to_thread(refresh_search_index)
+    scheduler = start_scheduler(ingest=EMBEDDED_SCHEDULER)
+    # Picks up `python -m backend.catalogue_sync` runs
+    scheduler.add_job(
+        refresh_search_index,
+        "interval",
+        seconds=PUBLISHED_POLL_SECONDS,
+        max_instances=1,
+    )
+    try:
+        yield
+    finally:
+        # Runs once uvicorn drained the in-flight requests
+        scheduler.shutdown(wait=False)
+        close_http_client()
+        catalogue.close()
 
 
-middleware = [Middleware(CORSMiddleware, allow_origins=["*"])]
 app = Starlette(
     routes=[
         Mount("/api", app=fastapi_app),
     ],
     middleware=middleware,
+    lifespan=lifespan,
 )
-
-start_scheduler()
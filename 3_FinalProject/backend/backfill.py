@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import argparse
+import datetime
+from typing import Any
+
+from pymongo import UpdateOne
+from pymongo.database import Database
+from pymongo.errors import BulkWriteError
+
+from gw2tp.db_schema import COLLECTIONS
+from gw2tp.db_schema import SNAPSHOT_TIMEZONE
+from gw2tp.db_schema import ensure_snapshot_indexes
+from gw2tp.db_schema import snapshot_bucket
+from gw2tp.helper import copper_to_gsc
+from gw2tp.helper import gsc_dict_to_copper
+
+from .db import db
+
+
+BACKFILL_STATE_COLLECTION = "snapshot_backfill"
+BACKFILL_BATCH_SIZE = 1_000
+_DUPLICATE_KEY = 11000
+_SNAPSHOT_FIELDS = ("crafting_cost", "sell")
+
+
+def _assign_legacy_buckets(
+    db: Database,
+    collection_name: str,
+    bucket_seconds: int,
+) -> int:
+    # Documents from before bucket keys get one; the later duplicates of a
+    # bucket collide with the unique index and are dropped. Returns the
+    # number of dropped duplicates.
+    collection = db[collection_name]
+    dropped = 0
+    while True:
+        docs = list(
+            collection.find(
+                {"bucket": {"$exists": False}},
+                {"timestamp": True},
+            )
+            .sort("timestamp", 1)
+            .limit(BACKFILL_BATCH_SIZE)
+        )
+        if len(docs) == 0:
+            return dropped
+        updates = [
+            UpdateOne(
+                {"_id": doc["_id"]},
+                {
+                    "$set": {
+                        "bucket": snapshot_bucket(
+                            datetime.datetime.fromisoformat(doc["timestamp"]),
+                            bucket_seconds,
+                        )
+                    }
+                },
+            )
+            for doc in docs
+        ]
+        try:
+            collection.bulk_write(updates, ordered=False)
+        except BulkWriteError as e:
+            duplicates = [
+                docs[error["index"]]["_id"]
+                for error in e.details["writeErrors"]
+                if error["code"] == _DUPLICATE_KEY
+            ]
+            if len(duplicates) < len(e.details["writeErrors"]):
+                raise
+            collection.delete_many({"_id": {"$in": duplicates}})
+            dropped += len(duplicates)
+
+
+def _interpolate(
+    start: dict[str, Any],
+    end: dict[str, Any],
+    fill_seconds: int,
+) -> list[dict[str, Any]]:
+    span = end["bucket"] - start["bucket"]
+    values = {
+        field: (
+            gsc_dict_to_copper(start, field),
+            gsc_dict_to_copper(end, field),
+        )
+        for field in _SNAPSHOT_FIELDS
+    }
+    docs = []
+    for bucket in range(
+        start["bucket"] + fill_seconds,
+        end["bucket"] - fill_seconds // 2,
+        fill_seconds,
+    ):
+        fraction = (bucket - start["bucket"]) / span
+        doc: dict[str, Any] = {
+            "bucket": bucket,
+            "timestamp": datetime.datetime.fromtimestamp(
+                bucket,
+                tz=SNAPSHOT_TIMEZONE,
+            ).isoformat(),
+            "interpolated": True,
+        }
+        for field, (first, last) in values.items():
+            g, s, c = copper_to_gsc(first + (last - first) * fraction)
+            doc.update({f"{field}_g": g, f"{field}_s": s, f"{field}_c": c})
+        docs.append(doc)
+    return docs
+
+
+def backfill_collection(
+    db: Database,
+    collection_name: str,
+    bucket_seconds: int,
+    max_gap_seconds: int,
+    fill_seconds: int,
+) -> int:
+    """Fills gaps longer than ``max_gap_seconds`` with points interpolated
+    every ``fill_seconds``.
+
+    The bucket index is walked in batches from where the previous run
+    stopped, so each run only reads the snapshots added since. Returns the
+    number of filled points.
+    """
+    collection = db[collection_name]
+    states = db[BACKFILL_STATE_COLLECTION]
+    state = states.find_one({"_id": collection_name}) or {}
+    if not state.get("migrated", False):
+        dropped = _assign_legacy_buckets(db, collection_name, bucket_seconds)
+        if dropped > 0:
+            print(f"Dropped {dropped} duplicate {collection_name} snapshots")
+        states.update_one(
+            {"_id": collection_name},
+            {"$set": {"migrated": True}},
+            upsert=True,
+        )
+
+    projection = {field: True for field in ("bucket", "timestamp")}
+    for field in _SNAPSHOT_FIELDS:
+        projection.update({f"{field}_{unit}": True for unit in "gsc"})
+    previous: dict[str, Any] | None = None
+    query: dict[str, Any] = {"bucket": {"$gte": state.get("checked", 0)}}
+    filled = 0
+    while True:
+        docs = list(
+            collection.find(query, projection)
+            .sort("bucket", 1)
+            .limit(BACKFILL_BATCH_SIZE)
+        )
+        fills = []
+        for doc in docs:
+            if (
+                previous is not None
+                and doc["bucket"] - previous["bucket"] > max_gap_seconds
+            ):
+                fills += _interpolate(previous, doc, fill_seconds)
+            previous = doc
+        if len(fills) > 0:
+            # Never overwrites a bucket that was observed in the meantime
+            collection.bulk_write(
+                [
+                    UpdateOne(
+                        {"bucket": fill["bucket"]},
+                        {"$setOnInsert": fill},
+                        upsert=True,
+                    )
+                    for fill in fills
+                ],
+                ordered=False,
+            )
+            filled += len(fills)
+        if previous is not None:
+            states.update_one(
+                {"_id": collection_name},
+                {"$set": {"checked": previous["bucket"]}},
+            )
+            query = {"bucket": {"$gt": previous["bucket"]}}
+        if len(docs) < BACKFILL_BATCH_SIZE:
+            return filled
+
+
+def backfill_snapshots(
+    db: Database,
+    bucket_seconds: int,
+    max_gap_seconds: int,
+    fill_seconds: int,
+) -> dict[str, int]:
+    ensure_snapshot_indexes(db)
+    return {
+        collection_name: backfill_collection(
+            db,
+            collection_name,
+            bucket_seconds=bucket_seconds,
+            max_gap_seconds=max_gap_seconds,
+            fill_seconds=fill_seconds,
+        )
+        for collection_name in COLLECTIONS
+    }
+
+
+def main() -> None:
+    # The scheduler imports this module for its backfill job
+    from .scheduler import BACKFILL_FILL_SECONDS  # noqa: PLC0415
+    from .scheduler import BACKFILL_MAX_GAP_SECONDS  # noqa: PLC0415
+    from .scheduler import SNAPSHOT_BUCKET_SECONDS  # noqa: PLC0415
+
+    parser = argparse.ArgumentParser(
+        description="Assign bucket keys and fill gaps in the stored history",
+    )
+    parser.add_argument("--max-gap", type=int, default=BACKFILL_MAX_GAP_SECONDS)
+    parser.add_argument("--fill", type=int, default=BACKFILL_FILL_SECONDS)
+    args = parser.parse_args()
+    filled = backfill_snapshots(
+        db,
+        bucket_seconds=SNAPSHOT_BUCKET_SECONDS,
+        max_gap_seconds=args.max_gap,
+        fill_seconds=args.fill,
+    )
+    for collection_name, count in filled.items():
+        print(f"{collection_name}: {count} points filled")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from gw2tp.backtest import BACKTEST_WORKERS
+from gw2tp.backtest import best_strategies
+from gw2tp.backtest import load_history
+from gw2tp.backtest import parse_range
+from gw2tp.backtest import sweep
+from gw2tp.db_schema import COLLECTIONS
+
+from backend.db import db
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Sweep craft-and-hold strategies over stored history",
+    )
+    parser.add_argument("--collection", choices=COLLECTIONS, required=True)
+    parser.add_argument(
+        "--min-profit",
+        default="0:20000:100",
+        help="Copper thresholds as 'a,b,c' or 'start:stop:step'",
+    )
+    parser.add_argument(
+        "--hold-hours",
+        default="1:72:1",
+        help="Holding periods as 'a,b,c' or 'start:stop:step'",
+    )
+    parser.add_argument("--workers", type=int, default=BACKTEST_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=5_000)
+    parser.add_argument("--by", default="total_profit")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    history = load_history(db, args.collection, chunk_size=args.chunk_size)
+    min_profits = parse_range(args.min_profit)
+    hold_hours = parse_range(args.hold_hours)
+    results = sweep(history, min_profits, hold_hours, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{len(min_profits) * len(hold_hours)} strategies over "
+        f"{len(history)} snapshots in {elapsed:.2f}s"
+    )
+    best = best_strategies(results, by=args.by, limit=args.limit)
+    print(json.dumps(best, indent=2))
+
+
+if __name__ == "__main__":
+    main()
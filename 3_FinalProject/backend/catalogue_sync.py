@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import Any
+
+import aiohttp
+
+from gw2tp.catalogue import Catalogue
+from gw2tp.constants import API
+
+from backend.flip_scanner import FLIP_SCAN_CONCURRENCY
+from backend.flip_scanner import GW2_API_PAGE_SIZE
+
+
+async def fetch_dump(
+    url: str,
+) -> list[dict[str, Any]]:
+    semaphore = asyncio.Semaphore(FLIP_SCAN_CONCURRENCY)
+    timeout = aiohttp.ClientTimeout(total=60.0)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+
+        async def _fetch_page(page: int) -> tuple[list[dict[str, Any]], int]:
+            params = {"page": str(page), "page_size": str(GW2_API_PAGE_SIZE)}
+            async with semaphore, session.get(url, params=params) as response:
+                response.raise_for_status()
+                page_total = int(response.headers.get("X-Page-Total", 1))
+                return await response.json(), page_total
+
+        first_page, page_total = await _fetch_page(0)
+        pages = await asyncio.gather(
+            *(_fetch_page(page) for page in range(1, page_total))
+        )
+    dump = list(first_page)
+    for page, _ in pages:
+        dump.extend(page)
+    return dump
+
+
+async def fetch_catalogue_dumps() -> tuple[
+    list[dict[str, Any]],
+    list[dict[str, Any]],
+]:
+    items, recipes = await asyncio.gather(
+        fetch_dump(API.GW2_ITEMS_API_URL),
+        fetch_dump(API.GW2_RECIPES_API_URL),
+    )
+    return items, recipes
+
+
+def sync_catalogue(
+    catalogue: Catalogue,
+    offline: bool = False,
+) -> None:
+    start = time.perf_counter()
+    if offline:
+        catalogue.sync_fixtures()
+    else:
+        items, recipes = asyncio.run(fetch_catalogue_dumps())
+        catalogue.sync(items, recipes)
+    elapsed = time.perf_counter() - start
+    print(f"Catalogue of {len(catalogue)} items synced in {elapsed:.2f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Sync the local item and recipe catalogue",
+    )
+    parser.add_argument("--path", default=None)
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Load the bundled fixtures instead of the GW2 API dumps",
+    )
+    args = parser.parse_args()
+    catalogue = Catalogue(args.path)
+    try:
+        sync_catalogue(catalogue, offline=args.offline)
+    finally:
+        catalogue.close()
+
+
+if __name__ == "__main__":
+    main()
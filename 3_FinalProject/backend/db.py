@@ -1,14 +1,119 @@
+from __future__ import annotations
+
+import importlib.util
 import os
 
 from pymongo import MongoClient
+from pymongo.database import Database
+from pymongo.read_preferences import Nearest
+from pymongo.read_preferences import Primary
+from pymongo.read_preferences import PrimaryPreferred
+from pymongo.read_preferences import Secondary
+from pymongo.read_preferences import SecondaryPreferred
+
+
+# Per worker process, so the server opens up to workers * max pool size
+# connections. The default matches the 40 threads running sync endpoints.
+MONGO_MAX_POOL_SIZE = int(os.environ.get("GW2TP_MONGO_MAX_POOL_SIZE", 40))
+MONGO_MIN_POOL_SIZE = int(os.environ.get("GW2TP_MONGO_MIN_POOL_SIZE", 0))
+# Fail a request that waited this long for a pooled connection instead of
+# queueing behind a saturated pool forever
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(
+    os.environ.get("GW2TP_MONGO_WAIT_QUEUE_TIMEOUT_MS", 5_000)
+)
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(
+    os.environ.get("GW2TP_MONGO_SERVER_SELECTION_TIMEOUT_MS", 10_000)
+)
+# Wire compression, in order of preference. Compressors whose module is
+# missing are skipped, install them with the `compression` extra.
+MONGO_COMPRESSORS = os.environ.get("GW2TP_MONGO_COMPRESSORS", "zstd,snappy")
+# History reads go to secondaries at most this far behind the primary. It
+# only takes effect on a replica set, a standalone server serves them all.
+HISTORY_READ_PREFERENCE = os.environ.get(
+    "GW2TP_HISTORY_READ_PREFERENCE", "secondaryPreferred"
+)
+HISTORY_MAX_STALENESS_SECONDS = int(
+    os.environ.get("GW2TP_HISTORY_MAX_STALENESS_SECONDS", 120)
+)
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+_READ_PREFERENCES = {
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+# Smallest max staleness servers accept, pymongo only checks it when the
+# first read selects a server
+_MIN_MAX_STALENESS_SECONDS = 90
+
+
+def available_compressors(
+    names: str,
+) -> list[str]:
+    return [
+        name
+        for name in names.split(",")
+        if name in _COMPRESSOR_MODULES
+        and importlib.util.find_spec(_COMPRESSOR_MODULES[name]) is not None
+    ]
+
+
+def read_preference(
+    mode: str,
+    max_staleness: int,
+) -> Primary | PrimaryPreferred | Secondary | SecondaryPreferred | Nearest:
+    # Raises ValueError for settings the first read would fail on; the
+    # module builds history_db with it, so bad settings fail at startup
+    if mode == "primary":
+        return Primary()
+    if mode not in _READ_PREFERENCES:
+        modes = ", ".join(["primary", *_READ_PREFERENCES])
+        raise ValueError(
+            f"Unknown history read preference '{mode}' "
+            f"(GW2TP_HISTORY_READ_PREFERENCE), expected one of: {modes}"
+        )
+    # -1 means unbounded
+    if max_staleness != -1 and max_staleness < _MIN_MAX_STALENESS_SECONDS:
+        raise ValueError(
+            f"History max staleness of {max_staleness} s "
+            "(GW2TP_HISTORY_MAX_STALENESS_SECONDS) must be -1 or at least "
+            f"{_MIN_MAX_STALENESS_SECONDS} s"
+        )
+    return _READ_PREFERENCES[mode](max_staleness=max_staleness)
+
+
+def with_history_reads(
+    database: Database,
+) -> Database:
+    # The same database, reading from where HISTORY_READ_PREFERENCE points
+    return database.client.get_database(
+        database.name,
+        read_preference=read_preference(
+            HISTORY_READ_PREFERENCE,
+            HISTORY_MAX_STALENESS_SECONDS,
+        ),
+    )
 
 
+# connect=False: nothing touches the network until the first operation, so
+# importing the API stays fast and forked workers get their own sockets
+_client_options = {
+    "connect": False,
+    "maxPoolSize": MONGO_MAX_POOL_SIZE,
+    "minPoolSize": MONGO_MIN_POOL_SIZE,
+    "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+}
+_compressors = available_compressors(MONGO_COMPRESSORS)
+if len(_compressors) > 0:
+    _client_options["compressors"] = ",".join(_compressors)
 if "MONGODB_CONNECTION_STRING" in os.environ:
     MONGODB_CONNECTION_STRING = os.environ["MONGODB_CONNECTION_STRING"]
-    client = MongoClient(MONGODB_CONNECTION_STRING)
+    client = MongoClient(MONGODB_CONNECTION_STRING, **_client_options)
 else:
     MONGO_HOST = os.environ.get("MONGO_HOST", "mongodb")
     MONGO_PORT = int(os.environ.get("MONGO_PORT", 27017))
-    client = MongoClient(host=MONGO_HOST, port=MONGO_PORT)
+    client = MongoClient(host=MONGO_HOST, port=MONGO_PORT, **_client_options)
 
 db = client["gw2tp_db"]
+history_db = with_history_reads(db)
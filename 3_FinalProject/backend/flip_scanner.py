@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import TYPE_CHECKING
+from typing import Any
+
+import numpy as np
+from pymongo.database import Database
+
+from gw2tp.constants import API
+from gw2tp.flips import FlipIndex
+from gw2tp.market import MarketPrices
+
+from .published import PublishedState
+from .published import pack_array
+from .published import unpack_array
+
+
+if TYPE_CHECKING:
+    import aiohttp
+
+
+FLIP_SCAN_INTERVAL_SECONDS = int(
+    os.environ.get("GW2TP_FLIP_SCAN_INTERVAL_SECONDS", 300)
+)
+FLIP_SCAN_CONCURRENCY = int(os.environ.get("GW2TP_FLIP_SCAN_CONCURRENCY", 8))
+# Maximum number of ids the GW2 API accepts per request
+GW2_API_PAGE_SIZE = 200
+
+# Arrays published for the API processes, see `publish_market`
+_MARKET_COLUMNS = (
+    "item_ids",
+    "buy",
+    "sell",
+    "buy_quantity",
+    "sell_quantity",
+)
+
+flip_index = FlipIndex()
+market_prices = MarketPrices()
+
+
+async def _fetch_json(
+    session: aiohttp.ClientSession,
+    params: dict[str, str] | None = None,
+) -> Any:
+    async with session.get(API.GW2_COMMERCE_API_URL, params=params) as response:
+        response.raise_for_status()
+        return await response.json()
+
+
+async def fetch_all_prices() -> list[dict[str, Any]]:
+    import aiohttp  # noqa: PLC0415
+
+    semaphore = asyncio.Semaphore(FLIP_SCAN_CONCURRENCY)
+    timeout = aiohttp.ClientTimeout(total=30.0)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        item_ids: list[int] = await _fetch_json(session)
+
+        async def _fetch_page(page: list[int]) -> list[dict[str, Any]]:
+            async with semaphore:
+                params = {"ids": ",".join(str(i) for i in page)}
+                try:
+                    return await _fetch_json(session, params=params)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    # One slow or failed page must not abort the scan
+                    print(f"Skipping price page at id {page[0]}: {e!r}")
+                    return []
+
+        pages = await asyncio.gather(
+            *(
+                _fetch_page(item_ids[i : i + GW2_API_PAGE_SIZE])
+                for i in range(0, len(item_ids), GW2_API_PAGE_SIZE)
+            )
+        )
+    return [item for page in pages for item in page]
+
+
+def _price_column(
+    items: list[dict[str, Any]],
+    side: str,
+    key: str,
+) -> np.ndarray:
+    return np.fromiter(
+        (item[side][key] for item in items),
+        dtype=np.int64,
+        count=len(items),
+    )
+
+
+def apply_market(
+    item_ids: np.ndarray,
+    buy: np.ndarray,
+    sell: np.ndarray,
+    buy_quantity: np.ndarray,
+    sell_quantity: np.ndarray,
+) -> np.ndarray:
+    flip_index.update(
+        item_ids,
+        buy=buy,
+        sell=sell,
+        buy_quantity=buy_quantity,
+        sell_quantity=sell_quantity,
+    )
+    return market_prices.update(
+        item_ids,
+        buy=buy,
+        sell=sell,
+        buy_quantity=buy_quantity,
+        sell_quantity=sell_quantity,
+    )
+
+
+def _apply_published_market(
+    doc: dict[str, Any],
+) -> None:
+    apply_market(
+        **{key: unpack_array(doc[key]) for key in _MARKET_COLUMNS},
+    )
+
+
+published_market = PublishedState("market", _apply_published_market)
+
+
+def publish_market(
+    db: Database,
+) -> None:
+    columns = market_prices.columns()
+    published_market.publish(
+        db,
+        {key: pack_array(columns[key]) for key in _MARKET_COLUMNS},
+    )
+
+
+async def scan_market() -> np.ndarray:
+    start = time.perf_counter()
+    items = await fetch_all_prices()
+    item_ids = np.fromiter(
+        (item["id"] for item in items),
+        dtype=np.int64,
+        count=len(items),
+    )
+    changed_ids = apply_market(
+        item_ids,
+        buy=_price_column(items, "buys", "unit_price"),
+        sell=_price_column(items, "sells", "unit_price"),
+        buy_quantity=_price_column(items, "buys", "quantity"),
+        sell_quantity=_price_column(items, "sells", "quantity"),
+    )
+    elapsed = time.perf_counter() - start
+    print(f"Flip scan of {len(items)} items done in {elapsed:.2f}s")
+    return changed_ids
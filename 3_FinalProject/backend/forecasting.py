@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import datetime
+from typing import Any
+from typing import Iterable
+
+from pymongo.database import Database
+
+from gw2tp.backtest import load_history
+from gw2tp.forecast import FORECAST_FIELDS
+from gw2tp.forecast import ForecastStore
+from gw2tp.helper import gsc_dict_to_copper
+
+from .published import PublishedState
+
+
+forecast_store = ForecastStore()
+published_forecasts = PublishedState("forecasts", forecast_store.load)
+
+
+def warm_forecasts(
+    db: Database,
+    collection_names: Iterable[str],
+) -> None:
+    # Replays the stored history of the calculators the store knows
+    # nothing about, neither from a replay nor from the published state.
+    # Blocking: the scheduler runs it in a thread before its polls, later
+    # snapshots are folded in one at a time by `update_forecast`.
+    for collection_name in collection_names:
+        if collection_name in forecast_store:
+            continue
+        history = load_history(db, collection_name)
+        # Anomalies found while replaying are old news, keep them out of
+        # the feed
+        replay = ForecastStore(z_threshold=float("inf"))
+        replay_values = zip(
+            history.timestamps.tolist(),
+            history.sell.tolist(),
+            history.crafting_cost.tolist(),
+        )
+        for timestamp, sell, crafting_cost in replay_values:
+            replay.update(
+                collection_name,
+                {"sell": sell, "crafting_cost": crafting_cost},
+                timestamp,
+            )
+        forecast_store.adopt(collection_name, replay)
+
+
+def update_forecast(
+    collection_name: str,
+    data: dict[str, Any],
+    timestamp: datetime.datetime,
+) -> None:
+    # In memory only, see `warm_forecasts` for the history
+    values = {
+        field: float(gsc_dict_to_copper(data, field))
+        for field in FORECAST_FIELDS
+        if f"{field}_g" in data
+    }
+    anomalies = forecast_store.update(
+        collection_name,
+        values,
+        timestamp.timestamp(),
+    )
+    for anomaly in anomalies:
+        print(
+            f"Anomaly {anomaly.subject} {anomaly.field}: {anomaly.value:.0f} "
+            f"(z = {anomaly.z_score:.1f})"
+        )
+
+
+def publish_forecasts(
+    db: Database,
+) -> None:
+    published_forecasts.publish(db, forecast_store.to_dict())
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import hashlib
+
+from starlette.datastructures import Headers
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+
+CACHEABLE_METHODS = {"GET", "HEAD"}
+# Only forwarded on a 304, see RFC 9110 section 15.4.5
+NOT_MODIFIED_HEADERS = {"cache-control", "etag", "vary", "date", "expires"}
+# Event streams never finish, so they cannot be buffered and hashed
+STREAMING_CONTENT_TYPE = "text/event-stream"
+PRIVATE_CACHE_CONTROL = "private, no-store"
+
+
+def compute_etag(
+    body: bytes,
+) -> str:
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(
+    etag: str,
+    if_none_match: str,
+) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+class HTTPCacheMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_age: int,
+        private_headers: tuple[str, ...] = (),
+    ) -> None:
+        # Responses to requests carrying any of private_headers (admin
+        # tokens, profiling) are never stored by shared caches
+        self.app = app
+        self.cache_control = f"public, max-age={max_age}"
+        self.private_headers = tuple(h.lower() for h in private_headers)
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        if scope["type"] != "http" or scope["method"] not in CACHEABLE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        if_none_match = request_headers.get("if-none-match")
+        private = any(h in request_headers for h in self.private_headers)
+        start_message: Message | None = None
+        body_parts: list[bytes] = []
+        passthrough = False
+
+        async def _send(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                content_type = Headers(raw=message["headers"]).get(
+                    "content-type",
+                    "",
+                )
+                if (
+                    message["status"] != 200  # noqa: PLR2004
+                    or content_type.startswith(STREAMING_CONTENT_TYPE)
+                ):
+                    passthrough = True
+                    await send(message)
+                return
+
+            body_parts.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            await self._send_cached(
+                start_message,
+                b"".join(body_parts),
+                if_none_match,
+                private,
+                send,
+            )
+
+        await self.app(scope, receive, _send)
+
+    async def _send_cached(
+        self,
+        start_message: Message,
+        body: bytes,
+        if_none_match: str | None,
+        private: bool,
+        send: Send,
+    ) -> None:
+        etag = compute_etag(body)
+        headers = MutableHeaders(raw=start_message["headers"])
+        headers["etag"] = etag
+        if private:
+            headers["cache-control"] = PRIVATE_CACHE_CONTROL
+        else:
+            headers.setdefault("cache-control", self.cache_control)
+        for name in self.private_headers:
+            headers.add_vary_header(name)
+
+        if if_none_match is not None and etag_matches(etag, if_none_match):
+            not_modified = MutableHeaders(
+                raw=[
+                    (key, value)
+                    for key, value in headers.raw
+                    if key.decode("latin-1") in NOT_MODIFIED_HEADERS
+                ]
+            )
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": not_modified.raw,
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send(start_message)
+        await send({"type": "http.response.body", "body": body})
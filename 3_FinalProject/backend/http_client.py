@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import os
+import threading
+
+import httpx
+
+
+# Per worker process: every worker holds its own pool
+HTTP_MAX_CONNECTIONS = int(os.environ.get("GW2TP_HTTP_MAX_CONNECTIONS", 20))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.environ.get("GW2TP_HTTP_MAX_KEEPALIVE_CONNECTIONS", HTTP_MAX_CONNECTIONS)
+)
+HTTP_TIMEOUT_SECONDS = 10.0
+
+_client: httpx.Client | None = None
+_client_lock = threading.Lock()
+
+
+def http_client() -> httpx.Client:
+    # Shared by the request threads so connections to the GW2 API are kept
+    # alive between requests instead of opened for each one
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(
+                timeout=HTTP_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+            )
+        return _client
+
+
+def close_http_client() -> None:
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import datetime
+import os
+import socket
+import threading
+import time
+import uuid
+
+from pymongo import ReturnDocument
+from pymongo.database import Database
+from pymongo.errors import DuplicateKeyError
+from pymongo.errors import PyMongoError
+
+
+LEASE_COLLECTION = "scheduler_lease"
+LEASE_TTL_SECONDS = int(os.environ.get("GW2TP_LEASE_TTL_SECONDS", 30))
+# Renewing three times per TTL survives one missed heartbeat
+LEASE_HEARTBEAT_SECONDS = max(LEASE_TTL_SECONDS // 3, 1)
+
+
+class SchedulerLease:
+    """Leader election through a single lease document in Mongo.
+
+    Every process heartbeats: the holder renews the lease, the others take
+    it over once it has expired. Only the holder runs the ingestion jobs.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        name: str = "scheduler",
+        ttl_seconds: int = LEASE_TTL_SECONDS,
+    ) -> None:
+        self._collection = db[LEASE_COLLECTION]
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        # Monotonic deadline, a leader that cannot renew steps down by itself
+        self._valid_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def is_leader(self) -> bool:
+        return time.monotonic() < self._valid_until
+
+    def heartbeat(self) -> bool:
+        with self._lock:
+            started = time.monotonic()
+            now = datetime.datetime.now(tz=datetime.timezone.utc)
+            expires_at = now + datetime.timedelta(seconds=self.ttl_seconds)
+            try:
+                doc = self._collection.find_one_and_update(
+                    {
+                        "_id": self.name,
+                        "$or": [
+                            {"holder": self.holder},
+                            {"expires_at": {"$lt": now}},
+                        ],
+                    },
+                    {"$set": {"holder": self.holder, "expires_at": expires_at}},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+            except DuplicateKeyError:
+                # Held by someone else, the upsert collided with their lease
+                doc = None
+            except PyMongoError as e:
+                print(f"Scheduler lease heartbeat failed: {e}")
+                return self.is_leader
+            was_leader = self.is_leader
+            if doc is not None and doc["holder"] == self.holder:
+                self._valid_until = started + self.ttl_seconds
+            else:
+                self._valid_until = 0.0
+            if self.is_leader != was_leader:
+                state = "acquired" if self.is_leader else "lost"
+                print(f"Scheduler lease {state} by {self.holder}")
+            return self.is_leader
+
+    def release(self) -> None:
+        with self._lock:
+            if not self.is_leader:
+                return
+            self._valid_until = 0.0
+            try:
+                self._collection.delete_one(
+                    {"_id": self.name, "holder": self.holder}
+                )
+            except PyMongoError as e:
+                print(f"Scheduler lease release failed: {e}")
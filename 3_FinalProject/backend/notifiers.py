@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import dataclasses
+import ipaddress
+import os
+import socket
+from typing import Any
+from typing import AsyncIterator
+from typing import Protocol
+from urllib.parse import urlsplit
+
+from gw2tp.alerts import AlertMatch
+from gw2tp.alerts import AlertRule
+
+
+ALERT_HISTORY_SIZE = int(os.environ.get("GW2TP_ALERT_HISTORY_SIZE", 500))
+# Slow SSE clients lose alerts instead of growing their queue without bound
+ALERT_STREAM_QUEUE_SIZE = 100
+
+
+def match_to_dict(
+    match: AlertMatch,
+) -> dict[str, Any]:
+    return dataclasses.asdict(match)
+
+
+def public_match(
+    match: AlertMatch,
+) -> dict[str, Any]:
+    # For API clients, who may see the matches of any rule but not where
+    # its owner is notified
+    dct = match_to_dict(match)
+    dct["rule"].pop("webhook_url", None)
+    return dct
+
+
+def _is_public_address(
+    address: str,
+) -> bool:
+    # Drops the zone of scoped IPv6 addresses such as fe80::1%eth0
+    return ipaddress.ip_address(address.split("%")[0]).is_global
+
+
+def webhook_url_error(
+    url: str,
+) -> str | None:
+    # Webhooks are posted from inside the deployment, so they may only go
+    # to https endpoints on public addresses, never to internal services
+    try:
+        parts = urlsplit(url)
+        port = parts.port or 443
+    except ValueError:
+        return "Invalid webhook URL"
+    if parts.scheme != "https" or not parts.hostname:
+        return "Webhook URLs must use https"
+    try:
+        infos = socket.getaddrinfo(
+            parts.hostname,
+            port,
+            type=socket.SOCK_STREAM,
+        )
+    except (OSError, UnicodeError):
+        return f"Webhook host '{parts.hostname}' does not resolve"
+    if not all(_is_public_address(info[4][0]) for info in infos):
+        return "Webhook URLs must not point at private addresses"
+    return None
+
+
+def match_from_dict(
+    dct: dict[str, Any],
+) -> AlertMatch:
+    return AlertMatch(
+        rule=AlertRule(**dct["rule"]),
+        value=dct["value"],
+        previous=dct["previous"],
+        timestamp=dct["timestamp"],
+    )
+
+
+class Notifier(Protocol):
+    async def notify(
+        self,
+        matches: list[AlertMatch],
+    ) -> None: ...
+
+
+class LocalNotifier:
+    # Stand-in for real delivery: logs matches and keeps the latest ones
+    def __init__(
+        self,
+        size: int = ALERT_HISTORY_SIZE,
+    ) -> None:
+        self.history: collections.deque[AlertMatch] = collections.deque(
+            maxlen=size,
+        )
+
+    async def notify(
+        self,
+        matches: list[AlertMatch],
+    ) -> None:
+        for match in matches:
+            rule = match.rule
+            print(
+                f"Alert {rule.rule_id}: {rule.subject} {rule.field} "
+                f"{match.value} {rule.op} {rule.threshold}"
+            )
+        self.history.extend(matches)
+
+
+def _public_resolver() -> Any:
+    # Checks the addresses again when connecting, so a host that resolved
+    # to a public address when its URL was checked cannot be rebound to an
+    # internal one
+    import aiohttp  # noqa: PLC0415
+
+    class PublicResolver(aiohttp.abc.AbstractResolver):
+        def __init__(self) -> None:
+            self._resolver = aiohttp.DefaultResolver()
+
+        async def resolve(
+            self,
+            host: str,
+            port: int = 0,
+            family: socket.AddressFamily = socket.AF_INET,
+        ) -> list[Any]:
+            hosts = await self._resolver.resolve(host, port, family)
+            if not all(_is_public_address(h["host"]) for h in hosts):
+                raise OSError(f"{host} resolves to a private address")
+            return hosts
+
+        async def close(self) -> None:
+            await self._resolver.close()
+
+    return PublicResolver()
+
+
+class WebhookNotifier:
+    async def notify(
+        self,
+        matches: list[AlertMatch],
+    ) -> None:
+        by_url: dict[str, list[dict[str, Any]]] = {}
+        for match in matches:
+            if match.rule.webhook_url is not None:
+                by_url.setdefault(match.rule.webhook_url, []).append(
+                    match_to_dict(match),
+                )
+        # Rules stored before URLs were checked are skipped, as are URLs
+        # whose host moved to a private address since
+        for url in list(by_url):
+            error = await asyncio.to_thread(webhook_url_error, url)
+            if error is not None:
+                print(f"Alert webhook {url} skipped: {error}")
+                del by_url[url]
+        if len(by_url) == 0:
+            return
+        # Only the process sending alerts pays for importing aiohttp
+        import aiohttp  # noqa: PLC0415
+
+        timeout = aiohttp.ClientTimeout(total=10.0)
+        connector = aiohttp.TCPConnector(resolver=_public_resolver())
+        async with aiohttp.ClientSession(
+            timeout=timeout,
+            connector=connector,
+        ) as session:
+
+            async def _post(url: str, payload: list[dict[str, Any]]) -> None:
+                try:
+                    # A redirect could lead anywhere, it is not followed
+                    async with session.post(
+                        url,
+                        json={"alerts": payload},
+                        allow_redirects=False,
+                    ):
+                        pass
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    print(f"Alert webhook {url} failed: {e}")
+
+            await asyncio.gather(
+                *(_post(url, payload) for url, payload in by_url.items())
+            )
+
+
+class StreamNotifier:
+    # Fans matches out to the connected server-sent event clients
+    def __init__(self) -> None:
+        self._queues: set[asyncio.Queue[AlertMatch]] = set()
+
+    async def notify(
+        self,
+        matches: list[AlertMatch],
+    ) -> None:
+        self.push(matches)
+
+    def push(
+        self,
+        matches: list[AlertMatch],
+    ) -> None:
+        # Must be called from the event loop the subscribers run on
+        for queue in self._queues:
+            for match in matches:
+                if queue.full():
+                    break
+                queue.put_nowait(match)
+
+    async def subscribe(self) -> AsyncIterator[AlertMatch]:
+        queue: asyncio.Queue[AlertMatch] = asyncio.Queue(
+            maxsize=ALERT_STREAM_QUEUE_SIZE,
+        )
+        self._queues.add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._queues.discard(queue)
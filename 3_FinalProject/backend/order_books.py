@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any
+
+from gw2tp.constants import API
+from gw2tp.orderbook import OrderBook
+
+from backend.flip_scanner import GW2_API_PAGE_SIZE
+from backend.http_client import http_client
+
+
+ORDER_BOOK_TTL_SECONDS = float(
+    os.environ.get("GW2TP_ORDER_BOOK_TTL_SECONDS", 60)
+)
+
+
+def fetch_order_books(
+    item_ids: list[int],
+) -> dict[int, OrderBook]:
+    books: dict[int, OrderBook] = {}
+    client = http_client()
+    for start in range(0, len(item_ids), GW2_API_PAGE_SIZE):
+        page = item_ids[start : start + GW2_API_PAGE_SIZE]
+        response = client.get(
+            API.GW2_COMMERCE_LISTINGS_URL,
+            params={"ids": ",".join(str(i) for i in page)},
+        )
+        response.raise_for_status()
+        listings: list[dict[str, Any]] = response.json()
+        for listing in listings:
+            book = OrderBook.from_listing(listing)
+            books[book.item_id] = book
+    # Items without any listing are absent from the response
+    for item_id in item_ids:
+        books.setdefault(item_id, OrderBook.from_listing({"id": item_id}))
+    return books
+
+
+class OrderBookCache:
+    def __init__(
+        self,
+        ttl_seconds: float = ORDER_BOOK_TTL_SECONDS,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        # item id -> (fetched at, book)
+        self._books: dict[int, tuple[float, OrderBook]] = {}
+        self._lock = threading.Lock()
+
+    def get_many(
+        self,
+        item_ids: list[int],
+    ) -> dict[int, OrderBook]:
+        now = time.monotonic()
+        with self._lock:
+            cached = {
+                item_id: self._books[item_id]
+                for item_id in item_ids
+                if item_id in self._books
+            }
+        books = {
+            item_id: book
+            for item_id, (fetched_at, book) in cached.items()
+            if now - fetched_at < self.ttl_seconds
+        }
+        # One batched request for everything stale or missing
+        missing = [
+            item_id
+            for item_id in dict.fromkeys(item_ids)
+            if item_id not in books
+        ]
+        if len(missing) > 0:
+            fetched = fetch_order_books(missing)
+            fetched_at = time.monotonic()
+            with self._lock:
+                for item_id, book in fetched.items():
+                    self._books[item_id] = (fetched_at, book)
+            books.update(fetched)
+        return books
+
+
+order_book_cache = OrderBookCache()
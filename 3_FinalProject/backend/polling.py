@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import collections
+import threading
+from urllib.parse import parse_qs
+
+from pymongo import UpdateOne
+from pymongo.database import Database
+from pymongo.errors import PyMongoError
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from gw2tp.db_schema import COLLECTIONS
+
+
+INTEREST_COLLECTION = "poll_interest"
+# Sent by the scheduler so its own fetches do not count as interest
+SCHEDULER_USER_AGENT = "gw2tp-scheduler"
+# Endpoints that show a calculator's history through `item_name`
+_HISTORY_PATHS = {"/api/history", "/api/forecast", "/api/anomalies"}
+
+
+class InterestCounter:
+    # Requests per calculator, flushed to Mongo for the ingesting process
+    def __init__(self) -> None:
+        self._counts: collections.Counter[str] = collections.Counter()
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        subject: str,
+    ) -> None:
+        with self._lock:
+            self._counts[subject] += 1
+
+    def flush(
+        self,
+        db: Database,
+    ) -> None:
+        with self._lock:
+            counts, self._counts = self._counts, collections.Counter()
+        if len(counts) == 0:
+            return
+        try:
+            db[INTEREST_COLLECTION].bulk_write(
+                [
+                    UpdateOne(
+                        {"_id": subject},
+                        {"$inc": {"count": count}},
+                        upsert=True,
+                    )
+                    for subject, count in counts.items()
+                ],
+                ordered=False,
+            )
+        except PyMongoError as e:
+            print(f"Flushing poll interest failed: {e}")
+            with self._lock:
+                self._counts.update(counts)
+
+
+def read_interest(
+    db: Database,
+) -> dict[str, int]:
+    return {
+        doc["_id"]: doc["count"] for doc in db[INTEREST_COLLECTION].find({})
+    }
+
+
+interest_counter = InterestCounter()
+
+
+def _request_subject(
+    scope: Scope,
+) -> str | None:
+    path: str = scope["path"]
+    name = path.removeprefix("/api/")
+    if name in COLLECTIONS:
+        return name
+    if path in _HISTORY_PATHS:
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        item_name = query.get("item_name", [""])[0]
+        if item_name in COLLECTIONS:
+            return item_name
+    return None
+
+
+class InterestMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        counter: InterestCounter = interest_counter,
+    ) -> None:
+        self.app = app
+        self.counter = counter
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        if scope["type"] == "http" and scope["method"] == "GET":
+            subject = _request_subject(scope)
+            user_agent = Headers(scope=scope).get("user-agent", "")
+            if subject is not None and user_agent != SCHEDULER_USER_AGENT:
+                self.counter.record(subject)
+        await self.app(scope, receive, send)
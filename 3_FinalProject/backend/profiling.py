@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import datetime
+import functools
+import hmac
+import inspect
+import os
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import TypeVar
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.middleware.base import RequestResponseEndpoint
+from starlette.requests import Request
+from starlette.responses import FileResponse
+from starlette.responses import JSONResponse
+from starlette.responses import Response
+
+
+PROFILING_ENABLED = os.environ.get("GW2TP_PROFILING", "0") == "1"
+PROFILING_ADMIN_TOKEN = os.environ.get("GW2TP_ADMIN_TOKEN", "")
+PROFILING_INTERVAL = float(os.environ.get("GW2TP_PROFILING_INTERVAL", 0.001))
+PROFILE_DIR = Path(os.environ.get("GW2TP_PROFILE_DIR", "profiles"))
+
+PROFILE_HEADER = "x-gw2tp-profile"
+ADMIN_TOKEN_HEADER = "x-gw2tp-admin-token"
+PROFILE_FILE_HEADER = "x-gw2tp-profile-file"
+
+# Holds the list the profiled endpoint appends its profile file to. A list is
+# used because endpoints run in a copied context (threadpool), so only
+# mutations of a shared object are visible to the middleware again.
+_profile_files: ContextVar[list[Path] | None] = ContextVar(
+    "_profile_files",
+    default=None,
+)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def is_admin(
+    request: Request,
+) -> bool:
+    if not PROFILING_ADMIN_TOKEN:
+        return False
+    token = request.headers.get(ADMIN_TOKEN_HEADER, "")
+    return hmac.compare_digest(token, PROFILING_ADMIN_TOKEN)
+
+
+def _write_profile(
+    profiler: Any,
+    name: str,
+) -> Path:
+    from pyinstrument.renderers import SpeedscopeRenderer  # noqa: PLC0415
+
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.datetime.now(tz=datetime.timezone.utc).strftime(
+        "%Y%m%dT%H%M%S%f"
+    )
+    path = PROFILE_DIR / f"{name}-{timestamp}.speedscope.json"
+    path.write_text(
+        profiler.output(renderer=SpeedscopeRenderer()),
+        encoding="utf-8",
+    )
+    return path
+
+
+def profiled(
+    func: F,
+) -> F:
+    if not PROFILING_ENABLED:
+        return func
+
+    from pyinstrument import Profiler  # noqa: PLC0415
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            files = _profile_files.get()
+            if files is None:
+                return await func(*args, **kwargs)
+            profiler = Profiler(
+                interval=PROFILING_INTERVAL,
+                async_mode="enabled",
+            )
+            profiler.start()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                profiler.stop()
+                files.append(_write_profile(profiler, func.__name__))
+
+        return async_wrapper  # type: ignore[return-value]
+
+    @functools.wraps(func)
+    def sync_wrapper(*args: Any, **kwargs: Any) -> Any:
+        files = _profile_files.get()
+        if files is None:
+            return func(*args, **kwargs)
+        profiler = Profiler(
+            interval=PROFILING_INTERVAL,
+            async_mode="disabled",
+        )
+        profiler.start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.stop()
+            files.append(_write_profile(profiler, func.__name__))
+
+    return sync_wrapper  # type: ignore[return-value]
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(
+        self,
+        request: Request,
+        call_next: RequestResponseEndpoint,
+    ) -> Response:
+        mode = request.headers.get(PROFILE_HEADER, "")
+        if mode not in {"store", "return"}:
+            return await call_next(request)
+        if not is_admin(request):
+            return JSONResponse(
+                content={"error": "Profiling requires an admin token"},
+                status_code=403,
+            )
+
+        files: list[Path] = []
+        token = _profile_files.set(files)
+        try:
+            response = await call_next(request)
+        finally:
+            _profile_files.reset(token)
+
+        if len(files) == 0:
+            return response
+        profile_file = files[-1]
+        if mode == "return":
+            return FileResponse(
+                profile_file,
+                media_type="application/json",
+                headers={
+                    PROFILE_FILE_HEADER: profile_file.name,
+                    "Cache-Control": "private, no-store",
+                },
+            )
+        response.headers[PROFILE_FILE_HEADER] = profile_file.name
+        return response
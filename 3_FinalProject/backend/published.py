@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any
+from typing import Callable
+
+import numpy as np
+from pymongo import ReturnDocument
+from pymongo.database import Database
+from pymongo.errors import PyMongoError
+
+
+PUBLISHED_COLLECTION = "published_state"
+PUBLISHED_POLL_SECONDS = int(os.environ.get("GW2TP_PUBLISHED_POLL_SECONDS", 5))
+
+
+class PublishedState:
+    """State computed by the scheduler, handed to every API process.
+
+    The process running the scheduler (the lease holder or
+    ``backend.worker``) publishes one document per key with an increasing
+    version. API processes poll the version and apply the document when
+    it changed, so they never have to ingest anything themselves.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        apply: Callable[[dict[str, Any]], None],
+    ) -> None:
+        self.key = key
+        self._apply = apply
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def publish(
+        self,
+        db: Database,
+        payload: dict[str, Any],
+    ) -> None:
+        try:
+            doc = db[PUBLISHED_COLLECTION].find_one_and_update(
+                {"_id": self.key},
+                {"$set": payload, "$inc": {"version": 1}},
+                projection={"version": True},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except PyMongoError as e:
+            print(f"Publishing '{self.key}' failed: {e}")
+            return
+        with self._lock:
+            # The publisher already holds this state
+            self.version = doc["version"]
+
+    def fetch(
+        self,
+        db: Database,
+    ) -> dict[str, Any] | None:
+        # Blocking, the async scheduler jobs run it in a thread
+        collection = db[PUBLISHED_COLLECTION]
+        try:
+            head = collection.find_one({"_id": self.key}, {"version": True})
+            if head is None or head["version"] == self.version:
+                return None
+            return collection.find_one({"_id": self.key})
+        except PyMongoError as e:
+            print(f"Refreshing '{self.key}' failed: {e}")
+            return None
+
+    def apply(
+        self,
+        doc: dict[str, Any] | None,
+    ) -> bool:
+        with self._lock:
+            if doc is None or doc["version"] == self.version:
+                return False
+            self._apply(doc)
+            self.version = doc["version"]
+        return True
+
+
+def pack_array(
+    array: np.ndarray,
+) -> bytes:
+    return np.ascontiguousarray(array, dtype=np.int64).tobytes()
+
+
+def unpack_array(
+    data: bytes,
+) -> np.ndarray:
+    return np.frombuffer(data, dtype=np.int64)
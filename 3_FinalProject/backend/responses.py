@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+from starlette.responses import JSONResponse
+
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(
+    obj: Any,
+) -> Any:
+    # numpy scalars that slip through as generic objects, e.g. from reductions
+    if hasattr(obj, "item"):
+        return obj.item()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    def render(
+        self,
+        content: Any,
+    ) -> bytes:
+        return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
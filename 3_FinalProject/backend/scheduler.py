@@ -1,73 +1,247 @@
 # ruff: noqa: SIM117
+from __future__ import annotations
+
+import asyncio
+import atexit
 import datetime
+import os
+import time
+from typing import TYPE_CHECKING
 from typing import Any
 
-import aiohttp
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from pymongo.database import Database
 
 from gw2tp.db_schema import COLLECTIONS
+from gw2tp.db_schema import SNAPSHOT_TIMEZONE
 from gw2tp.db_schema import cleanup_old_records
+from gw2tp.db_schema import snapshot_bucket
+from gw2tp.db_schema import upsert_snapshots
+from gw2tp.helper import gsc_dict_to_copper
 from gw2tp.helper import host_url
 from gw2tp.helper import is_running_on_railway
+from gw2tp.polling import PollScheduler
 
+from .alerts import evaluate_calculator
+from .alerts import evaluate_market
+from .alerts import published_alerts
+from .backfill import backfill_snapshots
 from .db import db
+from .flip_scanner import FLIP_SCAN_INTERVAL_SECONDS
+from .flip_scanner import market_prices
+from .flip_scanner import publish_market
+from .flip_scanner import published_market
+from .flip_scanner import scan_market
+from .forecasting import publish_forecasts
+from .forecasting import published_forecasts
+from .forecasting import update_forecast
+from .forecasting import warm_forecasts
+from .leader import LEASE_HEARTBEAT_SECONDS
+from .leader import SchedulerLease
+from .polling import SCHEDULER_USER_AGENT
+from .polling import interest_counter
+from .polling import read_interest
+from .published import PUBLISHED_POLL_SECONDS
+from .shared_cache import PRICE_SNAPSHOT_HEADER
+
 
+if TYPE_CHECKING:
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
-api_base = host_url()
+
+# A standalone worker reaches the API through its service name
+api_base = os.environ.get("GW2TP_API_URL", host_url())
+FETCH_INTERVAL_SECONDS = 15 * 60 if is_running_on_railway() else 10
+# Each calculator gets its own interval between these, see PollScheduler
+POLL_MIN_INTERVAL_SECONDS = max(FETCH_INTERVAL_SECONDS // 3, 1)
+POLL_MAX_INTERVAL_SECONDS = FETCH_INTERVAL_SECONDS * 4
+# Defaults to the request rate of polling everything every fetch interval
+POLL_BUDGET_PER_HOUR = float(
+    os.environ.get(
+        "GW2TP_POLL_BUDGET_PER_HOUR",
+        len(COLLECTIONS) * 3_600 / FETCH_INTERVAL_SECONDS,
+    )
+)
+POLL_TICK_SECONDS = max(POLL_MIN_INTERVAL_SECONDS // 5, 1)
+# No two polls of a calculator are closer than the minimum interval
+SNAPSHOT_BUCKET_SECONDS = POLL_MIN_INTERVAL_SECONDS
+# Longer silences are downtime and get filled in at the slowest poll rate
+BACKFILL_MAX_GAP_SECONDS = POLL_MAX_INTERVAL_SECONDS * 2
+BACKFILL_FILL_SECONDS = POLL_MAX_INTERVAL_SECONDS
+FETCH_KEYS = ["crafting_cost", "sell"]
+# "0" when a separate `python -m backend.worker` does the ingestion
+EMBEDDED_SCHEDULER = os.environ.get("GW2TP_EMBEDDED_SCHEDULER", "1") == "1"
 
 
 async def _fetch_single_request(
     db: Database,
     collection_name: str,
     data_keys: list[str],
-) -> None:
-    async with aiohttp.ClientSession() as session:
+) -> dict[str, Any] | None:
+    import aiohttp  # noqa: PLC0415
+
+    headers = {"User-Agent": SCHEDULER_USER_AGENT}
+    async with aiohttp.ClientSession(headers=headers) as session:
         async with session.get(f"{api_base}{collection_name}") as response:
             data: dict[str, Any] = await response.json()
             if data.get("detail", "") == "Not Found":
                 print(f"API command '{collection_name}' not found.")
-                return
+                return None
             doc = {
                 key: value
                 for key, value in data.items()
                 if any(key.startswith(data_key) for data_key in data_keys)
             }
-            doc["timestamp"] = datetime.datetime.now(
-                tz=datetime.timezone(datetime.timedelta(hours=2), "UTC")
-            ).isoformat()
-            db[collection_name].insert_one(doc)
+            timestamp = datetime.datetime.now(tz=SNAPSHOT_TIMEZONE)
+            doc["timestamp"] = timestamp.isoformat()
+            doc["bucket"] = snapshot_bucket(timestamp, SNAPSHOT_BUCKET_SECONDS)
+            # Digest of the prices the values were computed from
+            snapshot = response.headers.get(PRICE_SNAPSHOT_HEADER)
+            if snapshot is not None:
+                doc["price_snapshot"] = snapshot
+            await asyncio.to_thread(
+                upsert_snapshots,
+                db,
+                collection_name,
+                [doc],
+            )
+            update_forecast(collection_name, data, timestamp)
+            await evaluate_calculator(db, collection_name, data, snapshot)
+            return data
 
 
 async def fetch_api_data() -> None:
     print("Fetching data...")
-    fetch_keys = ["crafting_cost", "sell"]
+    await asyncio.to_thread(warm_forecasts, db, COLLECTIONS)
     for collection_name in COLLECTIONS:
         await _fetch_single_request(
             db,
             collection_name,
-            fetch_keys,
+            FETCH_KEYS,
         )
     print("Fetching done...")
 
 
-def start_scheduler() -> None:
+async def refresh_published_state() -> None:
+    for state in (published_market, published_forecasts, published_alerts):
+        # Applied on the loop, which owns the alert streams
+        state.apply(await asyncio.to_thread(state.fetch, db))
+    await asyncio.to_thread(interest_counter.flush, db)
+
+
+def start_scheduler(
+    ingest: bool = True,
+    consume: bool = True,
+) -> AsyncIOScheduler:
+    # ingest: fetch, scan, clean up and alert, but only while holding the
+    # lease, so any number of API workers / worker processes may run it.
+    # consume: apply what the ingesting process published.
+    from apscheduler.schedulers.asyncio import (  # noqa: PLC0415
+        AsyncIOScheduler,
+    )
+
     scheduler = AsyncIOScheduler()
+    if consume:
+        scheduler.add_job(
+            refresh_published_state,
+            "interval",
+            seconds=PUBLISHED_POLL_SECONDS,
+            next_run_time=datetime.datetime.now(tz=datetime.timezone.utc),
+            max_instances=1,
+        )
+    if not ingest:
+        scheduler.start()
+        return scheduler
+
+    lease = SchedulerLease(db)
+    atexit.register(lease.release)
+
+    def is_leader() -> bool:
+        # The first jobs may run before the first heartbeat finished
+        return lease.is_leader or lease.heartbeat()
+
+    def lease_job() -> None:
+        lease.heartbeat()
 
-    async def fetch_job() -> None:
-        await fetch_api_data()
+    poller = PollScheduler(
+        COLLECTIONS,
+        min_interval=POLL_MIN_INTERVAL_SECONDS,
+        max_interval=POLL_MAX_INTERVAL_SECONDS,
+        budget_per_hour=POLL_BUDGET_PER_HOUR,
+        now=time.monotonic(),
+    )
+
+    async def poll_job() -> None:
+        if not await asyncio.to_thread(is_leader):
+            return
+        # Only replays calculators without forecasts, e.g. on the first
+        # poll after winning the lease
+        await asyncio.to_thread(warm_forecasts, db, COLLECTIONS)
+        now = time.monotonic()
+        interest = await asyncio.to_thread(read_interest, db)
+        poller.record_interest(interest, now)
+        due = poller.due(now)
+        if len(due) == 0:
+            return
+        for collection_name in due:
+            data = await _fetch_single_request(db, collection_name, FETCH_KEYS)
+            if data is None:
+                continue
+            poller.record_poll(
+                collection_name,
+                {key: gsc_dict_to_copper(data, key) for key in FETCH_KEYS},
+                time.monotonic(),
+            )
+        await asyncio.to_thread(publish_forecasts, db)
+
+    async def scan_job() -> None:
+        # One market scan per deployment, whatever the number of workers;
+        # the others apply the market the leader publishes
+        if not await asyncio.to_thread(is_leader):
+            return
+        changed_ids = await scan_market()
+        await asyncio.to_thread(publish_market, db)
+        await evaluate_market(db, changed_ids, market_prices)
+
+    def backfill_job() -> None:
+        if not is_leader():
+            return
+        filled = backfill_snapshots(
+            db,
+            bucket_seconds=SNAPSHOT_BUCKET_SECONDS,
+            max_gap_seconds=BACKFILL_MAX_GAP_SECONDS,
+            fill_seconds=BACKFILL_FILL_SECONDS,
+        )
+        if sum(filled.values()) > 0:
+            print(f"Backfilled snapshot gaps: {filled}")
 
     def cleanup_job() -> None:
+        if not is_leader():
+            return
         cleanup_old_records(db, days=14)
         print("Database cleanup completed...")
 
+    scheduler.add_job(
+        lease_job,
+        "interval",
+        seconds=LEASE_HEARTBEAT_SECONDS,
+        next_run_time=datetime.datetime.now(tz=datetime.timezone.utc),
+        max_instances=1,
+    )
+
+    scheduler.add_job(
+        backfill_job,
+        "interval",
+        seconds=BACKFILL_FILL_SECONDS,
+        next_run_time=datetime.datetime.now(tz=datetime.timezone.utc),
+        max_instances=1,
+    )
+    scheduler.add_job(
+        poll_job,
+        "interval",
+        seconds=POLL_TICK_SECONDS,
+        max_instances=1,
+    )
     if is_running_on_railway():
-        scheduler.add_job(
-            fetch_job,
-            "interval",
-            minutes=15,
-            max_instances=1,
-        )
         scheduler.add_job(
             cleanup_job,
             "cron",
@@ -76,16 +250,18 @@ def start_scheduler() -> None:
             max_instances=1,
         )
     else:
-        scheduler.add_job(
-            fetch_job,
-            "interval",
-            seconds=10,
-            max_instances=1,
-        )
         scheduler.add_job(
             cleanup_job,
             "interval",
             hours=1,
             max_instances=1,
         )
+    scheduler.add_job(
+        scan_job,
+        "interval",
+        seconds=FLIP_SCAN_INTERVAL_SECONDS,
+        next_run_time=datetime.datetime.now(tz=datetime.timezone.utc),
+        max_instances=1,
+    )
     scheduler.start()
+    return scheduler
@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import collections
+import contextvars
+import functools
+import os
+import threading
+import time
+from typing import Callable
+from typing import Protocol
+
+from starlette.responses import Response
+
+
+# Shared tier for all replicas, e.g. redis://redis:6379/0. Without it every
+# process only keeps its own L1.
+SHARED_CACHE_URL = os.environ.get("GW2TP_REDIS_URL", "")
+L1_CACHE_MAX_ITEMS = int(os.environ.get("GW2TP_L1_CACHE_MAX_ITEMS", 10_000))
+# A replica that lost a fill lock waits this long for the winner's values
+# before fetching them itself
+CACHE_FILL_WAIT_SECONDS = float(
+    os.environ.get("GW2TP_CACHE_FILL_WAIT_SECONDS", 2.0)
+)
+_FILL_POLL_SECONDS = 0.05
+_KEY_PREFIX = "gw2tp"
+# Digests of the price snapshots a cached result was computed from
+PRICE_SNAPSHOT_HEADER = "X-Price-Snapshot"
+_used_snapshots: contextvars.ContextVar[list[str] | None] = (
+    contextvars.ContextVar("used_snapshots", default=None)
+)
+
+
+def record_snapshot(
+    digest: str,
+) -> None:
+    # Called by whatever reads a price snapshot while `cached` computes a
+    # result, outside of it there is nothing to tag
+    used = _used_snapshots.get()
+    if used is not None and digest not in used:
+        used.append(digest)
+
+
+class CacheBackend(Protocol):
+    def get_many(
+        self,
+        keys: list[str],
+    ) -> list[bytes | None]: ...
+
+    def set_many(
+        self,
+        items: dict[str, bytes],
+        ttl_seconds: float,
+    ) -> None: ...
+
+    def try_lock(
+        self,
+        keys: list[str],
+        ttl_seconds: float,
+    ) -> list[bool]: ...
+
+
+class MemoryBackend:
+    # In-process stand-in for Redis, shared by the caches handed the same
+    # instance, e.g. several simulated replicas
+    def __init__(
+        self,
+        now: Callable[[], float] = time.time,
+    ) -> None:
+        self._now = now
+        # key -> (expires at, value)
+        self._items: dict[str, tuple[float, bytes]] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    def _get(
+        self,
+        key: str,
+        now: float,
+    ) -> bytes | None:
+        item = self._items.get(key)
+        if item is None or item[0] <= now:
+            return None
+        return item[1]
+
+    def get_many(
+        self,
+        keys: list[str],
+    ) -> list[bytes | None]:
+        now = self._now()
+        with self._lock:
+            self.requests += 1
+            return [self._get(key, now) for key in keys]
+
+    def set_many(
+        self,
+        items: dict[str, bytes],
+        ttl_seconds: float,
+    ) -> None:
+        expires_at = self._now() + ttl_seconds
+        with self._lock:
+            self.requests += 1
+            for key, value in items.items():
+                self._items[key] = (expires_at, value)
+
+    def try_lock(
+        self,
+        keys: list[str],
+        ttl_seconds: float,
+    ) -> list[bool]:
+        now = self._now()
+        with self._lock:
+            self.requests += 1
+            acquired = []
+            for key in keys:
+                free = self._get(key, now) is None
+                if free:
+                    self._items[key] = (now + ttl_seconds, b"1")
+                acquired.append(free)
+            return acquired
+
+
+class RedisBackend:
+    # Every call is a single round trip: MGET, or a pipeline of SET
+    # commands. An unreachable Redis degrades to misses, never to errors.
+    def __init__(
+        self,
+        url: str,
+    ) -> None:
+        import redis  # noqa: PLC0415
+
+        self._redis = redis.Redis.from_url(url)
+        self._errors = (redis.RedisError,)
+
+    def get_many(
+        self,
+        keys: list[str],
+    ) -> list[bytes | None]:
+        try:
+            return self._redis.mget(keys)
+        except self._errors as e:
+            print(f"Shared cache read failed: {e}")
+            return [None] * len(keys)
+
+    def set_many(
+        self,
+        items: dict[str, bytes],
+        ttl_seconds: float,
+    ) -> None:
+        ttl_ms = max(int(ttl_seconds * 1_000), 1)
+        pipeline = self._redis.pipeline(transaction=False)
+        for key, value in items.items():
+            pipeline.set(key, value, px=ttl_ms)
+        try:
+            pipeline.execute()
+        except self._errors as e:
+            print(f"Shared cache write failed: {e}")
+
+    def try_lock(
+        self,
+        keys: list[str],
+        ttl_seconds: float,
+    ) -> list[bool]:
+        ttl_ms = max(int(ttl_seconds * 1_000), 1)
+        pipeline = self._redis.pipeline(transaction=False)
+        for key in keys:
+            pipeline.set(key, b"1", nx=True, px=ttl_ms)
+        try:
+            return [bool(reply) for reply in pipeline.execute()]
+        except self._errors as e:
+            print(f"Shared cache lock failed: {e}")
+            return [True] * len(keys)
+
+
+class SnapshotCache:
+    """Two tier cache of values that are valid for one snapshot version.
+
+    Keys carry the version (epoch seconds // ``snapshot_seconds``) and
+    expire when it ends, so no replica ever serves another version's
+    value. Misses go to the shared backend; whatever is still missing is
+    filled by the replica that wins the per key fill lock, while the others
+    wait for its values. Upstream calls therefore scale with the number of
+    versions rather than with the number of replicas.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend | None,
+        snapshot_seconds: int,
+        l1_max_items: int = L1_CACHE_MAX_ITEMS,
+        fill_wait_seconds: float = CACHE_FILL_WAIT_SECONDS,
+        now: Callable[[], float] = time.time,
+    ) -> None:
+        self.backend = backend
+        self.snapshot_seconds = snapshot_seconds
+        self.l1_max_items = l1_max_items
+        self.fill_wait_seconds = fill_wait_seconds
+        self._now = now
+        # key -> (expires at, value), least recently used first
+        self._l1: collections.OrderedDict[str, tuple[float, bytes]] = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def version(self) -> int:
+        return int(self._now() // self.snapshot_seconds)
+
+    def _l1_get(
+        self,
+        keys: list[str],
+        now: float,
+    ) -> dict[str, bytes]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                item = self._l1.get(key)
+                if item is None:
+                    continue
+                if item[0] <= now:
+                    del self._l1[key]
+                    continue
+                self._l1.move_to_end(key)
+                found[key] = item[1]
+        return found
+
+    def _l1_set(
+        self,
+        items: dict[str, bytes],
+        expires_at: float,
+    ) -> None:
+        with self._lock:
+            for key, value in items.items():
+                self._l1[key] = (expires_at, value)
+                self._l1.move_to_end(key)
+            while len(self._l1) > self.l1_max_items:
+                self._l1.popitem(last=False)
+
+    def _shared_get(
+        self,
+        keys: list[str],
+    ) -> dict[str, bytes]:
+        if self.backend is None or len(keys) == 0:
+            return {}
+        values = self.backend.get_many(keys)
+        return {
+            key: value
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+
+    def get_or_fill(
+        self,
+        namespace: str,
+        keys: list[str],
+        fill: Callable[[list[str]], dict[str, bytes]],
+        version: int | None = None,
+    ) -> dict[str, bytes]:
+        # `fill` computes the values of the keys it is given; keys it
+        # leaves out are not cached and are absent from the result. Callers
+        # that derive something else from the version pass it in, so both
+        # agree even when a version ends in between.
+        if version is None:
+            version = self.version()
+        expires_at = (version + 1) * self.snapshot_seconds
+        prefix = f"{_KEY_PREFIX}:{namespace}:{version}:"
+        found = self._l1_get([prefix + key for key in keys], self._now())
+        missing = [prefix + key for key in keys if prefix + key not in found]
+        shared = self._shared_get(missing)
+        self._l1_set(shared, expires_at)
+        found.update(shared)
+        missing = [key for key in missing if key not in shared]
+
+        waiting: list[str] = []
+        if len(missing) > 0 and self.backend is not None:
+            locks = self.backend.try_lock(
+                [f"{key}:lock" for key in missing],
+                ttl_seconds=self.fill_wait_seconds,
+            )
+            waiting = [key for key, ok in zip(missing, locks) if not ok]
+            missing = [key for key, ok in zip(missing, locks) if ok]
+        if len(missing) > 0:
+            found.update(self._fill(prefix, missing, fill, expires_at))
+        if len(waiting) > 0:
+            deadline = time.monotonic() + self.fill_wait_seconds
+            while len(waiting) > 0 and time.monotonic() < deadline:
+                time.sleep(_FILL_POLL_SECONDS)
+                shared = self._shared_get(waiting)
+                self._l1_set(shared, expires_at)
+                found.update(shared)
+                waiting = [key for key in waiting if key not in shared]
+            if len(waiting) > 0:
+                found.update(self._fill(prefix, waiting, fill, expires_at))
+        return {
+            key: found[prefix + key] for key in keys if prefix + key in found
+        }
+
+    def _fill(
+        self,
+        prefix: str,
+        keys: list[str],
+        fill: Callable[[list[str]], dict[str, bytes]],
+        expires_at: float,
+    ) -> dict[str, bytes]:
+        values = {
+            prefix + key: value
+            for key, value in fill([key[len(prefix) :] for key in keys]).items()
+        }
+        self._l1_set(values, expires_at)
+        if self.backend is not None and len(values) > 0:
+            ttl_seconds = max(expires_at - self._now(), 0.001)
+            self.backend.set_many(values, ttl_seconds)
+        return values
+
+    def cached(
+        self,
+        func: Callable[[], Response],
+    ) -> Callable[[], Response]:
+        # For endpoints without parameters whose response only depends on
+        # the prices of the current snapshot version. Errors are not cached.
+        # The digests of the snapshots read are stored in front of the body
+        # and sent as PRICE_SNAPSHOT_HEADER.
+        key = func.__name__
+
+        @functools.wraps(func)
+        def wrapper() -> Response:
+            computed: list[Response] = []
+
+            def _compute(
+                keys: list[str],
+            ) -> dict[str, bytes]:
+                token = _used_snapshots.set([])
+                try:
+                    response = func()
+                    tag = ",".join(_used_snapshots.get() or [])
+                finally:
+                    _used_snapshots.reset(token)
+                if tag:
+                    response.headers[PRICE_SNAPSHOT_HEADER] = tag
+                computed.append(response)
+                if response.status_code != 200:  # noqa: PLR2004
+                    return {}
+                return {keys[0]: tag.encode() + b"\n" + bytes(response.body)}
+
+            value = self.get_or_fill("results", [key], _compute).get(key)
+            if value is None:
+                return computed[0] if len(computed) > 0 else func()
+            tag, _, body = value.partition(b"\n")
+            headers = {PRICE_SNAPSHOT_HEADER: tag.decode()} if tag else None
+            return Response(
+                content=body,
+                media_type="application/json",
+                headers=headers,
+            )
+
+        return wrapper
+
+
+def create_backend(
+    url: str = SHARED_CACHE_URL,
+) -> CacheBackend | None:
+    if not url:
+        return None
+    if url == "memory://":
+        return MemoryBackend()
+    return RedisBackend(url)
+
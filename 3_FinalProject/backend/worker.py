@@ -0,0 +1,43 @@
+"""Ingestion worker, run next to API processes started with
+``GW2TP_EMBEDDED_SCHEDULER=0``:
+
+    python -m backend.worker
+
+It fetches snapshots, scans the market, evaluates alerts and cleans up old
+records, and publishes the results through MongoDB for the API processes
+to pick up. Several workers may run; the scheduler lease keeps exactly
+one of them active.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import signal
+
+from .scheduler import start_scheduler
+
+
+async def run_worker() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    scheduler = start_scheduler(ingest=True, consume=False)
+    print("Ingestion worker started...")
+    try:
+        await stop.wait()
+    finally:
+        scheduler.shutdown(wait=False)
+        print("Ingestion worker stopped...")
+
+
+def main() -> None:
+    argparse.ArgumentParser(
+        description="Run the snapshot ingestion scheduler",
+    ).parse_args()
+    asyncio.run(run_worker())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+
+# Entry points of the processes we start: uvicorn imports these first
+DEFAULT_MODULES = ["backend.api", "frontend.app"]
+
+
+def parse_importtime(
+    stderr: str,
+) -> list[tuple[int, int, str]]:
+    # "import time: self [us] | cumulative | imported package" lines, the
+    # package name is indented by its nesting depth
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.removeprefix("import time:").split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((int(cumulative_us), depth, name.strip()))
+    return imports
+
+
+def measure_import(
+    module: str,
+    env: dict[str, str],
+) -> list[tuple[int, int, str]]:
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    return parse_importtime(result.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Cold import time of the API and frontend processes",
+    )
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(Path.cwd()), env.get("PYTHONPATH")])
+    )
+    for module in args.modules:
+        totals = []
+        runs = []
+        for _ in range(args.repeat):
+            imports = measure_import(module, env)
+            total = next(us for us, _, name in imports if name == module)
+            totals.append(total)
+            runs.append(imports)
+        median_run = runs[totals.index(sorted(totals)[len(totals) // 2])]
+        print(
+            f"{module}: median {statistics.median(totals) / 1e3:.1f} ms, "
+            f"min {min(totals) / 1e3:.1f} ms over {args.repeat} runs"
+        )
+        direct = sorted(
+            ((us, name) for us, depth, name in median_run if depth == 1),
+            reverse=True,
+        )
+        for us, name in direct[: args.top]:
+            print(f"  {name:<40}{us / 1e3:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
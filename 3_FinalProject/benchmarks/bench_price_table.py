@@ -0,0 +1,132 @@
+"""Building the prices of a snapshot, per-item dicts against PriceTable:
+
+    python -m benchmarks.bench_price_table --items 12 30000
+
+"dicts" is the former fetch_tp_prices layout, 14 keys per item with every
+gold/silver/copper split computed up front. "rows" builds the snapshot
+and reads what a calculator reads, the buy and sell price of each item.
+"columns" reads every item's flip split at once, as a market scan would.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import timeit
+import tracemalloc
+from typing import Any
+from typing import Callable
+
+import numpy as np
+
+from gw2tp.constants import TAX_RATE
+from gw2tp.helper import copper_to_gsc
+from gw2tp.snapshot import PriceSnapshot
+
+
+def legacy_dicts(
+    listings: dict[int, tuple[int, int, int, int]],
+) -> dict[int, dict[str, Any]]:
+    data = {}
+    for item_id, (buy, sell, _, _) in listings.items():
+        flip = int(round(sell * TAX_RATE, 6) - buy)
+        buy_g, buy_s, buy_c = copper_to_gsc(buy)
+        sell_g, sell_s, sell_c = copper_to_gsc(sell)
+        flip_g, flip_s, flip_c = copper_to_gsc(flip)
+        data[item_id] = {
+            "buy": buy,
+            "sell": sell,
+            "buy_g": buy_g,
+            "buy_s": buy_s,
+            "buy_c": buy_c,
+            "sell_g": sell_g,
+            "sell_s": sell_s,
+            "sell_c": sell_c,
+            "flip_g": flip_g,
+            "flip_s": flip_s,
+            "flip_c": flip_c,
+            "sell_after_tax_g": int(sell * TAX_RATE // 10_000),
+            "sell_after_tax_s": int((sell * TAX_RATE % 10_000) // 100),
+            "sell_after_tax_c": int(sell * TAX_RATE % 100),
+        }
+    return data
+
+
+def _read_dicts(
+    listings: dict[int, tuple[int, int, int, int]],
+) -> object:
+    data = legacy_dicts(listings)
+    for item_id in listings:
+        _ = data[item_id]["buy"], data[item_id]["sell"]
+    return data
+
+
+def _read_rows(
+    listings: dict[int, tuple[int, int, int, int]],
+) -> object:
+    table = PriceSnapshot.from_listings(listings)
+    for item_id in listings:
+        row = table[item_id]
+        _ = row.buy, row.sell
+    return table
+
+
+def _read_columns(
+    listings: dict[int, tuple[int, int, int, int]],
+) -> object:
+    table = PriceSnapshot.from_listings(listings)
+    _ = table.buy, table.sell, table.gsc("flip")
+    return table
+
+
+def _retained_kib(
+    build: Callable[[], object],
+) -> float:
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size / 1_024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Per-item price dicts against an array-backed table",
+    )
+    parser.add_argument("--items", type=int, nargs="*", default=[12, 30_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'items':>8}{'layout':>9}{'build ms':>12}{'KiB':>12}")
+    for items in args.items:
+        item_ids = rng.choice(100_000, size=items, replace=False).tolist()
+        prices = rng.integers(1, 5_000_000, size=(items, 4)).tolist()
+        listings = {
+            item_id: tuple(price)
+            for item_id, price in zip(item_ids, prices)
+        }
+        number = max(10_000 // items, 1)
+        for layout, build in (
+            ("dicts", _read_dicts),
+            ("rows", _read_rows),
+            ("columns", _read_columns),
+        ):
+            seconds = min(
+                timeit.repeat(
+                    lambda b=build: b(listings),
+                    number=number,
+                    repeat=args.repeat,
+                )
+            )
+            kib = _retained_kib(lambda b=build: b(listings))
+            print(
+                f"{items:>8}{layout:>9}{seconds / number * 1e3:>12.3f}"
+                f"{kib:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
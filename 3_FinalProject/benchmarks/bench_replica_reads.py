@@ -0,0 +1,238 @@
+"""History reads under ingestion load, per read preference:
+
+    docker compose -f benchmarks/replica-set.yml up -d
+    python -m benchmarks.bench_replica_reads \\
+        --mongo-uri "mongodb://localhost:27017/?replicaSet=rs0"
+
+Writers keep upserting snapshots into the queried window, far faster than
+the scheduler does, while readers run the `/history` query. The run is
+repeated for each read preference; the reads every member served show
+where the load went.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import statistics
+import threading
+import time
+from typing import Any
+
+from pymongo import MongoClient
+from pymongo.database import Database
+from pymongo.errors import PyMongoError
+
+from gw2tp.db_schema import SNAPSHOT_TIMEZONE
+from gw2tp.db_schema import ensure_snapshot_indexes
+from gw2tp.db_schema import get_db_data
+from gw2tp.db_schema import upsert_snapshots
+
+from backend.db import HISTORY_MAX_STALENESS_SECONDS
+from backend.db import read_preference
+
+
+COLLECTION = "scholar_rune"
+
+
+def _snapshot(
+    bucket: int,
+    i: int,
+) -> dict[str, Any]:
+    return {
+        "bucket": bucket,
+        "timestamp": datetime.datetime.fromtimestamp(
+            bucket,
+            tz=SNAPSHOT_TIMEZONE,
+        ).isoformat(),
+        "crafting_cost_g": 1,
+        "crafting_cost_s": 20 + i % 30,
+        "crafting_cost_c": i % 100,
+        "sell_g": 1,
+        "sell_s": 40 + i % 30,
+        "sell_c": i % 100,
+    }
+
+
+def seed_history(
+    db: Database,
+    points: int,
+    spacing_seconds: int,
+) -> list[int]:
+    now = int(time.time())
+    buckets = [
+        now - now % spacing_seconds - i * spacing_seconds
+        for i in range(points)
+    ]
+    db[COLLECTION].delete_many({})
+    ensure_snapshot_indexes(db)
+    db[COLLECTION].insert_many(
+        [_snapshot(bucket, i) for i, bucket in enumerate(buckets)]
+    )
+    return buckets
+
+
+def _member_reads(
+    client: MongoClient,
+) -> dict[str, int]:
+    reads = {}
+    for host, port in sorted(client.nodes):
+        with MongoClient(host, port, directConnection=True) as member:
+            counters = member.admin.command("serverStatus")["opcounters"]
+            reads[f"{host}:{port}"] = counters["query"] + counters["getmore"]
+    return reads
+
+
+def _summarize(
+    latencies: list[float],
+    errors: int,
+    seconds: float,
+) -> dict[str, float]:
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else []
+    return {
+        "ops_per_s": len(latencies) / seconds,
+        "errors": errors,
+        "p50_ms": cuts[49] * 1e3 if cuts else 0.0,
+        "p95_ms": cuts[94] * 1e3 if cuts else 0.0,
+        "p99_ms": cuts[98] * 1e3 if cuts else 0.0,
+    }
+
+
+def run_load(
+    client: MongoClient,
+    db_name: str,
+    mode: str,
+    buckets: list[int],
+    args: argparse.Namespace,
+) -> dict[str, Any]:
+    write_db = client[db_name]
+    read_db = client.get_database(
+        db_name,
+        read_preference=read_preference(mode, args.max_staleness),
+    )
+    stop = threading.Event()
+    lock = threading.Lock()
+    read_latencies: list[float] = []
+    write_latencies: list[float] = []
+    errors = {"read": 0, "write": 0}
+
+    def _read() -> None:
+        while not stop.is_set():
+            end = datetime.datetime.now(tz=SNAPSHOT_TIMEZONE)
+            start = time.perf_counter()
+            try:
+                get_db_data(
+                    read_db,
+                    COLLECTION,
+                    start_datetime=end - datetime.timedelta(hours=24),
+                    end_datetime=end,
+                )
+            except PyMongoError:
+                with lock:
+                    errors["read"] += 1
+                continue
+            with lock:
+                read_latencies.append(time.perf_counter() - start)
+
+    def _write(offset: int) -> None:
+        # Rewrites buckets of the read window, so its size stays constant
+        i = offset
+        while not stop.is_set():
+            docs = [
+                _snapshot(buckets[(i + j) % len(buckets)], i + j)
+                for j in range(args.write_batch)
+            ]
+            i += args.write_batch * args.writers
+            start = time.perf_counter()
+            try:
+                upsert_snapshots(write_db, COLLECTION, docs)
+            except PyMongoError:
+                with lock:
+                    errors["write"] += 1
+                continue
+            with lock:
+                write_latencies.append(time.perf_counter() - start)
+
+    reads_before = _member_reads(client)
+    threads = [
+        threading.Thread(target=_read, daemon=True)
+        for _ in range(args.readers)
+    ] + [
+        threading.Thread(
+            target=_write,
+            args=(n * args.write_batch,),
+            daemon=True,
+        )
+        for n in range(args.writers)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - started
+    reads_after = _member_reads(client)
+    return {
+        "reads": _summarize(read_latencies, errors["read"], seconds),
+        "writes": _summarize(write_latencies, errors["write"], seconds),
+        "member_reads": {
+            member: reads_after[member] - reads_before.get(member, 0)
+            for member in reads_after
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="History reads against a replica set under write load",
+    )
+    parser.add_argument("--mongo-uri", required=True)
+    parser.add_argument(
+        "--read-preferences",
+        nargs="*",
+        default=["primary", "secondaryPreferred"],
+    )
+    parser.add_argument(
+        "--max-staleness",
+        type=int,
+        default=HISTORY_MAX_STALENESS_SECONDS,
+    )
+    parser.add_argument("--seconds", type=float, default=15.0)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--write-batch", type=int, default=20)
+    parser.add_argument("--history-points", type=int, default=2_000)
+    parser.add_argument("--spacing-seconds", type=int, default=60)
+    args = parser.parse_args()
+
+    db_name = "gw2tp_bench"
+    with MongoClient(args.mongo_uri) as client:
+        buckets = seed_history(
+            client[db_name],
+            points=args.history_points,
+            spacing_seconds=args.spacing_seconds,
+        )
+        print(
+            f"{'mode':<20}{'kind':<8}{'ops/s':>10}{'p50 ms':>10}"
+            f"{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}"
+        )
+        for mode in args.read_preferences:
+            result = run_load(client, db_name, mode, buckets, args)
+            for kind in ("reads", "writes"):
+                stats = result[kind]
+                print(
+                    f"{mode:<20}{kind:<8}{stats['ops_per_s']:>10.1f}"
+                    f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}"
+                    f"{stats['p99_ms']:>10.1f}{stats['errors']:>8}"
+                )
+            served = ", ".join(
+                f"{member} {count}"
+                for member, count in result["member_reads"].items()
+            )
+            print(f"{'':<20}served  {served}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import timeit
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from gw2tp.constants import API
+from gw2tp.helper import copper_to_gsc
+
+from backend.responses import ORJSONResponse
+
+
+def _gsc_fields(
+    name: str,
+    copper: float,
+) -> dict[str, Any]:
+    g, s, c = copper_to_gsc(copper)
+    return {f"{name}_g": g, f"{name}_s": s, f"{name}_c": c}
+
+
+def dashboard_payload() -> dict[str, Any]:
+    # One calculator result per dashboard table, as fetched by the frontend
+    fields = ["crafting_cost", "sell", "flip", "profit"]
+    return {
+        command: {
+            key: value
+            for i, field in enumerate(fields)
+            for key, value in _gsc_fields(field, 12_345 * (i + 1)).items()
+        }
+        for command in sorted(API.COMMANDS_LIST)
+    }
+
+
+def history_payload(
+    points: int = 24 * 4,
+) -> list[dict[str, Any]]:
+    # 24 hours of 15-minute snapshots as returned by /history
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    return [
+        {
+            **_gsc_fields("crafting_cost", 12_000 + i),
+            **_gsc_fields("sell", 15_000 + i),
+            "timestamp": (now - datetime.timedelta(minutes=15 * i)).isoformat(),
+        }
+        for i in range(points)
+    ]
+
+
+def _render_stdlib(
+    content: Any,
+) -> bytes:
+    return JSONResponse(content=jsonable_encoder(content)).body
+
+
+def _render_orjson(
+    content: Any,
+) -> bytes:
+    return ORJSONResponse(content=content).body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serialization benchmark")
+    parser.add_argument("--number", type=int, default=2_000)
+    parser.add_argument("--history-points", type=int, default=24 * 4)
+    args = parser.parse_args()
+
+    payloads = {
+        "dashboard": dashboard_payload(),
+        "history_24h": history_payload(args.history_points),
+    }
+    results: dict[str, dict[str, float]] = {}
+    for name, payload in payloads.items():
+        assert json.loads(_render_stdlib(payload)) == json.loads(  # noqa: S101
+            _render_orjson(payload)
+        )
+        results[name] = {
+            renderer.__name__.removeprefix("_render_"): min(
+                timeit.repeat(
+                    lambda r=renderer, p=payload: r(p),
+                    number=args.number,
+                    repeat=5,
+                )
+            )
+            / args.number
+            * 1e6
+            for renderer in (_render_stdlib, _render_orjson)
+        }
+
+    print(f"{'payload':<16}{'stdlib us':>14}{'orjson us':>14}{'speedup':>10}")
+    for name, timings in results.items():
+        speedup = timings["stdlib"] / timings["orjson"]
+        print(
+            f"{name:<16}{timings['stdlib']:>14.1f}"
+            f"{timings['orjson']:>14.1f}{speedup:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
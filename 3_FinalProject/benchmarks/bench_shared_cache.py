@@ -0,0 +1,119 @@
+"""Upstream price requests per snapshot version as replicas are added:
+
+    python -m benchmarks.bench_shared_cache --replicas 1 2 4 8
+    python -m benchmarks.bench_shared_cache --redis-url redis://localhost:6379/0
+
+Every replica is a SnapshotCache with its own L1, and all of them share one
+backend: the in-memory fake by default, or Redis. Replicas serve their
+requests concurrently, so the fill locks are exercised at every version
+change. Without a shared tier ("l1") the requests grow with the replicas.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import threading
+import time
+import uuid
+
+import orjson
+
+from backend.shared_cache import MemoryBackend
+from backend.shared_cache import RedisBackend
+from backend.shared_cache import SnapshotCache
+
+
+SNAPSHOT_SECONDS = 300
+# A calculator's worth of items
+ITEM_KEYS = [str(item_id) for item_id in range(19_700, 19_712)]
+
+
+def run(
+    replicas: int,
+    shared: bool,
+    args: argparse.Namespace,
+) -> dict[str, float]:
+    clock = [0.0]
+    # Fresh keys per run, a Redis still holds the previous run's
+    namespace = f"bench-{uuid.uuid4().hex}"
+    backend = None
+    if shared:
+        backend = (
+            RedisBackend(args.redis_url)
+            if args.redis_url
+            else MemoryBackend(now=lambda: clock[0])
+        )
+    caches = [
+        SnapshotCache(
+            backend,
+            snapshot_seconds=SNAPSHOT_SECONDS,
+            now=lambda: clock[0],
+        )
+        for _ in range(replicas)
+    ]
+    lock = threading.Lock()
+    upstream = [0]
+    latencies: list[float] = []
+
+    def _fetch(
+        keys: list[str],
+    ) -> dict[str, bytes]:
+        with lock:
+            upstream[0] += 1
+        time.sleep(args.upstream_ms / 1_000)
+        return {key: orjson.dumps([1_000, 1_200]) for key in keys}
+
+    def _serve(
+        cache: SnapshotCache,
+    ) -> None:
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            cache.get_or_fill(namespace, ITEM_KEYS, _fetch)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    for version in range(args.versions):
+        clock[0] = version * SNAPSHOT_SECONDS
+        threads = [
+            threading.Thread(target=_serve, args=(cache,)) for cache in caches
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return {
+        "upstream_per_version": upstream[0] / args.versions,
+        "p50_ms": statistics.median(latencies) * 1e3,
+        "max_ms": max(latencies) * 1e3,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Upstream requests of replicas sharing a price cache",
+    )
+    parser.add_argument("--replicas", type=int, nargs="*", default=[1, 2, 4, 8])
+    parser.add_argument("--versions", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--upstream-ms", type=float, default=50.0)
+    parser.add_argument("--redis-url", default="")
+    args = parser.parse_args()
+
+    print(
+        f"{'replicas':>8}{'tier':>8}{'upstream/ver':>14}{'p50 ms':>10}"
+        f"{'max ms':>10}"
+    )
+    for replicas in args.replicas:
+        for shared in (False, True):
+            stats = run(replicas, shared, args)
+            tier = "shared" if shared else "l1"
+            print(
+                f"{replicas:>8}{tier:>8}"
+                f"{stats['upstream_per_version']:>14.1f}"
+                f"{stats['p50_ms']:>10.2f}{stats['max_ms']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
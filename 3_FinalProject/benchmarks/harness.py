@@ -0,0 +1,392 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+
+import httpx
+import uvicorn
+
+from gw2tp import catalogue as gw2tp_catalogue
+from gw2tp.constants import API
+from gw2tp.constants import ItemIDs
+from gw2tp.db_schema import COLLECTIONS
+
+from .stub_api import create_stub_app
+
+
+FILE_DIR = Path(__file__).parent
+RESULTS_DIR = FILE_DIR / "results"
+STUB_PORT = 18_100
+BACKEND_PORT = 18_000
+
+# Endpoints that never finish a response
+STREAMING_PATHS = {"/alerts/stream"}
+REQUIRED_PARAMS: dict[str, dict[str, Any]] = {
+    "/history": {"item_name": "scholar_rune"},
+    "/price": {"item_id": ItemIDs.ECTOPLASM},
+    "/item": {"item_id": ItemIDs.MITHRIL_INGOT},
+    "/search": {"q": "superior ru"},
+    "/backtest": {"item_name": "scholar_rune", "min_profit": 1_000},
+    "/forecast": {"item_name": "scholar_rune"},
+    "/depth": {"item_id": ItemIDs.ECTOPLASM, "quantity": 250},
+}
+
+
+def _rss_bytes() -> int:
+    statm = Path("/proc/self/statm")
+    if statm.exists():
+        pages = int(statm.read_text(encoding="utf-8").split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _percentile(
+    values: list[float],
+    percent: float,
+) -> float:
+    if len(values) == 0:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(percent / 100.0 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def _summarize(
+    latencies: list[float],
+    errors: int,
+    wall_time: float,
+) -> dict[str, Any]:
+    completed = len(latencies)
+    return {
+        "requests": completed + errors,
+        "errors": errors,
+        "throughput_rps": completed / wall_time if wall_time > 0 else 0.0,
+        "p50_ms": _percentile(latencies, 50) * 1_000.0,
+        "p95_ms": _percentile(latencies, 95) * 1_000.0,
+        "p99_ms": _percentile(latencies, 99) * 1_000.0,
+        "rss_mb": _rss_bytes() / 2**20,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=FILE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _serve_in_thread(
+    server: uvicorn.Server,
+    setup: Callable[[], Awaitable[None]] | None = None,
+) -> threading.Thread:
+    async def _run() -> None:
+        if setup is not None:
+            await setup()
+        await server.serve()
+
+    thread = threading.Thread(target=asyncio.run, args=(_run(),), daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return thread
+
+
+def _get_mongo_db(
+    mongo_uri: str | None,
+) -> Any:
+    if mongo_uri:
+        from pymongo import MongoClient  # noqa: PLC0415
+
+        return MongoClient(mongo_uri)["gw2tp_bench"]
+    import mongomock  # noqa: PLC0415
+
+    return mongomock.MongoClient()["gw2tp_bench"]
+
+
+def _seed_history(
+    db: Any,
+    points: int,
+) -> None:
+    now = datetime.datetime.now(
+        tz=datetime.timezone(datetime.timedelta(hours=2), "UTC")
+    )
+    for collection_name in COLLECTIONS:
+        db[collection_name].delete_many({})
+        db[collection_name].insert_many(
+            [
+                {
+                    "crafting_cost_g": 1,
+                    "crafting_cost_s": 20 + i % 30,
+                    "crafting_cost_c": i % 100,
+                    "sell_g": 1,
+                    "sell_s": 40 + i % 30,
+                    "sell_c": i % 100,
+                    "timestamp": (
+                        now - datetime.timedelta(minutes=15 * i)
+                    ).isoformat(),
+                }
+                for i in range(points)
+            ]
+        )
+
+
+def start_servers(
+    args: argparse.Namespace,
+) -> tuple[Any, str]:
+    stub_app = create_stub_app(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+        market_size=args.market_size,
+    )
+    stub_server = uvicorn.Server(
+        uvicorn.Config(stub_app, port=STUB_PORT, log_level="warning")
+    )
+    _serve_in_thread(stub_server)
+    API.GW2_COMMERCE_API_URL = (
+        f"http://127.0.0.1:{STUB_PORT}/v2/commerce/prices"
+    )
+    API.GW2_COMMERCE_LISTINGS_URL = (
+        f"http://127.0.0.1:{STUB_PORT}/v2/commerce/listings"
+    )
+    API.GW2_ITEMS_API_URL = f"http://127.0.0.1:{STUB_PORT}/v2/items"
+    API.GW2_RECIPES_API_URL = f"http://127.0.0.1:{STUB_PORT}/v2/recipes"
+    # Keep the benchmark catalogue away from a real one in the working dir
+    gw2tp_catalogue.CATALOGUE_PATH = str(
+        Path(tempfile.mkdtemp()) / "catalogue.sqlite3"
+    )
+
+    db = _get_mongo_db(args.mongo_uri)
+    _seed_history(db, points=args.history_points)
+    backend_url = f"http://127.0.0.1:{BACKEND_PORT}/api/"
+    backend_config = uvicorn.Config(
+        "backend.api:app",
+        port=BACKEND_PORT,
+        log_level="warning",
+        # No lifespan: the scheduler it starts would skew the numbers, the
+        # benchmark runs the jobs itself
+        lifespan="off",
+    )
+    backend_server = uvicorn.Server(backend_config)
+
+    async def _setup_backend() -> None:
+        import backend.api  # noqa: PLC0415
+        import backend.scheduler  # noqa: PLC0415
+        from backend import catalogue_sync  # noqa: PLC0415
+        from backend.db import with_history_reads  # noqa: PLC0415
+
+        dumps = await catalogue_sync.fetch_catalogue_dumps()
+        backend.api.catalogue.sync(*dumps)
+        # Done by the lifespan otherwise
+        backend.api.refresh_search_index()
+        backend.api.db = db
+        backend.api.history_db = with_history_reads(db)
+        backend.api.api_base = backend_url
+        backend.scheduler.db = db
+        backend.scheduler.api_base = backend_url
+
+    _serve_in_thread(backend_server, setup=_setup_backend)
+    return db, backend_url
+
+
+def endpoint_scenarios() -> dict[str, dict[str, Any]]:
+    from fastapi.routing import APIRoute  # noqa: PLC0415
+
+    from backend.api import fastapi_app  # noqa: PLC0415
+
+    scenarios: dict[str, dict[str, Any]] = {}
+    for route in fastapi_app.routes:
+        if not isinstance(route, APIRoute) or "GET" not in route.methods:
+            continue
+        if route.path in STREAMING_PATHS:
+            continue
+        required = [
+            param
+            for param in route.dependant.query_params
+            if param.field_info.is_required()
+        ]
+        if route.path in REQUIRED_PARAMS:
+            scenarios[route.path] = REQUIRED_PARAMS[route.path]
+        elif len(required) == 0:
+            scenarios[route.path] = {}
+        else:
+            print(f"Skipping {route.path}: unknown required parameters.")
+    return scenarios
+
+
+async def run_endpoint_scenario(
+    client: httpx.AsyncClient,
+    path: str,
+    params: dict[str, Any],
+    requests: int,
+    concurrency: int,
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    errors = 0
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(i)
+
+    async def _worker() -> None:
+        nonlocal errors
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                response = await client.get(path.lstrip("/"), params=params)
+                ok = response.status_code < 400  # noqa: PLR2004
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_worker() for _ in range(concurrency)))
+    return _summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def run_job_scenario(
+    job: Callable[[], Awaitable[None]],
+    cycles: int,
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    errors = 0
+    start = time.perf_counter()
+    for _ in range(cycles):
+        cycle_start = time.perf_counter()
+        try:
+            await job()
+        except Exception:  # noqa: BLE001
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - cycle_start)
+    return _summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def run_benchmarks(
+    args: argparse.Namespace,
+) -> dict[str, Any]:
+    from backend.flip_scanner import scan_market  # noqa: PLC0415
+    from backend.scheduler import fetch_api_data  # noqa: PLC0415
+
+    _, backend_url = start_servers(args)
+    results: dict[str, Any] = {}
+    # Jobs run first so that endpoints reading their output have data
+    for job in (fetch_api_data, scan_market):
+        if args.only and job.__name__ not in args.only:
+            continue
+        print(f"Benchmarking {job.__name__}...")
+        results[job.__name__] = await run_job_scenario(
+            job,
+            cycles=args.ingest_cycles,
+        )
+    if "scan_market" not in results:
+        await scan_market()
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=backend_url,
+        limits=limits,
+        timeout=30.0,
+    ) as client:
+        for path, params in endpoint_scenarios().items():
+            if args.only and path.lstrip("/") not in args.only:
+                continue
+            print(f"Benchmarking {path}...")
+            results[path] = await run_endpoint_scenario(
+                client,
+                path,
+                params,
+                requests=args.requests,
+                concurrency=args.concurrency,
+            )
+    return results
+
+
+def compare_results(
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+) -> None:
+    print(f"{'scenario':<32}{'p50 ms':>18}{'p95 ms':>18}{'rps':>18}")
+    for name, stats in current["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+        cols = [
+            f"{base[key]:.1f}->{stats[key]:.1f}"
+            for key in ("p50_ms", "p95_ms", "throughput_rps")
+        ]
+        print(f"{name:<32}{cols[0]:>18}{cols[1]:>18}{cols[2]:>18}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="GW2TP benchmark harness")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--ingest-cycles", type=int, default=5)
+    parser.add_argument("--history-points", type=int, default=96)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--market-size", type=int, default=30_000)
+    parser.add_argument("--mongo-uri", default=None)
+    parser.add_argument("--only", nargs="*", default=[])
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--compare", type=Path, default=None)
+    args = parser.parse_args()
+
+    scenarios = asyncio.run(run_benchmarks(args))
+    commit = _git_commit()
+    timestamp = datetime.datetime.now(tz=datetime.timezone.utc)
+    result = {
+        "commit": commit,
+        "timestamp": timestamp.isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in {"output", "compare"}
+        },
+        "scenarios": scenarios,
+    }
+
+    output = args.output or (
+        RESULTS_DIR / f"{timestamp.strftime('%Y%m%dT%H%M%S')}_{commit}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=4), encoding="utf-8")
+    print(f"Results written to {output}")
+
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        compare_results(result, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import asyncio
+import random
+from typing import Any
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from gw2tp.catalogue import load_fixture
+from gw2tp.constants import ItemIDs
+
+
+KNOWN_ITEM_IDS = {
+    value for key, value in vars(ItemIDs).items() if not key.startswith("_")
+}
+
+
+STUB_BOOK_LEVELS = 10
+_NAME_PREFIXES = (
+    "Superior",
+    "Major",
+    "Minor",
+    "Exotic",
+    "Ascended",
+    "Mystic",
+    "Ancient",
+    "Pristine",
+)
+_NAME_MATERIALS = (
+    "Mithril",
+    "Orichalcum",
+    "Elder Wood",
+    "Gossamer",
+    "Silk",
+    "Leather",
+    "Crystal",
+    "Obsidian",
+    "Ectoplasm",
+    "Lodestone",
+)
+_NAME_NOUNS = (
+    "Rune",
+    "Sigil",
+    "Ingot",
+    "Plank",
+    "Bolt",
+    "Inscription",
+    "Insignia",
+    "Totem",
+    "Shard",
+    "Core",
+    "Greatsword",
+    "Staff",
+)
+
+
+def stub_price(
+    item_id: int,
+) -> tuple[int, int]:
+    buy = (item_id * 7_919) % 50_000 + 100
+    sell = int(buy * (1.0 + (item_id * 13) % 60 / 100.0)) + 1
+    return buy, sell
+
+
+def stub_quantity(
+    item_id: int,
+) -> tuple[int, int]:
+    return (item_id * 31) % 5_000 + 1, (item_id * 17) % 8_000 + 1
+
+
+def stub_listings(
+    item_id: int,
+    levels: int = STUB_BOOK_LEVELS,
+) -> dict[str, Any]:
+    buy, sell = stub_price(item_id)
+    buy_quantity, sell_quantity = stub_quantity(item_id)
+    step = max(1, sell // 200)
+
+    def _side(
+        best: int,
+        quantity: int,
+        direction: int,
+    ) -> list[dict[str, int]]:
+        side = []
+        for level in range(levels):
+            unit_price = best + direction * level * step
+            if unit_price <= 0:
+                break
+            # Deeper levels hold more stock, like the real trading post
+            level_quantity = quantity * (level + 1) // levels + 1
+            side.append(
+                {
+                    "listings": level + 1,
+                    "unit_price": unit_price,
+                    "quantity": level_quantity,
+                }
+            )
+        return side
+
+    return {
+        "id": item_id,
+        "buys": _side(buy, buy_quantity, -1),
+        "sells": _side(sell, sell_quantity, 1),
+    }
+
+
+def stub_item(
+    item_id: int,
+) -> dict[str, Any]:
+    prefix = _NAME_PREFIXES[item_id % len(_NAME_PREFIXES)]
+    material = _NAME_MATERIALS[(item_id // 7) % len(_NAME_MATERIALS)]
+    noun = _NAME_NOUNS[(item_id // 71) % len(_NAME_NOUNS)]
+    return {
+        "id": item_id,
+        "name": f"{prefix} {material} {noun} {item_id}",
+        "icon": None,
+        "type": "CraftingMaterial",
+        "rarity": "Fine",
+        "level": 0,
+        "vendor_value": item_id % 100,
+    }
+
+
+def stub_recipe(
+    recipe_id: int,
+) -> dict[str, Any]:
+    return {
+        "id": recipe_id,
+        "type": "Refinement",
+        "output_item_id": recipe_id,
+        "output_item_count": 1,
+        "min_rating": 400,
+        "disciplines": ["Artificer"],
+        "ingredients": [
+            {"type": "Item", "id": recipe_id + 1, "count": 1 + recipe_id % 5},
+        ],
+    }
+
+
+def create_stub_app(
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    failure_rate: float = 0.0,
+    seed: int = 0,
+    market_size: int = 30_000,
+) -> Starlette:
+    rng = random.Random(seed)
+    market_ids = sorted(
+        {*range(1, market_size + 1), *KNOWN_ITEM_IDS},
+    )
+
+    async def _simulate_upstream() -> JSONResponse | None:
+        delay = latency_ms + rng.uniform(0.0, jitter_ms)
+        if delay > 0.0:
+            await asyncio.sleep(delay / 1_000.0)
+        if rng.random() < failure_rate:
+            return JSONResponse(
+                content={"text": "ErrTimeout"},
+                status_code=503,
+            )
+        return None
+
+    async def commerce_prices(
+        request: Request,
+    ) -> JSONResponse:
+        error = await _simulate_upstream()
+        if error is not None:
+            return error
+        if "ids" not in request.query_params:
+            return JSONResponse(content=market_ids)
+        ids = request.query_params["ids"]
+        item_ids = [int(i) for i in ids.split(",") if i]
+        if len(item_ids) == 0:
+            return JSONResponse(
+                content={"text": "all ids provided are invalid"},
+                status_code=404,
+            )
+        data = []
+        for item_id in item_ids:
+            buy, sell = stub_price(item_id)
+            buy_quantity, sell_quantity = stub_quantity(item_id)
+            data.append(
+                {
+                    "id": item_id,
+                    "whitelisted": False,
+                    "buys": {"quantity": buy_quantity, "unit_price": buy},
+                    "sells": {"quantity": sell_quantity, "unit_price": sell},
+                }
+            )
+        return JSONResponse(content=data)
+
+    async def commerce_listings(
+        request: Request,
+    ) -> JSONResponse:
+        error = await _simulate_upstream()
+        if error is not None:
+            return error
+        if "ids" not in request.query_params:
+            return JSONResponse(content=market_ids)
+        ids = request.query_params["ids"]
+        item_ids = [int(i) for i in ids.split(",") if i]
+        if len(item_ids) == 0:
+            return JSONResponse(
+                content={"text": "all ids provided are invalid"},
+                status_code=404,
+            )
+        return JSONResponse(content=[stub_listings(i) for i in item_ids])
+
+    fixture_items = {item["id"]: item for item in load_fixture("items")}
+    # One recipe for every tenth item keeps the dump realistic in size
+    recipe_ids = market_ids[::10]
+
+    def _paginate(
+        request: Request,
+        entries: list[int],
+        to_json: Any,
+    ) -> JSONResponse:
+        page = int(request.query_params.get("page", 0))
+        page_size = int(request.query_params.get("page_size", 50))
+        page_total = (len(entries) + page_size - 1) // page_size
+        chunk = entries[page * page_size : (page + 1) * page_size]
+        return JSONResponse(
+            content=[to_json(i) for i in chunk],
+            headers={"X-Page-Total": str(page_total)},
+        )
+
+    async def items(
+        request: Request,
+    ) -> JSONResponse:
+        error = await _simulate_upstream()
+        if error is not None:
+            return error
+        return _paginate(
+            request,
+            market_ids,
+            lambda i: fixture_items.get(i) or stub_item(i),
+        )
+
+    async def recipes(
+        request: Request,
+    ) -> JSONResponse:
+        error = await _simulate_upstream()
+        if error is not None:
+            return error
+        return _paginate(request, recipe_ids, stub_recipe)
+
+    return Starlette(
+        routes=[
+            Route("/v2/items", items),
+            Route("/v2/recipes", recipes),
+            Route("/v2/commerce/prices", commerce_prices),
+            Route("/v2/commerce/listings", commerce_listings),
+        ],
+    )
@@ -1,19 +1,24 @@
 from __future__ import annotations
 
+import functools
 import os
 from pathlib import Path
+from typing import Any
 from urllib.parse import urljoin
 
-import requests
 from flask import Flask
+from flask import Response
 from flask import render_template_string
+from flask import request
 from starlette.applications import Starlette
 from starlette.middleware.wsgi import WSGIMiddleware
 from starlette.routing import Mount
 
+from gw2tp.compression import compression_middleware
+from gw2tp.compression import negotiate_encoding
+from gw2tp.compression import precompress
 from gw2tp.helper import host_url
 
-from frontend.html_template import HTML_PAGE
 from frontend.plotting import get_date_plot
 
 
@@ -21,25 +26,75 @@ api_base = host_url()
 api_base = os.environ.get("BACKEND_URL", api_base)
 flask_app = Flask(__name__)
 FILE_DIR = Path(__file__).parent
+# api url -> (etag, json data) for conditional requests against the backend
+_history_cache: dict[str, tuple[str, Any]] = {}
+
+
+@functools.cache
+def _index_encodings() -> dict[str, bytes]:
+    # The page is a large f-string, built on the first request instead of
+    # on import
+    from frontend.html_template import HTML_PAGE  # noqa: PLC0415
+
+    return precompress(render_template_string(HTML_PAGE).encode("utf-8"))
 
 
 @flask_app.route("/")
-def index() -> str:
-    return render_template_string(HTML_PAGE)
+def index() -> Response:
+    encodings = _index_encodings()
+    encoding = negotiate_encoding(
+        request.headers.get("Accept-Encoding", ""),
+        encodings,
+    )
+    response = Response(encodings[encoding], mimetype="text/html")
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
+def _get_overlay(
+    path: str,
+) -> dict[str, Any]:
+    # Forecasts and anomalies are optional extras, the plot works without them
+    import requests  # noqa: PLC0415
+
+    try:
+        response = requests.get(urljoin(api_base, path), timeout=10.0)
+    except requests.RequestException:
+        return {}
+    if response.status_code != 200:
+        return {}
+    return response.json()
 
 
 def history_base(
     item_name: str,
     full_name: str,
 ) -> str:
+    import requests  # noqa: PLC0415
+
     print(os.environ)
     api_url = urljoin(api_base, f"/api/history?item_name={item_name}")
-    response = requests.get(api_url, timeout=10.0)
-    if response.status_code != 200:
+    cached = _history_cache.get(api_url)
+    headers = {"If-None-Match": cached[0]} if cached is not None else {}
+    response = requests.get(api_url, headers=headers, timeout=10.0)
+    if response.status_code == 304 and cached is not None:
+        data = cached[1]
+    elif response.status_code != 200:
         return f"Error fetching data: {response.text}"
-
-    data = response.json()
-    plot = get_date_plot(data=data)
+    else:
+        data = response.json()
+        if "ETag" in response.headers:
+            _history_cache[api_url] = (response.headers["ETag"], data)
+
+    forecast = _get_overlay(f"/api/forecast?item_name={item_name}")
+    anomalies = _get_overlay(f"/api/anomalies?item_name={item_name}")
+    plot = get_date_plot(
+        data=data,
+        forecast=forecast.get("forecast", []),
+        anomalies=anomalies.get("anomalies", []),
+    )
     content = (FILE_DIR / "./templates/plot.html").read_text(encoding="utf-8")
     style = (FILE_DIR / "./static/style.css").read_text(encoding="utf-8")
     return render_template_string(
@@ -85,4 +140,5 @@ app = Starlette(
     routes=[
         Mount("/", app=WSGIMiddleware(flask_app)),
     ],
+    middleware=[compression_middleware()],
 )
@@ -1,12 +1,12 @@
+from __future__ import annotations
+
 from datetime import datetime
+from typing import TYPE_CHECKING
 from typing import Sequence
 
-import matplotlib as mpl
-import plotly.graph_objs as go
-from plotly.offline import plot
-
 
-mpl.use("Agg")
+if TYPE_CHECKING:
+    import plotly.graph_objs as go
 
 
 def _get_plot_data(
@@ -30,13 +30,68 @@ def _get_plot_data(
     return timestamps, sell_price, crafting_price
 
 
+def _get_forecast_traces(
+    timestamps: list[str],
+    sell_price: list[float],
+    crafting_price: list[float],
+    forecast: Sequence[dict],
+) -> list[go.Scatter]:
+    import plotly.graph_objs as go  # noqa: PLC0415
+
+    # Start the dotted lines at the last snapshot so they join the history
+    f_timestamps, f_sell, f_crafting = _get_plot_data(forecast)
+    return [
+        go.Scatter(
+            x=[timestamps[-1], *f_timestamps],
+            y=[sell_price[-1], *f_sell],
+            mode="lines",
+            name="Sell Forecast",
+            line={"dash": "dot", "color": "orange"},
+        ),
+        go.Scatter(
+            x=[timestamps[-1], *f_timestamps],
+            y=[crafting_price[-1], *f_crafting],
+            mode="lines",
+            name="Crafting Forecast",
+            line={"dash": "dot", "color": "cyan"},
+        ),
+    ]
+
+
+def _get_anomaly_trace(
+    anomalies: Sequence[dict],
+) -> go.Scatter:
+    import plotly.graph_objs as go  # noqa: PLC0415
+
+    return go.Scatter(
+        x=[
+            datetime.fromisoformat(e["timestamp"]).strftime("%d %b %H:%M")
+            for e in anomalies
+        ],
+        y=[
+            e["value_g"] + e["value_s"] / 100 + e["value_c"] / 10_000
+            for e in anomalies
+        ],
+        mode="markers",
+        name="Anomaly",
+        text=[f"{e['field']} z = {e['z_score']:.1f}" for e in anomalies],
+        marker={"symbol": "x", "size": 12, "color": "red"},
+    )
+
+
 def get_date_plot(
     data: Sequence[dict],
     *,
     plot_mean: bool = False,
+    forecast: Sequence[dict] = (),
+    anomalies: Sequence[dict] = (),
 ) -> str:
     if len(data) == 0:
         return ""
+    # plotly is the bulk of the frontend's import time, only load it when
+    # the first plot is drawn
+    import plotly.graph_objs as go  # noqa: PLC0415
+    from plotly.offline import plot  # noqa: PLC0415
 
     timestamps, sell_price, crafting_price = _get_plot_data(data)
 
@@ -78,6 +133,20 @@ def get_date_plot(
             )
         )
 
+    if len(forecast) > 0:
+        traces.extend(
+            _get_forecast_traces(
+                timestamps,
+                sell_price,
+                crafting_price,
+                forecast,
+            )
+        )
+    # Only anomalies inside the plotted window
+    anomalies = [e for e in anomalies if e["timestamp"] >= data[0]["timestamp"]]
+    if len(anomalies) > 0:
+        traces.append(_get_anomaly_trace(anomalies))
+
     layout = go.Layout(
         xaxis={"title": "Time (UTC+2)", "tickangle": 50},
         yaxis={"title": "Price in Gold", "tickformat": ".2f"},
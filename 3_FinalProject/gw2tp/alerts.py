@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import bisect
+import datetime
+import threading
+from dataclasses import dataclass
+from typing import Final
+
+
+ALERT_OPERATORS: Final[set[str]] = {">", "<"}
+
+
+@dataclass(frozen=True)
+class AlertRule:
+    rule_id: str
+    # item id as a string, or a calculator name such as "scholar_rune"
+    subject: str
+    # "buy" / "sell" for items, "profit" / "crafting_cost" / "sell" for
+    # calculators, all in copper
+    field: str
+    op: str
+    threshold: float
+    webhook_url: str | None = None
+
+
+@dataclass(frozen=True)
+class AlertMatch:
+    rule: AlertRule
+    value: float
+    previous: float | None
+    timestamp: str
+
+
+class _SortedThresholds:
+    __slots__ = ("rule_ids", "thresholds")
+
+    def __init__(self) -> None:
+        self.thresholds: list[float] = []
+        self.rule_ids: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self.rule_ids)
+
+    def add(
+        self,
+        threshold: float,
+        rule_id: str,
+    ) -> None:
+        i = bisect.bisect_right(self.thresholds, threshold)
+        self.thresholds.insert(i, threshold)
+        self.rule_ids.insert(i, rule_id)
+
+    def remove(
+        self,
+        threshold: float,
+        rule_id: str,
+    ) -> None:
+        lo = bisect.bisect_left(self.thresholds, threshold)
+        hi = bisect.bisect_right(self.thresholds, threshold)
+        i = self.rule_ids.index(rule_id, lo, hi)
+        del self.thresholds[i]
+        del self.rule_ids[i]
+
+    def crossed_above(
+        self,
+        previous: float | None,
+        value: float,
+    ) -> list[str]:
+        # value > threshold now, previous <= threshold before
+        lo = (
+            0
+            if previous is None
+            else bisect.bisect_left(self.thresholds, previous)
+        )
+        hi = bisect.bisect_left(self.thresholds, value)
+        return self.rule_ids[lo:hi]
+
+    def crossed_below(
+        self,
+        previous: float | None,
+        value: float,
+    ) -> list[str]:
+        # value < threshold now, previous >= threshold before
+        lo = bisect.bisect_right(self.thresholds, value)
+        hi = (
+            len(self.thresholds)
+            if previous is None
+            else bisect.bisect_right(self.thresholds, previous)
+        )
+        return self.rule_ids[lo:hi]
+
+
+class AlertEngine:
+    """Edge triggered threshold rules indexed by subject and field.
+
+    Rules fire once when their condition becomes true. Evaluating a
+    snapshot only touches the subjects that changed, and within a subject
+    the crossed thresholds are found by bisection, so the cost does not
+    grow with the number of registered rules.
+    """
+
+    def __init__(self) -> None:
+        self._rules: dict[str, AlertRule] = {}
+        # subject -> (field, op) -> thresholds
+        self._index: dict[str, dict[tuple[str, str], _SortedThresholds]] = {}
+        # last seen value of every watched (subject, field)
+        self._values: dict[tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    @property
+    def subjects(self) -> set[str]:
+        with self._lock:
+            return set(self._index)
+
+    def rules(self) -> list[AlertRule]:
+        with self._lock:
+            return list(self._rules.values())
+
+    def add(
+        self,
+        rule: AlertRule,
+    ) -> None:
+        if rule.op not in ALERT_OPERATORS:
+            raise ValueError(f"Unknown alert operator '{rule.op}'")
+        with self._lock:
+            if rule.rule_id in self._rules:
+                self._remove(rule.rule_id)
+            self._rules[rule.rule_id] = rule
+            fields = self._index.setdefault(rule.subject, {})
+            thresholds = fields.setdefault(
+                (rule.field, rule.op),
+                _SortedThresholds(),
+            )
+            thresholds.add(rule.threshold, rule.rule_id)
+
+    def remove(
+        self,
+        rule_id: str,
+    ) -> bool:
+        with self._lock:
+            if rule_id not in self._rules:
+                return False
+            self._remove(rule_id)
+            return True
+
+    def _remove(
+        self,
+        rule_id: str,
+    ) -> None:
+        rule = self._rules.pop(rule_id)
+        fields = self._index[rule.subject]
+        thresholds = fields[(rule.field, rule.op)]
+        thresholds.remove(rule.threshold, rule_id)
+        if len(thresholds) == 0:
+            del fields[(rule.field, rule.op)]
+        if len(fields) == 0:
+            del self._index[rule.subject]
+            for key in [k for k in self._values if k[0] == rule.subject]:
+                del self._values[key]
+
+    def evaluate(
+        self,
+        changes: dict[str, dict[str, float]],
+    ) -> list[AlertMatch]:
+        timestamp = datetime.datetime.now(tz=datetime.timezone.utc).isoformat()
+        matches = []
+        with self._lock:
+            for subject, values in changes.items():
+                fields = self._index.get(subject)
+                if fields is None:
+                    continue
+                for field, value in values.items():
+                    previous = self._values.get((subject, field))
+                    self._values[(subject, field)] = value
+                    if previous == value:
+                        continue
+                    rule_ids: list[str] = []
+                    above = fields.get((field, ">"))
+                    if above is not None:
+                        rule_ids += above.crossed_above(previous, value)
+                    below = fields.get((field, "<"))
+                    if below is not None:
+                        rule_ids += below.crossed_below(previous, value)
+                    matches += [
+                        AlertMatch(
+                            rule=self._rules[rule_id],
+                            value=value,
+                            previous=previous,
+                            timestamp=timestamp,
+                        )
+                        for rule_id in rule_ids
+                    ]
+        return matches
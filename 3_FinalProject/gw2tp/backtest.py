@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import datetime
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+from typing import Iterable
+from typing import Sequence
+
+import numpy as np
+from pymongo.database import Database
+
+from gw2tp.constants import TAX_RATE
+from gw2tp.db_schema import iter_db_chunks
+
+
+BACKTEST_WORKERS = int(
+    os.environ.get("GW2TP_BACKTEST_WORKERS", os.cpu_count() or 1)
+)
+_HISTORY_FIELDS = [
+    "crafting_cost_g",
+    "crafting_cost_s",
+    "crafting_cost_c",
+    "sell_g",
+    "sell_s",
+    "sell_c",
+]
+
+
+@dataclass(frozen=True)
+class History:
+    timestamps: np.ndarray  # epoch seconds, ascending
+    crafting_cost: np.ndarray  # copper
+    sell: np.ndarray  # copper
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+
+def _copper_column(
+    chunk: list[dict[str, Any]],
+    name: str,
+) -> np.ndarray:
+    return np.fromiter(
+        (
+            d[f"{name}_g"] * 10_000 + d[f"{name}_s"] * 100 + d[f"{name}_c"]
+            for d in chunk
+        ),
+        dtype=np.float64,
+        count=len(chunk),
+    )
+
+
+def load_history(
+    db: Database,
+    collection_name: str,
+    chunk_size: int = 5_000,
+    start_datetime: datetime.datetime | None = None,
+) -> History:
+    timestamps, costs, sells = [], [], []
+    for chunk in iter_db_chunks(
+        db,
+        collection_name,
+        _HISTORY_FIELDS,
+        chunk_size=chunk_size,
+        start_datetime=start_datetime,
+        # Points filled in over downtime were never observed
+        include_interpolated=False,
+    ):
+        timestamps.append(
+            np.fromiter(
+                (
+                    datetime.datetime.fromisoformat(d["timestamp"]).timestamp()
+                    for d in chunk
+                ),
+                dtype=np.float64,
+                count=len(chunk),
+            )
+        )
+        costs.append(_copper_column(chunk, "crafting_cost"))
+        sells.append(_copper_column(chunk, "sell"))
+    if len(timestamps) == 0:
+        empty = np.empty(0)
+        return History(empty, empty, empty)
+    return History(
+        timestamps=np.concatenate(timestamps),
+        crafting_cost=np.concatenate(costs),
+        sell=np.concatenate(sells),
+    )
+
+
+def _summarize(
+    entered: np.ndarray,
+    realized: np.ndarray,
+    exit_order: np.ndarray,
+) -> dict[str, np.ndarray]:
+    # entered: (strategies, trades) mask; realized / exit_order: (trades,)
+    pnl = np.where(entered, realized, 0.0)
+    trades = entered.sum(axis=1)
+    total = pnl.sum(axis=1)
+    wins = (entered & (realized > 0.0)).sum(axis=1)
+    equity = np.cumsum(pnl[:, exit_order], axis=1)
+    peak = np.maximum.accumulate(np.maximum(equity, 0.0), axis=1)
+    drawdown = (peak - equity).max(axis=1, initial=0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(trades > 0, total / trades, 0.0)
+        win_rate = np.where(trades > 0, wins / trades, 0.0)
+    return {
+        "trades": trades,
+        "total_profit": total,
+        "mean_profit": mean,
+        "win_rate": win_rate,
+        "max_drawdown": drawdown,
+    }
+
+
+def backtest_thresholds(
+    history: History,
+    min_profits: Sequence[float],
+    hold_hours: float,
+) -> dict[str, np.ndarray]:
+    """Craft one unit at every snapshot whose profit exceeds the threshold
+    and sell it at the first snapshot at least ``hold_hours`` later.
+
+    All thresholds are evaluated at once against every timestamp. Trades
+    that would exit after the last snapshot stay open and are ignored.
+    """
+    thresholds = np.asarray(min_profits, dtype=np.float64)
+    expected = history.sell * TAX_RATE - history.crafting_cost
+    exits = np.searchsorted(
+        history.timestamps,
+        history.timestamps + hold_hours * 3_600.0,
+    )
+    closed = exits < len(history)
+    entries = np.flatnonzero(closed)
+    exits = exits[closed]
+    realized = history.sell[exits] * TAX_RATE - history.crafting_cost[entries]
+    entered = expected[entries][None, :] > thresholds[:, None]
+    results = _summarize(entered, realized, np.argsort(exits, kind="stable"))
+    results["min_profit"] = thresholds
+    results["hold_hours"] = np.full(len(thresholds), float(hold_hours))
+    return results
+
+
+def _backtest_task(
+    args: tuple[History, np.ndarray, float],
+) -> dict[str, np.ndarray]:
+    return backtest_thresholds(*args)
+
+
+def sweep(
+    history: History,
+    min_profits: Iterable[float],
+    hold_hours: Iterable[float],
+    workers: int = BACKTEST_WORKERS,
+) -> dict[str, np.ndarray]:
+    # One task per holding period, thresholds are vectorized inside it
+    thresholds = np.asarray(list(min_profits), dtype=np.float64)
+    tasks = [(history, thresholds, float(h)) for h in hold_hours]
+    if workers <= 1 or len(tasks) <= 1:
+        parts = [_backtest_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_backtest_task, tasks))
+    return {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+
+
+def best_strategies(
+    results: dict[str, np.ndarray],
+    by: str = "total_profit",
+    limit: int = 10,
+) -> list[dict[str, float]]:
+    order = np.argsort(-results[by], kind="stable")[:limit]
+    return [
+        {key: float(values[i]) for key, values in results.items()}
+        for i in order.tolist()
+    ]
+
+
+def parse_range(
+    spec: str,
+) -> list[float]:
+    # "a,b,c" or "start:stop:step" (stop inclusive)
+    if ":" not in spec:
+        return [float(v) for v in spec.split(",")]
+    start, stop, step = (float(v) for v in spec.split(":"))
+    count = int(np.floor((stop - start) / step + 1e-9)) + 1
+    return (start + step * np.arange(count)).tolist()
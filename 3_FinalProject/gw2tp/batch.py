@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Final
+
+import numpy as np
+
+from gw2tp.constants import TAX_RATE
+from gw2tp.constants import ItemIDs
+from gw2tp.orderbook import OrderBook
+from gw2tp.salvage import SALVAGE_TABLES
+from gw2tp.salvage import STACK_SIZE
+
+
+MAX_BATCH_QUANTITY: Final[int] = 10_000
+# Swept quantities summed over all queries of one request
+MAX_BATCH_SWEEP_POINTS: Final[int] = 10_000
+
+
+@dataclass(frozen=True)
+class BatchRecipe:
+    name: str
+    # item id -> count per unit, bought off the sell listings
+    inputs: dict[int, float]
+    # item id -> count per unit, sold into the buy orders after tax
+    outputs: dict[int, float]
+    # kits and vendor items per unit
+    fixed_cost: float = 0.0
+
+    @property
+    def item_ids(self) -> list[int]:
+        return [*self.inputs, *self.outputs]
+
+
+_GUARDIAN_RUNE_INPUTS = {
+    ItemIDs.CHARGED_LOADSTONE: 1.0,
+    ItemIDs.CHARM_OF_POTENCE: 1.0,
+    ItemIDs.ECTOPLASM: 5.0,
+    ItemIDs.PILE_OF_LUCENT_CRYSTAL: 12.0,
+}
+
+CRAFT_RECIPES: Final[list[BatchRecipe]] = [
+    BatchRecipe(
+        name="scholar_rune",
+        inputs={
+            ItemIDs.ECTOPLASM: 5.0,
+            ItemIDs.ELABORATE_TOTEM: 5.0,
+            ItemIDs.PILE_OF_LUCENT_CRYSTAL: 8.0,
+            ItemIDs.CHARM_OF_BRILLIANCE: 2.0,
+        },
+        outputs={ItemIDs.SCHOLAR_RUNE: 1.0},
+    ),
+    BatchRecipe(
+        name="guardian_rune",
+        inputs=_GUARDIAN_RUNE_INPUTS,
+        outputs={ItemIDs.GUARD_RUNE: 1.0},
+    ),
+    BatchRecipe(
+        name="dragonhunter_rune",
+        inputs={
+            **_GUARDIAN_RUNE_INPUTS,
+            ItemIDs.EVERGREEN_LOADSTONE: 1.0,
+            ItemIDs.BARBED_THORN: 10.0,
+        },
+        outputs={ItemIDs.DRAGONHUNTER_RUNE: 1.0},
+    ),
+    BatchRecipe(
+        name="relic_of_fireworks",
+        inputs={
+            ItemIDs.ECTOPLASM: 15.0,
+            ItemIDs.CHARM_OF_SKILL: 3.0,
+            ItemIDs.PILE_OF_LUCENT_CRYSTAL: 48.0,
+        },
+        outputs={ItemIDs.RELIC_OF_FIREWORKS: 1.0},
+    ),
+    BatchRecipe(
+        name="relic_of_thief",
+        inputs={
+            ItemIDs.ECTOPLASM: 15.0,
+            ItemIDs.CHARM_OF_SKILL: 3.0,
+            ItemIDs.CURED_HARDENED_LEATHER_SQUARE: 5.0,
+            ItemIDs.PILE_OF_LUCENT_CRYSTAL: 48.0,
+        },
+        outputs={ItemIDs.RELIC_OF_THIEF: 1.0},
+    ),
+    BatchRecipe(
+        name="relic_of_aristocracy",
+        inputs={
+            ItemIDs.ECTOPLASM: 15.0,
+            ItemIDs.CHARM_OF_BRILLIANCE: 3.0,
+            ItemIDs.PILE_OF_LUCENT_CRYSTAL: 48.0,
+        },
+        outputs={ItemIDs.RELIC_OF_ARISTOCRACY: 1.0},
+        # three bottles of elonian wine from the vendor
+        fixed_cost=2_504.0 * 3.0,
+    ),
+    BatchRecipe(
+        name="thesis_on_masterful_malice",
+        inputs={
+            ItemIDs.WRIT_MASTERFUL_MALICE: 3.0,
+            ItemIDs.CRYSTALINE_DUST: 5.0,
+            ItemIDs.ANCIENT_WOOD_LOG: 48.0,
+            ItemIDs.HARDENED_LEATHER: 10.0,
+            ItemIDs.ORICHALCUM_ORE: 12.0,
+            ItemIDs.GOSSAMER_SCRAP: 20.0,
+            ItemIDs.GOSSAMER_THREAD: 10.0,
+            ItemIDs.POUCH_OF_BLACK_PIGMENTS: 3.0,
+            ItemIDs.POUCH_OF_WHITE_PIGMENTS: 3.0,
+            ItemIDs.JUG_OF_WATER: 20.0,
+        },
+        outputs={ItemIDs.THESIS_MASTERFUL_MALICE: 1.0},
+    ),
+]
+
+# One unit is one salvaged piece of gear; kit costs are spread per piece
+SALVAGE_RECIPES: Final[list[BatchRecipe]] = [
+    BatchRecipe(
+        name=name,
+        inputs={table.gear_id: 1.0},
+        outputs=dict(table.drop_rates),
+        fixed_cost=table.salvage_costs / STACK_SIZE,
+    )
+    for name, table in SALVAGE_TABLES.items()
+]
+
+BATCH_RECIPES: Final[dict[str, BatchRecipe]] = {
+    recipe.name: recipe for recipe in [*CRAFT_RECIPES, *SALVAGE_RECIPES]
+}
+
+
+def evaluate_quantities(
+    recipe: BatchRecipe,
+    quantities: np.ndarray,
+    books: dict[int, OrderBook],
+) -> dict[str, np.ndarray]:
+    # NaN wherever the books are too thin to fill a quantity
+    quantities = np.asarray(quantities, dtype=np.int64)
+    cost = quantities * recipe.fixed_cost
+    for item_id, count in recipe.inputs.items():
+        needed = np.ceil(quantities * count).astype(np.int64)
+        cost = cost + books[item_id].instant_buy_cost(needed)
+    revenue = np.zeros(len(quantities))
+    for item_id, count in recipe.outputs.items():
+        produced = np.rint(quantities * count).astype(np.int64)
+        revenue = revenue + np.where(
+            produced > 0,
+            books[item_id].instant_sell_value(produced),
+            0.0,
+        )
+    revenue *= TAX_RATE
+    profit = revenue - cost
+    return {
+        "quantity": quantities,
+        "cost": cost,
+        "revenue": revenue,
+        "profit": profit,
+        "profit_per_unit": profit / np.maximum(quantities, 1),
+    }
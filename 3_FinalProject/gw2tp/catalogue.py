@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any
+from typing import Final
+from typing import Iterable
+
+
+CATALOGUE_PATH = os.environ.get("GW2TP_CATALOGUE_PATH", "catalogue.sqlite3")
+# Small offline dump of the items the calculators use; recipe ids in the
+# fixture are local placeholders, the synced dump uses the real ones
+FIXTURE_DIR: Final[Path] = Path(__file__).parent / "fixtures"
+
+_SCHEMA: Final[str] = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_lower TEXT NOT NULL,
+    icon TEXT,
+    type TEXT,
+    rarity TEXT,
+    level INTEGER,
+    vendor_value INTEGER
+);
+CREATE INDEX IF NOT EXISTS items_name_lower ON items (name_lower);
+CREATE VIRTUAL TABLE IF NOT EXISTS item_names USING fts5 (
+    name_lower,
+    content = 'items',
+    content_rowid = 'id',
+    tokenize = 'trigram'
+);
+CREATE TABLE IF NOT EXISTS recipes (
+    id INTEGER PRIMARY KEY,
+    type TEXT,
+    output_item_id INTEGER NOT NULL,
+    output_item_count INTEGER NOT NULL,
+    min_rating INTEGER,
+    disciplines TEXT NOT NULL,
+    ingredients TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS recipes_output ON recipes (output_item_id);
+"""
+
+_SEARCH_CANDIDATES: Final[int] = 50
+_ITEM_COLUMNS: Final[tuple[str, ...]] = (
+    "id",
+    "name",
+    "icon",
+    "type",
+    "rarity",
+    "level",
+    "vendor_value",
+)
+
+
+def load_fixture(
+    name: str,
+) -> list[dict[str, Any]]:
+    with open(FIXTURE_DIR / f"{name}.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class Catalogue:
+    def __init__(
+        self,
+        path: str | Path | None = None,
+    ) -> None:
+        self.path = str(path if path is not None else CATALOGUE_PATH)
+        # Opened on first use, so creating a catalogue touches no file
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._syncs = 0
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Callers hold the lock. Reads are served from the page cache
+        # through mmap; writes only happen during a sync.
+        if self._connection is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA mmap_size = 268435456")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(_SCHEMA)
+            self._connection = conn
+        return self._connection
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) FROM items").fetchone()
+        return int(row[0])
+
+    @property
+    def version(self) -> tuple[int, int]:
+        # data_version only moves for commits made by other connections,
+        # e.g. a `python -m backend.catalogue_sync` run
+        with self._lock:
+            row = self._conn.execute("PRAGMA data_version").fetchone()
+        return self._syncs, int(row[0])
+
+    def names(self) -> list[tuple[int, str]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT id, name FROM items").fetchall()
+        return [(row["id"], row["name"]) for row in rows]
+
+    def sync(
+        self,
+        items: Iterable[dict[str, Any]],
+        recipes: Iterable[dict[str, Any]],
+        if_empty: bool = False,
+    ) -> bool:
+        # Full replace in a single transaction, readers never see a mix.
+        # if_empty only fills a catalogue without items: the check and the
+        # fill share one write transaction, so processes starting together
+        # seed it once. Returns whether anything was written.
+        item_rows = [
+            (
+                int(item["id"]),
+                item["name"],
+                item["name"].lower(),
+                item.get("icon"),
+                item.get("type"),
+                item.get("rarity"),
+                item.get("level"),
+                item.get("vendor_value"),
+            )
+            for item in items
+            if item.get("name")
+        ]
+        recipe_rows = [
+            (
+                int(recipe["id"]),
+                recipe.get("type"),
+                int(recipe["output_item_id"]),
+                int(recipe.get("output_item_count", 1)),
+                recipe.get("min_rating"),
+                json.dumps(recipe.get("disciplines", [])),
+                json.dumps(
+                    [
+                        {
+                            # older dumps use item_id instead of id
+                            "id": int(i.get("id", i.get("item_id"))),
+                            "type": i.get("type", "Item"),
+                            "count": int(i["count"]),
+                        }
+                        for i in recipe.get("ingredients", [])
+                    ]
+                ),
+            )
+            for recipe in recipes
+        ]
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                count = conn.execute("SELECT COUNT(*) FROM items").fetchone()
+                if if_empty and count[0] > 0:
+                    conn.rollback()
+                    return False
+                conn.execute("DELETE FROM items")
+                conn.execute("DELETE FROM recipes")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO items "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    item_rows,
+                )
+                conn.execute(
+                    "INSERT INTO item_names (item_names) VALUES ('rebuild')"
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO recipes "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    recipe_rows,
+                )
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            self._syncs += 1
+        return True
+
+    def sync_fixtures(
+        self,
+        if_empty: bool = False,
+    ) -> bool:
+        return self.sync(
+            load_fixture("items"),
+            load_fixture("recipes"),
+            if_empty=if_empty,
+        )
+
+    def item(
+        self,
+        item_id: int,
+    ) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_ITEM_COLUMNS)} FROM items WHERE id = ?",
+                (item_id,),
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def items(
+        self,
+        item_ids: Iterable[int],
+    ) -> dict[int, dict[str, Any]]:
+        item_ids = list(item_ids)
+        placeholders = ", ".join("?" * len(item_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_ITEM_COLUMNS)} FROM items "
+                f"WHERE id IN ({placeholders})",
+                item_ids,
+            ).fetchall()
+        return {row["id"]: dict(row) for row in rows}
+
+    def _recipe_from_row(
+        self,
+        row: sqlite3.Row,
+    ) -> dict[str, Any]:
+        recipe = dict(row)
+        recipe["disciplines"] = json.loads(recipe["disciplines"])
+        recipe["ingredients"] = json.loads(recipe["ingredients"])
+        return recipe
+
+    def recipe(
+        self,
+        recipe_id: int,
+    ) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM recipes WHERE id = ?",
+                (recipe_id,),
+            ).fetchone()
+        return self._recipe_from_row(row) if row is not None else None
+
+    def recipes_for(
+        self,
+        output_item_id: int,
+    ) -> list[dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM recipes WHERE output_item_id = ?",
+                (output_item_id,),
+            ).fetchall()
+        return [self._recipe_from_row(row) for row in rows]
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+    ) -> list[dict[str, Any]]:
+        # Prefix matches on the name index first, then substring matches
+        # from the trigram index, shortest names first within each group
+        query = query.strip().lower()
+        if len(query) == 0:
+            return []
+        columns = ", ".join(_ITEM_COLUMNS)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {columns} FROM items "
+                "WHERE name_lower >= ? AND name_lower < ? "
+                "ORDER BY length(name_lower), id LIMIT ?",
+                (query, query + "\uffff", limit),
+            ).fetchall()
+            if len(rows) < limit and len(query) >= 3:
+                # bm25 ranking is far slower than sorting the candidates
+                phrase = '"{}"'.format(query.replace('"', '""'))
+                candidates = self._conn.execute(
+                    f"SELECT {columns} FROM items WHERE id IN ("
+                    "SELECT rowid FROM item_names WHERE item_names MATCH ? "
+                    "LIMIT ?)",
+                    (phrase, _SEARCH_CANDIDATES),
+                ).fetchall()
+                seen = {row["id"] for row in rows}
+                candidates = sorted(
+                    (row for row in candidates if row["id"] not in seen),
+                    key=lambda row: (len(row["name"]), row["id"]),
+                )
+                rows += candidates[: limit - len(rows)]
+        return [dict(row) for row in rows]
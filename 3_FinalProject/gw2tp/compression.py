@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import gzip
+import os
+from typing import Any
+from typing import Sequence
+
+
+COMPRESSION_MINIMUM_SIZE = int(
+    os.environ.get("GW2TP_COMPRESSION_MINIMUM_SIZE", 1_000)
+)
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("GW2TP_COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSION_BROTLI_QUALITY = int(
+    os.environ.get("GW2TP_COMPRESSION_BROTLI_QUALITY", 4)
+)
+
+
+def compression_middleware(
+    minimum_size: int = COMPRESSION_MINIMUM_SIZE,
+    streaming_paths: Sequence[str] = (),
+) -> Any:
+    # Streaming responses must not be buffered by the compressor; the gzip
+    # middleware already skips text/event-stream on its own
+    from starlette.middleware import Middleware  # noqa: PLC0415
+
+    try:
+        from brotli_asgi import BrotliMiddleware  # noqa: PLC0415
+    except ImportError:
+        from starlette.middleware.gzip import GZipMiddleware  # noqa: PLC0415
+
+        return Middleware(
+            GZipMiddleware,
+            minimum_size=minimum_size,
+            compresslevel=COMPRESSION_GZIP_LEVEL,
+        )
+    return Middleware(
+        BrotliMiddleware,
+        quality=COMPRESSION_BROTLI_QUALITY,
+        minimum_size=minimum_size,
+        gzip_fallback=True,
+        excluded_handlers=list(streaming_paths),
+    )
+
+
+def precompress(
+    content: bytes,
+) -> dict[str, bytes]:
+    encoded = {
+        "identity": content,
+        "gzip": gzip.compress(content, compresslevel=9, mtime=0),
+    }
+    try:
+        import brotli  # noqa: PLC0415
+    except ImportError:
+        return encoded
+    encoded["br"] = brotli.compress(content, quality=11)
+    return encoded
+
+
+def negotiate_encoding(
+    accept_encoding: str,
+    available: dict[str, bytes],
+) -> str:
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    # Prefer the smallest encoding the client accepts
+    for encoding in ("br", "gzip"):
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if encoding in available and quality > 0.0:
+            return encoding
+    return "identity"
@@ -82,6 +82,11 @@ TAX_RATE: float = 0.85
 
 class API:
     GW2_COMMERCE_API_URL: str = "https://api.guildwars2.com/v2/commerce/prices"
+    GW2_COMMERCE_LISTINGS_URL: str = (
+        "https://api.guildwars2.com/v2/commerce/listings"
+    )
+    GW2_ITEMS_API_URL: str = "https://api.guildwars2.com/v2/items"
+    GW2_RECIPES_API_URL: str = "https://api.guildwars2.com/v2/recipes"
     PRODUCTION_API_URL: str = "https://gw2tp-production.up.railway.app/api/"
     DEV_API_URL: str = "http://localhost:8000/api/"
     COMMAND_PREFIX: str = "/gw2tp"
@@ -1,6 +1,8 @@
 import datetime
 from typing import Any
+from typing import Iterator
 
+from pymongo import UpdateOne
 from pymongo.database import Database
 
 
@@ -13,6 +15,8 @@ COLLECTIONS = [
     "relic_of_thief",
     "relic_of_aristocracy",
 ]
+# Snapshots are stored with this (fixed) offset, whatever the name says
+SNAPSHOT_TIMEZONE = datetime.timezone(datetime.timedelta(hours=2), "UTC")
 
 
 def cleanup_old_records(
@@ -27,6 +31,65 @@ def cleanup_old_records(
         collection.delete_many({"timestamp": {"$lt": cutoff_date.isoformat()}})
 
 
+def snapshot_bucket(
+    timestamp: datetime.datetime,
+    bucket_seconds: int,
+) -> int:
+    # Start of the aligned interval, in epoch seconds, the snapshot is in
+    epoch = int(timestamp.timestamp())
+    return epoch - epoch % bucket_seconds
+
+
+def ensure_snapshot_indexes(
+    db: Database,
+) -> None:
+    for collection_name in COLLECTIONS:
+        collection = db[collection_name]
+        # Partial, documents stored before buckets existed have none
+        collection.create_index(
+            "bucket",
+            unique=True,
+            partialFilterExpression={"bucket": {"$exists": True}},
+        )
+        collection.create_index("timestamp")
+
+
+def _snapshot_update(
+    doc: dict[str, Any],
+) -> dict[str, Any]:
+    # An observed snapshot replaces a point interpolated over downtime
+    return {"$set": doc, "$unset": {"interpolated": ""}}
+
+
+def upsert_snapshots(
+    db: Database,
+    collection_name: str,
+    docs: list[dict[str, Any]],
+) -> None:
+    # One document per bucket: overlapping runs, retries and replicas
+    # overwrite the bucket instead of adding duplicate points
+    collection = db[collection_name]
+    if len(docs) == 1:
+        # The scheduler writes one snapshot at a time, skip the bulk API
+        collection.update_one(
+            {"bucket": docs[0]["bucket"]},
+            _snapshot_update(docs[0]),
+            upsert=True,
+        )
+    elif len(docs) > 1:
+        collection.bulk_write(
+            [
+                UpdateOne(
+                    {"bucket": doc["bucket"]},
+                    _snapshot_update(doc),
+                    upsert=True,
+                )
+                for doc in docs
+            ],
+            ordered=False,
+        )
+
+
 def get_db_data(
     db: Database,
     collection_name: str,
@@ -46,3 +109,35 @@ def get_db_data(
     for doc in results:
         doc.pop("_id", None)
     return results
+
+
+def iter_db_chunks(
+    db: Database,
+    collection_name: str,
+    fields: list[str],
+    chunk_size: int = 5_000,
+    start_datetime: datetime.datetime | None = None,
+    include_interpolated: bool = True,
+) -> Iterator[list[dict[str, Any]]]:
+    # Oldest first, without ever holding more than one chunk of documents
+    query: dict[str, Any] = {}
+    if start_datetime:
+        query["timestamp"] = {"$gte": start_datetime.isoformat()}
+    if not include_interpolated:
+        query["interpolated"] = {"$ne": True}
+    projection = {field: True for field in (*fields, "timestamp")}
+    projection["_id"] = False
+    cursor = (
+        db[collection_name]
+        .find(query, projection)
+        .sort("timestamp", 1)
+        .batch_size(chunk_size)
+    )
+    chunk: list[dict[str, Any]] = []
+    for doc in cursor:
+        chunk.append(doc)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if len(chunk) > 0:
+        yield chunk
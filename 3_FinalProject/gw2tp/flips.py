@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import datetime
+import os
+import threading
+from typing import Any
+
+import numpy as np
+
+from gw2tp.constants import TAX_RATE
+from gw2tp.helper import copper_to_gsc
+
+
+FLIP_INDEX_SIZE = int(os.environ.get("GW2TP_FLIP_INDEX_SIZE", 1_000))
+
+
+def compute_flip_scores(
+    buy: np.ndarray,
+    sell: np.ndarray,
+    buy_quantity: np.ndarray,
+    sell_quantity: np.ndarray,
+) -> dict[str, np.ndarray]:
+    buy = buy.astype(np.float64)
+    # Same rounding as the per-item flip profit of the price endpoint
+    margin = np.trunc(np.round(sell * TAX_RATE, 6) - buy)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(buy > 0.0, margin / buy, 0.0)
+    # An item can only be flipped as fast as the thinner side of the book
+    liquidity = np.minimum(buy_quantity, sell_quantity).astype(np.float64)
+    score = margin * np.log1p(liquidity)
+    tradable = (buy > 0) & (sell > 0)
+    score[~tradable] = -np.inf
+    return {
+        "margin": margin,
+        "roi": roi,
+        "liquidity": liquidity,
+        "score": score,
+    }
+
+
+# Columns kept for every flippable item, sorted by ROI
+_ROI_COLUMNS = ("item_ids", "buy", "sell", "margin", "roi", "liquidity")
+
+
+def _flip_entry(
+    columns: dict[str, np.ndarray],
+    score: np.ndarray,
+    i: int,
+) -> dict[str, Any]:
+    g, s, c = copper_to_gsc(columns["margin"][i])
+    return {
+        "item_id": int(columns["item_ids"][i]),
+        "buy": int(columns["buy"][i]),
+        "sell": int(columns["sell"][i]),
+        "flip_g": g,
+        "flip_s": s,
+        "flip_c": c,
+        "roi": float(columns["roi"][i]),
+        "liquidity": int(columns["liquidity"][i]),
+        "score": float(score[i]),
+    }
+
+
+class FlipIndex:
+    """Best flips by score, plus every flippable item ordered by ROI.
+
+    Queries walk the prebuilt top ``size`` entries, best first, skip those
+    below ``min_roi`` and stop at ``limit``. Only when the top entries run
+    out does a query search the ROI order for the items passing
+    ``min_roi``, so flips that rank below the top entries by score are not
+    lost, and rank those by score.
+    """
+
+    def __init__(
+        self,
+        size: int = FLIP_INDEX_SIZE,
+    ) -> None:
+        self.size = size
+        self.updated_at: datetime.datetime | None = None
+        self.scanned_items = 0
+        # Best first; entries are prebuilt response rows
+        self._entries: list[dict[str, Any]] = []
+        # Ascending ROI, "score" included
+        self._by_roi: dict[str, np.ndarray] = {
+            name: np.empty(0) for name in (*_ROI_COLUMNS, "score")
+        }
+        self._lock = threading.Lock()
+
+    def update(
+        self,
+        item_ids: np.ndarray,
+        buy: np.ndarray,
+        sell: np.ndarray,
+        buy_quantity: np.ndarray,
+        sell_quantity: np.ndarray,
+    ) -> None:
+        scores = compute_flip_scores(buy, sell, buy_quantity, sell_quantity)
+        score = scores["score"]
+        flippable = np.isfinite(score) & (scores["margin"] > 0.0)
+        columns = {
+            "item_ids": item_ids,
+            "buy": buy,
+            "sell": sell,
+            **scores,
+        }
+        by_roi = {name: columns[name][flippable] for name in columns}
+        order = np.argsort(by_roi["roi"], kind="stable")
+        by_roi = {
+            name: by_roi[name][order] for name in (*_ROI_COLUMNS, "score")
+        }
+
+        k = min(self.size, len(score))
+        top = np.argpartition(-score, k - 1)[:k] if k > 0 else np.arange(0)
+        top = top[np.argsort(-score[top], kind="stable")]
+        top = top[flippable[top]]
+        entries = [_flip_entry(columns, score, i) for i in top.tolist()]
+        with self._lock:
+            self._entries = entries
+            self._by_roi = by_roi
+            self.scanned_items = len(item_ids)
+            self.updated_at = datetime.datetime.now(tz=datetime.timezone.utc)
+
+    def query(
+        self,
+        limit: int = 20,
+        min_roi: float = 0.0,
+    ) -> list[dict[str, Any]]:
+        with self._lock:
+            entries, by_roi = self._entries, self._by_roi
+        found = []
+        for entry in entries:
+            if entry["roi"] >= min_roi:
+                found.append(entry)
+                if len(found) == limit:
+                    return found
+        if len(entries) == len(by_roi["roi"]):
+            # The top entries are every flippable item
+            return found
+        return self._query_by_roi(by_roi, limit, min_roi)
+
+    @staticmethod
+    def _query_by_roi(
+        by_roi: dict[str, np.ndarray],
+        limit: int,
+        min_roi: float,
+    ) -> list[dict[str, Any]]:
+        start = int(np.searchsorted(by_roi["roi"], min_roi, side="left"))
+        score = by_roi["score"][start:]
+        k = min(limit, len(score))
+        if k == 0:
+            return []
+        top = np.argpartition(-score, k - 1)[:k]
+        top = top[np.argsort(-score[top], kind="stable")] + start
+        return [_flip_entry(by_roi, by_roi["score"], i) for i in top.tolist()]
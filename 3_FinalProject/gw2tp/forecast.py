@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import collections
+import dataclasses
+import math
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any
+from typing import Final
+
+
+FORECAST_ALPHA = float(os.environ.get("GW2TP_FORECAST_ALPHA", 0.3))
+FORECAST_BETA = float(os.environ.get("GW2TP_FORECAST_BETA", 0.1))
+# One day of 15 minute snapshots
+ANOMALY_WINDOW = int(os.environ.get("GW2TP_ANOMALY_WINDOW", 96))
+ANOMALY_Z_THRESHOLD = float(os.environ.get("GW2TP_ANOMALY_Z_THRESHOLD", 3.0))
+ANOMALY_MIN_SAMPLES: Final[int] = 8
+ANOMALY_HISTORY_SIZE: Final[int] = 200
+FORECAST_FIELDS: Final[tuple[str, ...]] = ("sell", "crafting_cost")
+
+
+@dataclass(frozen=True)
+class Anomaly:
+    subject: str
+    field: str
+    timestamp: float
+    value: float
+    mean: float
+    z_score: float
+
+
+class SeriesState:
+    """Holt (level + trend) smoothing plus a rolling window z-score.
+
+    Each update is O(1): the window keeps running sums, so no history is
+    rescanned when a snapshot arrives.
+    """
+
+    __slots__ = (
+        "alpha",
+        "beta",
+        "last_timestamp",
+        "level",
+        "step_seconds",
+        "trend",
+        "_sum",
+        "_sum_squares",
+        "_window",
+    )
+
+    def __init__(
+        self,
+        alpha: float = FORECAST_ALPHA,
+        beta: float = FORECAST_BETA,
+        window: int = ANOMALY_WINDOW,
+    ) -> None:
+        self.alpha = alpha
+        self.beta = beta
+        self.level: float | None = None
+        self.trend = 0.0
+        self.last_timestamp: float | None = None
+        # EWMA of the spacing between snapshots, used to date forecasts
+        self.step_seconds: float | None = None
+        self._window: collections.deque[float] = collections.deque(
+            maxlen=window,
+        )
+        self._sum = 0.0
+        self._sum_squares = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "alpha": self.alpha,
+            "beta": self.beta,
+            "level": self.level,
+            "trend": self.trend,
+            "last_timestamp": self.last_timestamp,
+            "step_seconds": self.step_seconds,
+            "window": list(self._window),
+            "window_size": self._window.maxlen,
+        }
+
+    @classmethod
+    def from_dict(
+        cls,
+        dct: dict[str, Any],
+    ) -> SeriesState:
+        state = cls(dct["alpha"], dct["beta"], dct["window_size"])
+        state.level = dct["level"]
+        state.trend = dct["trend"]
+        state.last_timestamp = dct["last_timestamp"]
+        state.step_seconds = dct["step_seconds"]
+        # Rebuilding the sums is O(window), only done when loading state
+        for value in dct["window"]:
+            state._window.append(value)
+            state._sum += value
+            state._sum_squares += value * value
+        return state
+
+    def z_score(
+        self,
+        value: float,
+    ) -> tuple[float, float]:
+        # Against the window before the value is added; (mean, z)
+        n = len(self._window)
+        if n < ANOMALY_MIN_SAMPLES:
+            return math.nan, 0.0
+        mean = self._sum / n
+        variance = max(self._sum_squares / n - mean * mean, 0.0)
+        std = math.sqrt(variance)
+        if std == 0.0:
+            return mean, 0.0
+        return mean, (value - mean) / std
+
+    def update(
+        self,
+        value: float,
+        timestamp: float,
+    ) -> tuple[float, float]:
+        mean, z = self.z_score(value)
+
+        if self.level is None:
+            self.level = value
+        else:
+            previous_level = self.level
+            self.level = self.alpha * value + (1.0 - self.alpha) * (
+                previous_level + self.trend
+            )
+            self.trend = (
+                self.beta * (self.level - previous_level)
+                + (1.0 - self.beta) * self.trend
+            )
+        if self.last_timestamp is not None:
+            step = timestamp - self.last_timestamp
+            self.step_seconds = (
+                step
+                if self.step_seconds is None
+                else 0.2 * step + 0.8 * self.step_seconds
+            )
+        self.last_timestamp = timestamp
+
+        if len(self._window) == self._window.maxlen:
+            oldest = self._window[0]
+            self._sum -= oldest
+            self._sum_squares -= oldest * oldest
+        self._window.append(value)
+        self._sum += value
+        self._sum_squares += value * value
+        return mean, z
+
+    def forecast(
+        self,
+        horizon: int,
+    ) -> list[tuple[float, float]]:
+        # (timestamp, value) for the next `horizon` snapshots
+        if self.level is None or self.last_timestamp is None:
+            return []
+        step = self.step_seconds or 0.0
+        return [
+            (self.last_timestamp + h * step, self.level + h * self.trend)
+            for h in range(1, horizon + 1)
+        ]
+
+
+class ForecastStore:
+    def __init__(
+        self,
+        z_threshold: float = ANOMALY_Z_THRESHOLD,
+    ) -> None:
+        self.z_threshold = z_threshold
+        # subject -> field -> state
+        self._series: dict[str, dict[str, SeriesState]] = {}
+        self._latest_z: dict[tuple[str, str], float] = {}
+        self.anomalies: collections.deque[Anomaly] = collections.deque(
+            maxlen=ANOMALY_HISTORY_SIZE,
+        )
+        self._lock = threading.Lock()
+
+    def __contains__(
+        self,
+        subject: str,
+    ) -> bool:
+        return subject in self._series
+
+    def update(
+        self,
+        subject: str,
+        values: dict[str, float],
+        timestamp: float,
+    ) -> list[Anomaly]:
+        found = []
+        with self._lock:
+            fields = self._series.setdefault(subject, {})
+            for field, value in values.items():
+                state = fields.setdefault(field, SeriesState())
+                if (
+                    state.last_timestamp is not None
+                    and timestamp <= state.last_timestamp
+                ):
+                    continue
+                mean, z = state.update(value, timestamp)
+                self._latest_z[(subject, field)] = z
+                if abs(z) >= self.z_threshold:
+                    found.append(
+                        Anomaly(subject, field, timestamp, value, mean, z)
+                    )
+            self.anomalies.extend(found)
+        return found
+
+    def adopt(
+        self,
+        subject: str,
+        other: ForecastStore,
+    ) -> None:
+        # Take over the series another store built up, e.g. from a replay
+        with self._lock:
+            self._series[subject] = other._series.get(subject, {})
+            for field in self._series[subject]:
+                key = (subject, field)
+                self._latest_z[key] = other._latest_z.get(key, 0.0)
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "series": {
+                    subject: {
+                        field: state.to_dict()
+                        for field, state in fields.items()
+                    }
+                    for subject, fields in self._series.items()
+                },
+                "latest_z": [
+                    [subject, field, z]
+                    for (subject, field), z in self._latest_z.items()
+                ],
+                "anomalies": [dataclasses.asdict(a) for a in self.anomalies],
+            }
+
+    def load(
+        self,
+        dct: dict[str, Any],
+    ) -> None:
+        # Replaces the whole state, e.g. with the one a worker published
+        series = {
+            subject: {
+                field: SeriesState.from_dict(state)
+                for field, state in fields.items()
+            }
+            for subject, fields in dct["series"].items()
+        }
+        latest_z = {
+            (subject, field): z for subject, field, z in dct["latest_z"]
+        }
+        with self._lock:
+            self._series = series
+            self._latest_z = latest_z
+            self.anomalies.clear()
+            self.anomalies.extend(Anomaly(**a) for a in dct["anomalies"])
+
+    def forecast(
+        self,
+        subject: str,
+        horizon: int,
+    ) -> dict[str, dict[str, object]]:
+        with self._lock:
+            fields = self._series.get(subject, {})
+            return {
+                field: {
+                    "level": state.level,
+                    "trend": state.trend,
+                    "z_score": self._latest_z.get((subject, field), 0.0),
+                    "points": state.forecast(horizon),
+                }
+                for field, state in fields.items()
+            }
+
+    def recent_anomalies(
+        self,
+        subject: str | None = None,
+        limit: int = 50,
+    ) -> list[Anomaly]:
+        with self._lock:
+            anomalies = [
+                a
+                for a in reversed(self.anomalies)
+                if subject is None or a.subject == subject
+            ]
+        return anomalies[:limit]
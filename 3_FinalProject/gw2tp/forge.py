@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Final
+from typing import Sequence
+
+import numpy as np
+
+from gw2tp.constants import TAX_RATE
+from gw2tp.constants import ItemIDs
+from gw2tp.snapshot import PriceTable
+
+
+FORGE_INPUT_COUNT: Final[float] = 3.0
+FORGE_SAME_OUTCOME_CHANCE: Final[float] = 0.2
+FORGE_ATTEMPTS_PER_SHARD: Final[float] = 10.0
+ELONIAN_WINE_COST: Final[float] = 2_500.0
+
+
+@dataclass(frozen=True)
+class ForgeRecipe:
+    name: str
+    # item id -> count, bought at the buy order price
+    inputs: dict[int, float]
+    # item id -> expected count per attempt, sold at the sell price after tax
+    outcomes: dict[int, float]
+    fixed_cost: float = 0.0
+    # 0.0 for recipes that do not use spirit shards
+    attempts_per_shard: float = 0.0
+    # outcome ids priced at the buy order instead of the sell listing
+    buy_priced_outcomes: frozenset[int] = field(default_factory=frozenset)
+
+
+# Three of a kind -> one random member of the same family
+FORGE_FAMILIES: Final[dict[str, dict[str, int]]] = {
+    "symbol": {
+        "symbol_of_enh": ItemIDs.SYMBOL_OF_ENH,
+        "symbol_of_pain": ItemIDs.SYMBOL_OF_PAIN,
+        "symbol_of_control": ItemIDs.SYMBOL_OF_CONTROL,
+    },
+    "charm": {
+        "charm_of_brilliance": ItemIDs.CHARM_OF_BRILLIANCE,
+        "charm_of_potence": ItemIDs.CHARM_OF_POTENCE,
+        "charm_of_skill": ItemIDs.CHARM_OF_SKILL,
+    },
+}
+
+# name -> (loadstone id, core id)
+LOADSTONE_PROMOTIONS: Final[dict[str, tuple[int, int]]] = {
+    "onyx": (ItemIDs.ONYX_LOADSTONE, ItemIDs.ONYX_CORE),
+    "charged": (ItemIDs.CHARGED_LOADSTONE, ItemIDs.CHARGED_CORE),
+    "corrupted": (ItemIDs.CORRUPTED_LOADSTONE, ItemIDs.CORRUPTED_CORE),
+    "destroyer": (ItemIDs.DESTROYER_LOADSTONE, ItemIDs.DESTROYER_CORE),
+}
+
+
+def family_recipes() -> list[ForgeRecipe]:
+    recipes = []
+    for members in FORGE_FAMILIES.values():
+        other_chance = (1.0 - FORGE_SAME_OUTCOME_CHANCE) / (len(members) - 1)
+        for name, item_id in members.items():
+            outcomes = {
+                other_id: (
+                    FORGE_SAME_OUTCOME_CHANCE
+                    if other_id == item_id
+                    else other_chance
+                )
+                for other_id in members.values()
+            }
+            recipes.append(
+                ForgeRecipe(
+                    name=name,
+                    inputs={item_id: FORGE_INPUT_COUNT},
+                    outcomes=outcomes,
+                    attempts_per_shard=FORGE_ATTEMPTS_PER_SHARD,
+                )
+            )
+    return recipes
+
+
+def promotion_recipes() -> list[ForgeRecipe]:
+    return [
+        ForgeRecipe(
+            name=f"{name}_loadstone",
+            inputs={core_id: 2.0, ItemIDs.CRYSTALINE_DUST: 1.0},
+            outcomes={loadstone_id: 1.0},
+            fixed_cost=ELONIAN_WINE_COST,
+            # the dashboard values onyx loadstones at their buy order
+            buy_priced_outcomes=(
+                frozenset({loadstone_id}) if name == "onyx" else frozenset()
+            ),
+        )
+        for name, (loadstone_id, core_id) in LOADSTONE_PROMOTIONS.items()
+    ]
+
+
+class ForgeEngine:
+    def __init__(
+        self,
+        recipes: Sequence[ForgeRecipe],
+    ) -> None:
+        self.recipes = list(recipes)
+        self.names = [recipe.name for recipe in self.recipes]
+        self.item_ids = sorted(
+            {
+                item_id
+                for recipe in self.recipes
+                for item_id in (*recipe.inputs, *recipe.outcomes)
+            }
+        )
+        index = {item_id: i for i, item_id in enumerate(self.item_ids)}
+        shape = (len(self.recipes), len(self.item_ids))
+
+        self._inputs = np.zeros(shape)
+        self._sell_outcomes = np.zeros(shape)
+        self._buy_outcomes = np.zeros(shape)
+        self._fixed_costs = np.array([r.fixed_cost for r in self.recipes])
+        self._attempts_per_shard = np.array(
+            [recipe.attempts_per_shard for recipe in self.recipes]
+        )
+        for row, recipe in enumerate(self.recipes):
+            for item_id, count in recipe.inputs.items():
+                self._inputs[row, index[item_id]] = count
+            for item_id, count in recipe.outcomes.items():
+                if item_id in recipe.buy_priced_outcomes:
+                    self._buy_outcomes[row, index[item_id]] = count
+                else:
+                    self._sell_outcomes[row, index[item_id]] = count
+
+    def evaluate(
+        self,
+        buy: np.ndarray,
+        sell: np.ndarray,
+    ) -> dict[str, np.ndarray]:
+        cost = self._inputs @ buy + self._fixed_costs
+        reward = self._sell_outcomes @ sell + self._buy_outcomes @ buy
+        reward *= TAX_RATE
+        ev = reward - cost
+        ev_per_shard = np.where(
+            self._attempts_per_shard > 0.0,
+            ev * self._attempts_per_shard,
+            np.nan,
+        )
+        return {
+            "cost": cost,
+            "reward": reward,
+            "ev": ev,
+            "ev_per_shard": ev_per_shard,
+        }
+
+    def evaluate_prices(
+        self,
+        prices: PriceTable,
+    ) -> dict[str, np.ndarray]:
+        positions = prices.positions(self.item_ids)
+        buy = prices.buy[positions].astype(float)
+        sell = prices.sell[positions].astype(float)
+        return self.evaluate(buy, sell)
+
+    def rank(
+        self,
+        results: dict[str, np.ndarray],
+        by: str = "ev",
+        limit: int | None = None,
+    ) -> list[int]:
+        # NaN (recipe uses no spirit shards) sorts last
+        keys = np.nan_to_num(results[by], nan=-np.inf)
+        order = np.argsort(-keys, kind="stable")
+        return order[:limit].tolist()
+
+
+FORGE_ENGINE = ForgeEngine([*family_recipes(), *promotion_recipes()])
@@ -44,5 +44,6 @@ def gsc_to_copper(
 
 def gsc_dict_to_copper(
     dct: dict[str, float],
+    name: str = "profit",
 ) -> float:
-    return dct["profit_g"] * 10_000 + dct["profit_s"] * 100 + dct["profit_c"]
+    return dct[f"{name}_g"] * 10_000 + dct[f"{name}_s"] * 100 + dct[f"{name}_c"]
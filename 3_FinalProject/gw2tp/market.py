@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import datetime
+import threading
+
+import numpy as np
+
+
+class MarketPrices:
+    def __init__(self) -> None:
+        self.updated_at: datetime.datetime | None = None
+        # Sorted by item id for searchsorted lookups
+        self._item_ids = np.empty(0, dtype=np.int64)
+        self._buy = np.empty(0, dtype=np.int64)
+        self._sell = np.empty(0, dtype=np.int64)
+        self._buy_quantity = np.empty(0, dtype=np.int64)
+        self._sell_quantity = np.empty(0, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._item_ids)
+
+    def update(
+        self,
+        item_ids: np.ndarray,
+        buy: np.ndarray,
+        sell: np.ndarray,
+        buy_quantity: np.ndarray | None = None,
+        sell_quantity: np.ndarray | None = None,
+    ) -> np.ndarray:
+        # Returns the ids whose buy or sell price differs from the last
+        # update, including ids that were not listed before
+        if buy_quantity is None:
+            buy_quantity = np.zeros_like(buy)
+        if sell_quantity is None:
+            sell_quantity = np.zeros_like(sell)
+        order = np.argsort(item_ids, kind="stable")
+        item_ids, buy, sell = item_ids[order], buy[order], sell[order]
+        with self._lock:
+            known, old_buy, old_sell = self._item_ids, self._buy, self._sell
+            self._item_ids = item_ids
+            self._buy = buy
+            self._sell = sell
+            self._buy_quantity = buy_quantity[order]
+            self._sell_quantity = sell_quantity[order]
+            self.updated_at = datetime.datetime.now(tz=datetime.timezone.utc)
+        if len(known) == 0:
+            return item_ids
+        positions = np.minimum(np.searchsorted(known, item_ids), len(known) - 1)
+        changed = (
+            (known[positions] != item_ids)
+            | (old_buy[positions] != buy)
+            | (old_sell[positions] != sell)
+        )
+        return item_ids[changed]
+
+    def columns(self) -> dict[str, np.ndarray]:
+        with self._lock:
+            return {
+                "item_ids": self._item_ids,
+                "buy": self._buy,
+                "sell": self._sell,
+                "buy_quantity": self._buy_quantity,
+                "sell_quantity": self._sell_quantity,
+            }
+
+    def lookup(
+        self,
+        item_ids: list[int],
+    ) -> dict[int, tuple[int, int]]:
+        with self._lock:
+            known, buy, sell = self._item_ids, self._buy, self._sell
+        if len(known) == 0 or len(item_ids) == 0:
+            return {}
+        wanted = np.asarray(item_ids, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(known, wanted), len(known) - 1)
+        found = known[positions] == wanted
+        return {
+            int(item_id): (int(buy[p]), int(sell[p]))
+            for item_id, p in zip(wanted[found], positions[found])
+        }
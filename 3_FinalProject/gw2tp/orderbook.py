@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+
+class BookSide:
+    __slots__ = ("_cumulative_cost", "_cumulative_quantity", "prices")
+
+    def __init__(
+        self,
+        prices: np.ndarray,
+        quantities: np.ndarray,
+    ) -> None:
+        # Levels are ordered best first: ascending sells, descending buys
+        self.prices = prices.astype(np.int32)
+        self._cumulative_quantity = np.cumsum(quantities, dtype=np.int64)
+        self._cumulative_cost = np.cumsum(
+            prices.astype(np.int64) * quantities,
+            dtype=np.int64,
+        )
+
+    @property
+    def depth(self) -> int:
+        if len(self._cumulative_quantity) == 0:
+            return 0
+        return int(self._cumulative_quantity[-1])
+
+    @property
+    def best_price(self) -> int:
+        return int(self.prices[0]) if len(self.prices) > 0 else 0
+
+    def fill(
+        self,
+        quantities: np.ndarray,
+    ) -> np.ndarray:
+        # Total copper to fill each quantity by walking the levels in order.
+        # Quantities beyond the available depth yield NaN.
+        quantities = np.asarray(quantities, dtype=np.int64)
+        if len(self.prices) == 0:
+            return np.full(quantities.shape, np.nan)
+        level = np.searchsorted(self._cumulative_quantity, quantities)
+        clipped = np.minimum(level, len(self.prices) - 1)
+        previous = clipped - 1
+        filled_quantity = np.where(
+            previous >= 0,
+            self._cumulative_quantity[np.maximum(previous, 0)],
+            0,
+        )
+        filled_cost = np.where(
+            previous >= 0,
+            self._cumulative_cost[np.maximum(previous, 0)],
+            0,
+        )
+        total = filled_cost + (quantities - filled_quantity) * self.prices[
+            clipped
+        ].astype(np.int64)
+        return np.where(level < len(self.prices), total, np.nan)
+
+
+class OrderBook:
+    __slots__ = ("buys", "item_id", "sells")
+
+    def __init__(
+        self,
+        item_id: int,
+        buys: BookSide,
+        sells: BookSide,
+    ) -> None:
+        self.item_id = item_id
+        self.buys = buys
+        self.sells = sells
+
+    @classmethod
+    def from_listing(
+        cls,
+        listing: dict[str, Any],
+    ) -> OrderBook:
+        def _side(levels: list[dict[str, int]]) -> BookSide:
+            return BookSide(
+                np.array([lvl["unit_price"] for lvl in levels], dtype=np.int64),
+                np.array([lvl["quantity"] for lvl in levels], dtype=np.int64),
+            )
+
+        return cls(
+            item_id=int(listing["id"]),
+            buys=_side(listing.get("buys", [])),
+            sells=_side(listing.get("sells", [])),
+        )
+
+    def instant_buy_cost(
+        self,
+        quantities: np.ndarray,
+    ) -> np.ndarray:
+        return self.sells.fill(quantities)
+
+    def instant_sell_value(
+        self,
+        quantities: np.ndarray,
+    ) -> np.ndarray:
+        return self.buys.fill(quantities)
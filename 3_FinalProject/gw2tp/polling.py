@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import heapq
+import math
+from dataclasses import dataclass
+from typing import Final
+from typing import Iterable
+
+
+# Mean relative move per poll that counts as one unit of pressure
+VOLATILITY_SCALE: Final[float] = 0.005
+# Requests per hour that count as one unit of pressure
+INTEREST_SCALE: Final[float] = 10.0
+# Weight of the newest observation in the moving averages
+SMOOTHING: Final[float] = 0.3
+
+
+@dataclass
+class _PollState:
+    interval: float
+    next_due: float
+    last_polled: float | None = None
+    last_values: dict[str, float] | None = None
+    volatility: float = 0.0
+    interest: float = 0.0
+
+
+class PollScheduler:
+    """Per subject poll intervals kept in a priority queue.
+
+    Quiet subjects are polled every ``max_interval``; volatility and user
+    interest shorten that down to ``min_interval``. A token bucket caps
+    the polls at ``budget_per_hour``; when it runs dry the most overdue
+    subjects go first.
+    """
+
+    def __init__(
+        self,
+        subjects: Iterable[str],
+        min_interval: float,
+        max_interval: float,
+        budget_per_hour: float,
+        now: float = 0.0,
+    ) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.budget_per_hour = budget_per_hour
+        self._states = {
+            subject: _PollState(interval=max_interval, next_due=now)
+            for subject in subjects
+        }
+        # (next_due, subject); outdated entries are skipped when popped
+        self._heap = [(now, subject) for subject in self._states]
+        heapq.heapify(self._heap)
+        self._tokens = float(len(self._states))
+        self._refilled_at = now
+        self._interest_totals: dict[str, int] = {}
+        self._interest_at: float | None = None
+
+    def interval(
+        self,
+        subject: str,
+    ) -> float:
+        return self._states[subject].interval
+
+    def _refill(
+        self,
+        now: float,
+    ) -> None:
+        rate = self.budget_per_hour / 3_600.0
+        burst = max(float(len(self._states)), 1.0)
+        elapsed = max(now - self._refilled_at, 0.0)
+        self._tokens = min(self._tokens + elapsed * rate, burst)
+        self._refilled_at = now
+
+    def due(
+        self,
+        now: float,
+    ) -> list[str]:
+        self._refill(now)
+        subjects = []
+        while self._heap and self._heap[0][0] <= now and self._tokens >= 1.0:
+            next_due, subject = heapq.heappop(self._heap)
+            state = self._states[subject]
+            if next_due != state.next_due:
+                continue
+            # Retried after min_interval unless `record_poll` reschedules it
+            state.next_due = now + self.min_interval
+            heapq.heappush(self._heap, (state.next_due, subject))
+            subjects.append(subject)
+            self._tokens -= 1.0
+        return subjects
+
+    def _update_interval(
+        self,
+        subject: str,
+    ) -> None:
+        state = self._states[subject]
+        pressure = (
+            state.volatility / VOLATILITY_SCALE
+            + state.interest / INTEREST_SCALE
+        )
+        state.interval = min(
+            max(self.max_interval / (1.0 + pressure), self.min_interval),
+            self.max_interval,
+        )
+        if state.last_polled is None:
+            return
+        next_due = state.last_polled + state.interval
+        if next_due != state.next_due:
+            state.next_due = next_due
+            heapq.heappush(self._heap, (next_due, subject))
+
+    def record_poll(
+        self,
+        subject: str,
+        values: dict[str, float],
+        now: float,
+    ) -> None:
+        state = self._states[subject]
+        previous = state.last_values
+        if previous is not None:
+            moves = [
+                abs(value - previous[key]) / max(abs(previous[key]), 1.0)
+                for key, value in values.items()
+                if key in previous
+            ]
+            if len(moves) > 0:
+                move = sum(moves) / len(moves)
+                state.volatility += SMOOTHING * (move - state.volatility)
+        state.last_values = values
+        state.last_polled = now
+        # Forces a heap entry even if the interval did not change
+        state.next_due = -math.inf
+        self._update_interval(subject)
+
+    def record_interest(
+        self,
+        totals: dict[str, int],
+        now: float,
+    ) -> None:
+        # `totals` are ever growing request counters, only their increase
+        # since the previous call matters. Rates over less than
+        # min_interval are too noisy and wait for the next call.
+        if self._interest_at is not None:
+            if now - self._interest_at < self.min_interval:
+                return
+            hours = (now - self._interest_at) / 3_600.0
+            for subject, state in self._states.items():
+                delta = totals.get(subject, 0) - self._interest_totals.get(
+                    subject, 0
+                )
+                rate = max(delta, 0) / hours
+                state.interest += SMOOTHING * (rate - state.interest)
+                self._update_interval(subject)
+        self._interest_totals = dict(totals)
+        self._interest_at = now
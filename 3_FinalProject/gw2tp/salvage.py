@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import functools
+import os
+from dataclasses import dataclass
+from typing import Final
+
+import numpy as np
+
+from gw2tp.constants import TAX_RATE
+from gw2tp.constants import ItemIDs
+from gw2tp.constants import Kits
+
+
+STACK_SIZE: Final[float] = 250.0
+# Depth queries walk the order books, bounded like batch quantities
+MAX_SALVAGE_STACKS: Final[int] = 40
+SALVAGE_SIMULATIONS = int(
+    os.environ.get("GW2TP_SALVAGE_SIMULATIONS", 1_000_000)
+)
+SALVAGE_SEED = int(os.environ.get("GW2TP_SALVAGE_SEED", 0))
+# Drops with a larger expected count per stack are modelled as normal
+NORMAL_APPROX_MIN_MEAN: Final[float] = 30.0
+_BATCH_SIZE: Final[int] = 1 << 16
+
+
+@dataclass(frozen=True)
+class SalvageTable:
+    gear_id: int
+    # item id -> expected drops per salvaged gear
+    drop_rates: dict[int, float]
+    salvage_costs: float
+
+
+RARE_GEAR_SALVAGE = SalvageTable(
+    gear_id=ItemIDs.RARE_UNID_GEAR,
+    drop_rates={
+        ItemIDs.MIRTHIL: 0.4879,
+        ItemIDs.ELDER_WOOD: 0.3175,
+        ItemIDs.SILK_SCRAP: 0.3367,
+        ItemIDs.THICK_LEATHER: 0.3457,
+        ItemIDs.ORICHALCUM_ORE: 0.041,
+        ItemIDs.ANCIENT_WOOD_LOG: 0.0249,
+        ItemIDs.GOSSAMER_SCRAP: 0.018,
+        ItemIDs.HARDENED_LEATHER: 0.0162,
+        ItemIDs.ECTOPLASM: 0.87,  # lowered
+        ItemIDs.LUCENT_MOTE: 0.2387,
+        ItemIDs.SYMBOL_OF_CONTROL: 0.001,
+        ItemIDs.SYMBOL_OF_ENH: 0.0003,
+        ItemIDs.SYMBOL_OF_PAIN: 0.0004,
+        ItemIDs.CHARM_OF_BRILLIANCE: 0.0006,
+        ItemIDs.CHARM_OF_POTENCE: 0.0009,
+        ItemIDs.CHARM_OF_SKILL: 0.0009,
+    },
+    salvage_costs=Kits.SILVER_FED * 250.0,
+)
+
+COMMON_GEAR_SALVAGE = SalvageTable(
+    gear_id=ItemIDs.COMMON_GEAR,
+    drop_rates={
+        ItemIDs.MIRTHIL: 0.4291,
+        ItemIDs.ELDER_WOOD: 0.3884,
+        ItemIDs.SILK_SCRAP: 0.3059,
+        ItemIDs.THICK_LEATHER: 0.25,  # lowered
+        ItemIDs.ORICHALCUM_ORE: 0.0394,
+        ItemIDs.ANCIENT_WOOD_LOG: 0.0305,
+        ItemIDs.GOSSAMER_SCRAP: 0.0153,
+        ItemIDs.HARDENED_LEATHER: 0.0143,
+        ItemIDs.ECTOPLASM: 0.007,  # lowered
+        ItemIDs.LUCENT_MOTE: 0.1075,  # lowered
+        ItemIDs.SYMBOL_OF_CONTROL: 0.0002,
+        ItemIDs.SYMBOL_OF_ENH: 0.0006,
+        ItemIDs.SYMBOL_OF_PAIN: 0.0005,
+        ItemIDs.CHARM_OF_BRILLIANCE: 0.0004,
+        ItemIDs.CHARM_OF_POTENCE: 0.0003,
+        ItemIDs.CHARM_OF_SKILL: 0.0003,
+    },
+    salvage_costs=(
+        Kits.COPPER_FED * 223.0
+        + Kits.RUNECRAFTER * 25.0
+        + Kits.SILVER_FED * 2.0
+    ),
+)
+
+GEAR_SALVAGE = SalvageTable(
+    gear_id=ItemIDs.UNID_GEAR,
+    drop_rates={
+        ItemIDs.MIRTHIL: 0.4299,
+        ItemIDs.ELDER_WOOD: 0.3564,
+        ItemIDs.SILK_SCRAP: 0.3521,
+        ItemIDs.THICK_LEATHER: 0.2673,
+        ItemIDs.ORICHALCUM_ORE: 0.0387,
+        ItemIDs.ANCIENT_WOOD_LOG: 0.0287,
+        ItemIDs.GOSSAMER_SCRAP: 0.018,
+        ItemIDs.HARDENED_LEATHER: 0.0164,  # lowered
+        ItemIDs.ECTOPLASM: 0.0291,  # lowered
+        ItemIDs.LUCENT_MOTE: 0.98,
+        ItemIDs.SYMBOL_OF_CONTROL: 0.0018,
+        ItemIDs.SYMBOL_OF_ENH: 0.001,
+        ItemIDs.SYMBOL_OF_PAIN: 0.0006,
+        ItemIDs.CHARM_OF_BRILLIANCE: 0.0042,
+        ItemIDs.CHARM_OF_POTENCE: 0.0029,
+        ItemIDs.CHARM_OF_SKILL: 0.0028,
+    },
+    salvage_costs=Kits.RUNECRAFTER * 245 + Kits.SILVER_FED * 5,
+)
+
+SALVAGE_TABLES: Final[dict[str, SalvageTable]] = {
+    "rare_gear_salvage": RARE_GEAR_SALVAGE,
+    "common_gear_salvage": COMMON_GEAR_SALVAGE,
+    "gear_salvage": GEAR_SALVAGE,
+}
+
+
+def expected_mats_value(
+    table: SalvageTable,
+    sells: dict[int, float],
+) -> float:
+    return sum(
+        sells[item_id] * (STACK_SIZE * rate) * TAX_RATE
+        for item_id, rate in table.drop_rates.items()
+    )
+
+
+@dataclass(frozen=True)
+class _DropSamples:
+    # Price independent draws, reused for every query against a table
+    poisson_ids: list[int]
+    poisson_counts: np.ndarray  # shape (len(poisson_ids), simulations)
+    normal_ids: list[int]
+    normal_means: np.ndarray
+    normal_z: np.ndarray  # shape (simulations,)
+
+
+@functools.cache
+def _drop_samples(
+    table_name: str,
+    simulations: int = SALVAGE_SIMULATIONS,
+) -> _DropSamples:
+    table = SALVAGE_TABLES[table_name]
+    rng = np.random.default_rng(SALVAGE_SEED)
+    means = {
+        item_id: STACK_SIZE * rate for item_id, rate in table.drop_rates.items()
+    }
+    poisson_ids = [i for i, m in means.items() if m < NORMAL_APPROX_MIN_MEAN]
+    normal_ids = [i for i, m in means.items() if m >= NORMAL_APPROX_MIN_MEAN]
+
+    # Counts below the normal threshold stay far below 255 drops per stack
+    counts = np.empty((len(poisson_ids), simulations), dtype=np.uint8)
+    for row, item_id in enumerate(poisson_ids):
+        for start in range(0, simulations, _BATCH_SIZE):
+            stop = min(start + _BATCH_SIZE, simulations)
+            counts[row, start:stop] = rng.poisson(
+                means[item_id],
+                size=stop - start,
+            )
+    return _DropSamples(
+        poisson_ids=poisson_ids,
+        poisson_counts=counts,
+        normal_ids=normal_ids,
+        normal_means=np.array([means[i] for i in normal_ids]),
+        normal_z=rng.standard_normal(simulations, dtype=np.float32),
+    )
+
+
+def simulate_salvage_profit(
+    table_name: str,
+    stack_buy: float,
+    sells: dict[int, float],
+    simulations: int = SALVAGE_SIMULATIONS,
+) -> np.ndarray:
+    samples = _drop_samples(table_name, simulations)
+    table = SALVAGE_TABLES[table_name]
+
+    # Sum of independent normals is normal: one draw covers all large drops
+    normal_values = np.array(
+        [sells[i] * TAX_RATE for i in samples.normal_ids],
+    )
+    normal_mean = float(normal_values @ samples.normal_means)
+    normal_std = float(np.sqrt((normal_values**2) @ samples.normal_means))
+    profit = samples.normal_z * np.float32(normal_std)
+    profit += np.float32(normal_mean - stack_buy - table.salvage_costs)
+
+    for row, item_id in enumerate(samples.poisson_ids):
+        value = np.float32(sells[item_id] * TAX_RATE)
+        profit += samples.poisson_counts[row] * value
+    return profit
+
+
+def summarize_profit(
+    profit: np.ndarray,
+) -> dict[str, float]:
+    n = len(profit)
+    ranks = [int(q * (n - 1)) for q in (0.05, 0.5, 0.95)]
+    p5, p50, p95 = np.partition(profit, ranks)[ranks]
+    return {
+        "mean": float(profit.mean(dtype=np.float64)),
+        "std": float(profit.std(dtype=np.float64)),
+        "p5": float(p5),
+        "p50": float(p50),
+        "p95": float(p95),
+        "loss_probability": float(np.count_nonzero(profit < 0.0) / n),
+    }
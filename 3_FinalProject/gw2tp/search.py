@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import bisect
+import re
+from typing import Final
+from typing import Iterable
+
+import numpy as np
+
+
+MAX_SEARCH_RESULTS: Final[int] = 50
+# Looking at a few times the limit is enough to rank the smallest positions
+_PARTITION_FACTOR: Final[int] = 4
+_WORD_PATTERN: Final[re.Pattern[str]] = re.compile(r"[^\W_]+")
+
+
+def tokenize(
+    text: str,
+) -> list[str]:
+    return _WORD_PATTERN.findall(text.lower())
+
+
+class NameIndex:
+    """Word prefix index over item names.
+
+    Items are stored in rank order (shorter names first), so the best
+    matches for a query are simply the smallest positions. Postings are
+    laid out in vocabulary order, which makes every word prefix a single
+    contiguous slice of one int32 array.
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[tuple[int, str]],
+    ) -> None:
+        ranked = sorted(entries, key=lambda entry: (len(entry[1]), entry[1]))
+        self.item_ids = np.array([i for i, _ in ranked], dtype=np.int32)
+        self.names = [name for _, name in ranked]
+
+        postings: dict[str, list[int]] = {}
+        for position, name in enumerate(self.names):
+            for token in set(tokenize(name)):
+                postings.setdefault(token, []).append(position)
+        self._vocabulary = sorted(postings)
+        counts = [len(postings[token]) for token in self._vocabulary]
+        self._offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self._offsets[1:])
+        self._postings = np.fromiter(
+            (p for token in self._vocabulary for p in postings[token]),
+            dtype=np.int32,
+            count=int(self._offsets[-1]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.item_ids.nbytes + self._offsets.nbytes + self._postings.nbytes
+        )
+
+    def _prefix_postings(
+        self,
+        prefix: str,
+    ) -> np.ndarray:
+        lo = bisect.bisect_left(self._vocabulary, prefix)
+        hi = bisect.bisect_left(self._vocabulary, prefix + "\uffff", lo)
+        return self._postings[self._offsets[lo] : self._offsets[hi]]
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+    ) -> list[tuple[int, str]]:
+        # Every query word has to prefix some word of the name
+        words = list(dict.fromkeys(tokenize(query)))
+        if len(words) == 0 or limit <= 0:
+            return []
+        matches = sorted(
+            (self._prefix_postings(word) for word in words),
+            key=len,
+        )
+        candidates = matches[0]
+        for other in matches[1:]:
+            if len(candidates) == 0:
+                break
+            mask = np.zeros(len(self.names), dtype=bool)
+            mask[other] = True
+            candidates = candidates[mask[candidates]]
+
+        window = limit * _PARTITION_FACTOR
+        if len(candidates) > window:
+            smallest = np.unique(np.partition(candidates, window)[:window])
+            # Duplicates only arise from repeated words, fall back if so
+            if len(smallest) < limit:
+                smallest = np.unique(candidates)
+        else:
+            smallest = np.unique(candidates)
+        return [
+            (int(self.item_ids[p]), self.names[p]) for p in smallest[:limit]
+        ]
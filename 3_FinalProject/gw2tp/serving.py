@@ -0,0 +1,88 @@
+"""Production entry point of the API and frontend containers:
+
+    python -m gw2tp.serving backend.api:app --port 8000
+
+Runs ``GW2TP_WORKERS`` uvicorn processes, one per available core by
+default, under uvicorn's supervisor, which restarts crashed workers. On
+SIGTERM every worker stops accepting connections and drains its in-flight
+requests for up to ``GW2TP_GRACEFUL_TIMEOUT_SECONDS`` before the app's
+lifespan shuts down. Pools (Mongo, outgoing HTTP) are sized per worker.
+
+Setting ``GW2TP_DEBUGPY`` to a listen address such as ``0.0.0.0:5678``
+runs a single worker under debugpy instead; ``GW2TP_DEBUGPY_WAIT=1``
+holds startup until the debugger attached.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+
+
+def available_cores() -> int:
+    try:
+        # Honours the CPU set a container is pinned to
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+SERVER_WORKERS = int(os.environ.get("GW2TP_WORKERS", 0)) or available_cores()
+GRACEFUL_TIMEOUT_SECONDS = int(
+    os.environ.get("GW2TP_GRACEFUL_TIMEOUT_SECONDS", 20)
+)
+KEEP_ALIVE_SECONDS = int(os.environ.get("GW2TP_KEEP_ALIVE_SECONDS", 5))
+DEBUGPY_ADDRESS = os.environ.get("GW2TP_DEBUGPY", "")
+DEBUGPY_WAIT = os.environ.get("GW2TP_DEBUGPY_WAIT", "0") == "1"
+
+
+def _start_debugpy(
+    address: str,
+    wait: bool,
+) -> None:
+    import debugpy  # noqa: PLC0415
+
+    host, _, port = address.rpartition(":")
+    debugpy.listen((host or "0.0.0.0", int(port)))  # noqa: S104
+    if wait:
+        print(f"Waiting for a debugger on {address}...")
+        debugpy.wait_for_client()
+
+
+def serve(
+    app: str,
+    host: str,
+    port: int,
+    workers: int = SERVER_WORKERS,
+) -> None:
+    import uvicorn  # noqa: PLC0415
+
+    if DEBUGPY_ADDRESS:
+        # Breakpoints only work in the process debugpy runs in
+        _start_debugpy(DEBUGPY_ADDRESS, wait=DEBUGPY_WAIT)
+        workers = 1
+    print(f"Serving {app} on {host}:{port} with {workers} workers...")
+    uvicorn.run(
+        app,
+        host=host,
+        port=port,
+        workers=workers,
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT_SECONDS,
+        timeout_keep_alive=KEEP_ALIVE_SECONDS,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Serve an ASGI app with one worker process per core",
+    )
+    parser.add_argument("app", help="Import string, e.g. backend.api:app")
+    parser.add_argument("--host", default="0.0.0.0")  # noqa: S104
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    args = parser.parse_args()
+    serve(args.app, host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any
+from typing import Iterator
+from typing import Mapping
+
+import numpy as np
+
+from gw2tp.constants import TAX_RATE
+
+
+# Columns of a PriceTable, in storage order
+COLUMNS = ("item_ids", "buy", "sell", "buy_quantity", "sell_quantity")
+# Computed for the whole table when first read
+DERIVED_COLUMNS = ("flip", "sell_after_tax")
+
+
+def _read_only(
+    values: np.ndarray,
+) -> np.ndarray:
+    values = np.ascontiguousarray(values)
+    values.setflags(write=False)
+    return values
+
+
+def copper_to_gsc_array(
+    copper: np.ndarray,
+) -> np.ndarray:
+    # Vectorized copper_to_gsc: one (gold, silver, copper) row per value,
+    # all three carrying the sign of the value
+    sign = np.where(copper < 0, -1, 1)
+    magnitude = np.abs(copper)
+    gsc = np.stack(
+        [
+            magnitude // 10_000,
+            (magnitude % 10_000) // 100,
+            magnitude % 100,
+        ],
+        axis=1,
+    ).astype(np.int64)
+    return gsc * sign[:, None]
+
+
+class PriceTable:
+    """Immutable trading post listings of a set of items.
+
+    Every column is a read-only int64 array sorted by item id. Items are
+    found through an id -> position map, built on the first lookup, so
+    whole-column reads never pay for it. Rows are views into the columns;
+    derived columns and gold/silver/copper splits are computed for all
+    items at once, and only when first read.
+    """
+
+    __slots__ = (
+        "_derived",
+        "_index",
+        "buy",
+        "buy_quantity",
+        "item_ids",
+        "sell",
+        "sell_quantity",
+    )
+
+    item_ids: np.ndarray
+    buy: np.ndarray
+    sell: np.ndarray
+    buy_quantity: np.ndarray
+    sell_quantity: np.ndarray
+
+    def __init__(
+        self,
+        item_ids: np.ndarray,
+        buy: np.ndarray,
+        sell: np.ndarray,
+        buy_quantity: np.ndarray | None = None,
+        sell_quantity: np.ndarray | None = None,
+    ) -> None:
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        order = np.argsort(item_ids, kind="stable")
+        columns = (item_ids, buy, sell, buy_quantity, sell_quantity)
+        for name, values in zip(COLUMNS, columns):
+            if values is None:
+                values = np.zeros(len(item_ids), dtype=np.int64)
+            values = np.asarray(values, dtype=np.int64)[order]
+            object.__setattr__(self, name, _read_only(values))
+        object.__setattr__(self, "_index", None)
+        object.__setattr__(self, "_derived", {})
+
+    @classmethod
+    def from_listings(
+        cls,
+        listings: Mapping[int, tuple[int, int, int, int]],
+        **kwargs: Any,
+    ) -> PriceTable:
+        # item id -> (buy, sell, buy quantity, sell quantity)
+        rows = np.array(
+            [(item_id, *listing) for item_id, listing in listings.items()],
+            dtype=np.int64,
+        ).reshape(-1, len(COLUMNS))
+        return cls(*rows.T, **kwargs)
+
+    def __setattr__(
+        self,
+        name: str,
+        value: Any,
+    ) -> None:
+        raise AttributeError(
+            f"{type(self).__name__} is immutable, cannot set {name}"
+        )
+
+    def __len__(self) -> int:
+        return len(self.item_ids)
+
+    def _positions(self) -> dict[int, int]:
+        # Concurrent first lookups may both build it, with the same result
+        if self._index is None:
+            object.__setattr__(
+                self,
+                "_index",
+                dict(zip(self.item_ids.tolist(), range(len(self)))),
+            )
+        return self._index
+
+    def __contains__(
+        self,
+        item_id: object,
+    ) -> bool:
+        return item_id in self._positions()
+
+    def __getitem__(
+        self,
+        item_id: int,
+    ) -> PriceRow:
+        return PriceRow(self, self._positions()[item_id])
+
+    def __iter__(self) -> Iterator[PriceRow]:
+        for position in range(len(self)):
+            yield PriceRow(self, position)
+
+    def positions(
+        self,
+        item_ids: list[int],
+    ) -> np.ndarray:
+        # KeyError for items that are not listed
+        index = self._positions()
+        return np.array([index[i] for i in item_ids], dtype=np.intp)
+
+    @property
+    def flip(self) -> np.ndarray:
+        # Bought at the buy price and sold at the sell price after tax,
+        # truncated to copper
+        if "flip" not in self._derived:
+            after_tax = np.round(self.sell * TAX_RATE, 6)
+            self._derived["flip"] = _read_only(
+                (after_tax - self.buy).astype(np.int64)
+            )
+        return self._derived["flip"]
+
+    @property
+    def sell_after_tax(self) -> np.ndarray:
+        if "sell_after_tax" not in self._derived:
+            self._derived["sell_after_tax"] = _read_only(
+                self.sell * TAX_RATE
+            )
+        return self._derived["sell_after_tax"]
+
+    def gsc(
+        self,
+        column: str,
+    ) -> np.ndarray:
+        # (gold, silver, copper) per item of a price or derived column
+        key = f"{column}_gsc"
+        if key not in self._derived:
+            self._derived[key] = _read_only(
+                copper_to_gsc_array(getattr(self, column))
+            )
+        return self._derived[key]
+
+
+class PriceRow:
+    # View of one item of a PriceTable, reads go straight to its columns
+    __slots__ = ("_position", "_table")
+
+    def __init__(
+        self,
+        table: PriceTable,
+        position: int,
+    ) -> None:
+        self._table = table
+        self._position = position
+
+    def __repr__(self) -> str:
+        return (
+            f"PriceRow(item_id={self.item_id}, buy={self.buy}, "
+            f"sell={self.sell})"
+        )
+
+    @property
+    def item_id(self) -> int:
+        return int(self._table.item_ids[self._position])
+
+    @property
+    def buy(self) -> int:
+        return int(self._table.buy[self._position])
+
+    @property
+    def sell(self) -> int:
+        return int(self._table.sell[self._position])
+
+    @property
+    def buy_quantity(self) -> int:
+        return int(self._table.buy_quantity[self._position])
+
+    @property
+    def sell_quantity(self) -> int:
+        return int(self._table.sell_quantity[self._position])
+
+    @property
+    def flip(self) -> int:
+        return int(self._table.flip[self._position])
+
+    @property
+    def sell_after_tax(self) -> float:
+        return float(self._table.sell_after_tax[self._position])
+
+    def to_dict(self) -> dict[str, int]:
+        # The /price layout: prices and their _g/_s/_c triples
+        data = {"buy": self.buy, "sell": self.sell}
+        for column in ("buy", "sell", *DERIVED_COLUMNS):
+            g, s, c = self._table.gsc(column)[self._position].tolist()
+            data[f"{column}_g"] = g
+            data[f"{column}_s"] = s
+            data[f"{column}_c"] = c
+        return data
+
+
+class PriceSnapshot(PriceTable):
+    """Price table of one point in time, addressed by its content.
+
+    ``digest`` hashes the item ids and prices: snapshots of the same prices
+    share it, whatever their timestamp or quantities, so results computed
+    from a snapshot can be memoized, tagged and reproduced by it. No
+    calculator result depends on the quantities.
+    """
+
+    __slots__ = ("digest", "timestamp")
+
+    timestamp: float
+    digest: str
+
+    def __init__(
+        self,
+        item_ids: np.ndarray,
+        buy: np.ndarray,
+        sell: np.ndarray,
+        buy_quantity: np.ndarray | None = None,
+        sell_quantity: np.ndarray | None = None,
+        timestamp: float = 0.0,
+    ) -> None:
+        super().__init__(item_ids, buy, sell, buy_quantity, sell_quantity)
+        digest = hashlib.blake2b(digest_size=16)
+        for values in (self.item_ids, self.buy, self.sell):
+            digest.update(values.tobytes())
+        object.__setattr__(self, "timestamp", float(timestamp))
+        object.__setattr__(self, "digest", digest.hexdigest())
+
+    def __eq__(
+        self,
+        other: object,
+    ) -> bool:
+        if not isinstance(other, PriceSnapshot):
+            return NotImplemented
+        return self.digest == other.digest
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def __repr__(self) -> str:
+        return (
+            f"PriceSnapshot({self.digest[:12]}, {len(self)} items, "
+            f"timestamp={self.timestamp})"
+        )
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from gw2tp.flips import FlipIndex
+from gw2tp.flips import compute_flip_scores
+
+
+def _market(
+    n: int,
+) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(0)
+    return {
+        "item_ids": np.arange(n, dtype=np.int64),
+        "buy": rng.integers(1, 10_000, n),
+        "sell": rng.integers(1, 20_000, n),
+        "buy_quantity": rng.integers(0, 500, n),
+        "sell_quantity": rng.integers(0, 500, n),
+    }
+
+
+def _brute_force(
+    market: dict[str, np.ndarray],
+    limit: int,
+    min_roi: float,
+) -> list[float]:
+    scores = compute_flip_scores(
+        market["buy"],
+        market["sell"],
+        market["buy_quantity"],
+        market["sell_quantity"],
+    )
+    passing = (
+        np.isfinite(scores["score"])
+        & (scores["margin"] > 0.0)
+        & (scores["roi"] >= min_roi)
+    )
+    return sorted(scores["score"][passing].tolist(), reverse=True)[:limit]
+
+
+def test_min_roi_is_answered_from_the_top_entries(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    market = _market(20_000)
+    index = FlipIndex(size=1_000)
+    index.update(**market)
+
+    def no_fallback(
+        *args: object,
+    ) -> None:
+        raise AssertionError("searched the ROI order")
+
+    monkeypatch.setattr(FlipIndex, "_query_by_roi", no_fallback)
+    flips = index.query(limit=20, min_roi=0.5)
+    assert [f["score"] for f in flips] == _brute_force(market, 20, 0.5)
+    assert all(f["roi"] >= 0.5 for f in flips)
+
+
+@pytest.mark.parametrize("min_roi", [0.0, 0.5, 3.0, 100.0])
+def test_falls_back_once_the_top_entries_run_out(
+    min_roi: float,
+) -> None:
+    market = _market(20_000)
+    index = FlipIndex(size=10)
+    index.update(**market)
+    flips = index.query(limit=50, min_roi=min_roi)
+    assert [f["score"] for f in flips] == _brute_force(market, 50, min_roi)